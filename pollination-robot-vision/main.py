@@ -5,71 +5,117 @@ from vision.target_locator import TargetLocator
 from vision.obstacle_detector import ObstacleDetector
 from utils.config import Config
 from utils.visualization import Visualizer
+from utils.pipeline import Pipeline
 import time
 import cv2
+
+def build_stages(flower_detector, obstacle_detector, target_locator, pollination_checker):
+    """构建逐帧处理阶段：花朵检测 → 障碍物检测 → 目标定位与授粉检查 → 可视化"""
+    def detect_flowers(item):
+        # 检测花朵
+        start_time = time.time()
+        item["flowers"] = flower_detector.detect(item["frame"])
+        item["detection_time"] = time.time() - start_time
+        return item
+
+    def detect_obstacles(item):
+        # 检测障碍物
+        item["obstacles"] = obstacle_detector.detect(item["frame"])
+        return item
+
+    def locate_target(item):
+        # 定位最佳授粉点
+        target_position, target_flower = target_locator.locate(item["frame"], item["flowers"])
+        item["target_position"] = target_position
+        item["target_flower"] = target_flower
+
+        # 检查授粉状态（如果有目标花朵）
+        item["pollination_status"] = False
+        if target_flower:
+            item["pollination_status"] = pollination_checker.check(item["frame"], target_flower)
+        return item
+
+    def visualize(item):
+        # 可视化结果
+        result_frame = item["frame"].copy()
+        result_frame = Visualizer.draw_flowers(result_frame, item["flowers"])
+        result_frame = Visualizer.draw_obstacles(result_frame, item["obstacles"])
+        result_frame = Visualizer.draw_target(result_frame, item["target_position"], item["target_flower"])
+
+        # 添加状态信息
+        status_text = f"Flowers: {len(item['flowers'])}, Obstacles: {len(item['obstacles'])}"
+        status_text += f", Detection Time: {item['detection_time']:.2f}s"
+        cv2.putText(result_frame, status_text, (10, 30),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
+
+        if item["target_flower"]:
+            pollination_status = item["pollination_status"]
+            pollination_text = "Pollination: " + ("SUCCESS" if pollination_status else "FAILED")
+            cv2.putText(result_frame, pollination_text, (10, 60),
+                        cv2.FONT_HERSHEY_SIMPLEX, 0.7,
+                        (0, 255, 0) if pollination_status else (0, 0, 255), 2)
+
+        item["result_frame"] = result_frame
+        return item
+
+    return [
+        ("flowers", detect_flowers),
+        ("obstacles", detect_obstacles),
+        ("target", locate_target),
+        ("visualize", visualize)
+    ]
+
 def main():
     # 加载配置
     config = Config()
-    
+
     # 初始化各模块
-    with Camera(config.CAMERA_ID, config.CAMERA_WIDTH, config.CAMERA_HEIGHT) as camera:
+    with Camera(config.CAMERA_ID, config.CAMERA_WIDTH, config.CAMERA_HEIGHT,
+                threaded=config.CAMERA_THREADED, buffer_size=config.CAMERA_BUFFER_SIZE) as camera:
         flower_detector = FlowerDetector(config)
         pollination_checker = PollinationChecker(config)
         target_locator = TargetLocator(config)
         obstacle_detector = ObstacleDetector(config)
-        
+        stages = build_stages(flower_detector, obstacle_detector, target_locator, pollination_checker)
+
+        def capture():
+            # 捕获图像（后台采集模式下等待下一帧，避免重复处理同一帧）
+            frame = camera.read_next(timeout=0.1)[0] if camera.threaded else camera.read()
+            return None if frame is None else {"frame": frame}
+
+        pipeline = None
+        if config.PIPELINE_MODE:
+            # 各阶段在独立线程上处理连续帧
+            pipeline = Pipeline(capture, stages, queue_size=config.PIPELINE_QUEUE_SIZE).start()
+        version = 0
+
         # 主循环
         while True:
-            # 捕获图像
-            frame = camera.read()
-            if frame is None:
-                print("无法获取图像")
-                time.sleep(0.1)
-                continue
-                
-            # 检测花朵
-            start_time = time.time()
-            flowers = flower_detector.detect(frame)
-            detection_time = time.time() - start_time
-            
-            # 检测障碍物
-            obstacles = obstacle_detector.detect(frame)
-            
-            # 定位最佳授粉点
-            target_position, target_flower = target_locator.locate(frame, flowers)
-            
-            # 检查授粉状态（如果有目标花朵）
-            pollination_status = False
-            if target_flower:
-                pollination_status = pollination_checker.check(frame, target_flower)
-            
-            # 可视化结果
-            result_frame = frame.copy()
-            result_frame = Visualizer.draw_flowers(result_frame, flowers)
-            result_frame = Visualizer.draw_obstacles(result_frame, obstacles)
-            result_frame = Visualizer.draw_target(result_frame, target_position, target_flower)
-            
-            # 添加状态信息
-            status_text = f"Flowers: {len(flowers)}, Obstacles: {len(obstacles)}"
-            status_text += f", Detection Time: {detection_time:.2f}s"
-            cv2.putText(result_frame, status_text, (10, 30), 
-                        cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
-            
-            if target_flower:
-                pollination_text = "Pollination: " + ("SUCCESS" if pollination_status else "FAILED")
-                cv2.putText(result_frame, pollination_text, (10, 60), 
-                            cv2.FONT_HERSHEY_SIMPLEX, 0.7, 
-                            (0, 255, 0) if pollination_status else (0, 0, 255), 2)
-            
+            if pipeline is not None:
+                item, latest_version = pipeline.latest.wait_newer(version, timeout=0.1)
+                if item is None or latest_version == version:
+                    continue
+                version = latest_version
+            else:
+                item = capture()
+                if item is None:
+                    print("无法获取图像")
+                    time.sleep(0.1)
+                    continue
+                for _, stage in stages:
+                    item = stage(item)
+
             # 显示结果
-            cv2.imshow("Pollination Robot Vision", result_frame)
-            
+            cv2.imshow("Pollination Robot Vision", item["result_frame"])
+
             # 按ESC或q键退出
             key = cv2.waitKey(1)
             if key == 27 or key == ord('q'):  # ESC键或q键
                 break
-                
+
+        if pipeline is not None:
+            pipeline.stop()
         cv2.destroyAllWindows()
 
 if __name__ == "__main__":
-    main()    
\ No newline at end of file
+    main()
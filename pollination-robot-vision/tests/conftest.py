@@ -0,0 +1,5 @@
+import os
+import sys
+
+# 测试直接导入 vision/、utils/ 等顶层包，与 main.py 的运行方式一致
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -5,6 +5,10 @@ class Config:
     CAMERA_ID = 0
     CAMERA_WIDTH = 640
     CAMERA_HEIGHT = 480
+    CAMERA_THREADED = True     # 后台线程采集，主循环只取最新帧
+    CAMERA_BUFFER_SIZE = 4     # 采集环形缓冲区容量（帧）
+    PIPELINE_MODE = True       # 各处理阶段在流水线线程上并行处理连续帧
+    PIPELINE_QUEUE_SIZE = 2    # 流水线阶段间队列容量（帧）
     
     # 花朵检测配置
     MIN_FLOWER_AREA = 500
@@ -1,41 +1,154 @@
+import threading
+import time
+from collections import deque
+
 import cv2
 
 class Camera:
     """摄像头控制类，负责图像采集"""
-    
-    def __init__(self, camera_id=0, width=640, height=480):
+
+    def __init__(self, camera_id=0, width=640, height=480, threaded=False, buffer_size=4):
         self.camera_id = camera_id
         self.width = width
         self.height = height
         self.cap = None
-        
+
+        # 后台采集模式：采集线程把帧写入有界环形缓冲区
+        self.threaded = threaded
+        self.buffer_size = max(1, buffer_size)
+        self._buffer = deque(maxlen=self.buffer_size)  # 元素为 (帧序号, 时间戳, 帧)
+        self._cond = threading.Condition()
+        self._thread = None
+        self._running = False
+
+        # 帧统计
+        self.captured_frames = 0   # 已采集的帧数
+        self.delivered_frames = 0  # 已返回给调用方的帧数
+        self.dropped_frames = 0    # 采集后从未被读取的帧数
+        self.last_timestamp = None # 最近一次返回帧的采集时间
+        self._last_index = -1      # 最近一次返回帧的序号
+
     def open(self):
         """打开摄像头"""
         self.cap = cv2.VideoCapture(self.camera_id)
         if not self.cap.isOpened():
             raise IOError(f"无法打开摄像头 {self.camera_id}")
-            
+
         self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, self.width)
         self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, self.height)
+
+        if self.threaded:
+            self._start_capture_thread()
         return True
-        
-    def read(self):
-        """读取一帧图像"""
+
+    def read(self, timeout=1.0):
+        """读取一帧图像（后台采集模式下返回最新帧）"""
+        if self.threaded:
+            frame, _ = self.read_latest(timeout)
+            return frame
+
         if self.cap is None or not self.cap.isOpened():
             return None
-            
+
         ret, frame = self.cap.read()
-        return frame if ret else None
-        
+        if not ret:
+            return None
+        self.last_timestamp = time.time()
+        self.captured_frames += 1
+        self.delivered_frames += 1
+        return frame
+
+    def read_latest(self, timeout=1.0):
+        """返回缓冲区中最新的一帧及其时间戳，跳过的旧帧计入丢帧；没有新帧时返回 (None, None)"""
+        with self._cond:
+            self._cond.wait_for(lambda: self._has_new_frame() or not self._running, timeout)
+            if not self._has_new_frame():
+                return None, None
+            return self._take(self._buffer[-1])
+
+    def read_next(self, timeout=1.0):
+        """等待并返回上次读取之后的下一帧及其时间戳；超时或摄像头已释放时返回 (None, None)"""
+        with self._cond:
+            self._cond.wait_for(lambda: self._has_new_frame() or not self._running, timeout)
+            for entry in self._buffer:
+                if entry[0] > self._last_index:
+                    return self._take(entry)
+            return None, None
+
+    def get_stats(self):
+        """返回采集统计信息"""
+        with self._cond:
+            return {
+                "captured": self.captured_frames,
+                "delivered": self.delivered_frames,
+                "dropped": self.dropped_frames,
+                "buffered": len(self._buffer),
+                "last_timestamp": self.last_timestamp
+            }
+
     def release(self):
         """释放摄像头资源"""
+        self._stop_capture_thread()
         if self.cap:
             self.cap.release()
             self.cap = None
-            
+
+    def _has_new_frame(self):
+        """缓冲区中是否有尚未读取的帧（调用方需持有锁）"""
+        return bool(self._buffer) and self._buffer[-1][0] > self._last_index
+
+    def _take(self, entry):
+        """标记一帧为已读取并更新统计（调用方需持有锁）"""
+        index, timestamp, frame = entry
+        if index > self._last_index:
+            self.dropped_frames += index - self._last_index - 1
+            self.delivered_frames += 1
+            self._last_index = index
+        self.last_timestamp = timestamp
+        return frame, timestamp
+
+    def _start_capture_thread(self):
+        """启动后台采集线程"""
+        self._running = True
+        self._thread = threading.Thread(target=self._capture_loop, name="camera-capture", daemon=True)
+        self._thread.start()
+
+    def _stop_capture_thread(self):
+        """停止后台采集线程"""
+        if self._thread is None:
+            return
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+        # 采集线程可能正阻塞在 cap.read() 中，必须等它真正退出后才能清空缓冲区和释放摄像头
+        self._thread.join(timeout=1.0)
+        while self._thread.is_alive():
+            print("等待摄像头采集线程结束...")
+            self._thread.join(timeout=1.0)
+        self._thread = None
+        # 采集停止后丢弃缓冲的帧，释放后读取不会再返回旧帧
+        with self._cond:
+            self.dropped_frames += self.captured_frames - 1 - self._last_index
+            self._last_index = self.captured_frames - 1
+            self._buffer.clear()
+
+    def _capture_loop(self):
+        """后台采集循环：持续读取摄像头，缓冲区满时覆盖最旧的帧"""
+        while self._running:
+            ret, frame = self.cap.read()
+            timestamp = time.time()
+            if not ret:
+                time.sleep(0.01)
+                continue
+
+            with self._cond:
+                self._buffer.append((self.captured_frames, timestamp, frame))
+                self.captured_frames += 1
+                self._cond.notify_all()
+
     def __enter__(self):
         self.open()
         return self
-        
+
     def __exit__(self, exc_type, exc_val, exc_tb):
-        self.release()    
\ No newline at end of file
+        self.release()
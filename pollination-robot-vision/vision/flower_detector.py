@@ -1,6 +1,8 @@
 import cv2
 import numpy as np
 
+from vision.contour_features import contour_features
+
 class FlowerDetector:
     """花朵识别类，负责区分雌花、雄花和雌雄同体花"""
     
@@ -12,22 +14,22 @@ class FlowerDetector:
         if frame is None:
             return []
             
+        # 转换为HSV颜色空间便于颜色检测（整帧只转换一次）
+        hsv = cv2.cvtColor(frame, cv2.COLOR_BGR2HSV)
+        
         # 预处理图像
-        processed_frame = self._preprocess(frame)
+        processed_frame = self._preprocess(hsv)
         
         # 检测花朵轮廓
         contours = self._detect_contours(processed_frame)
         
         # 分类花朵类型
-        flowers = self._classify_flowers(frame, contours)
+        flowers = self._classify_flowers(hsv, contours)
         
         return flowers
         
-    def _preprocess(self, frame):
+    def _preprocess(self, hsv):
         """图像预处理"""
-        # 转换为HSV颜色空间便于颜色检测
-        hsv = cv2.cvtColor(frame, cv2.COLOR_BGR2HSV)
-        
         # 高斯模糊减少噪声
         blurred = cv2.GaussianBlur(hsv, (5, 5), 0)
         
@@ -48,50 +50,36 @@ class FlowerDetector:
         
         return contours
         
-    def _classify_flowers(self, frame, contours):
-        """根据轮廓特征分类花朵类型"""
+    def _classify_flowers(self, hsv, contours):
+        """根据轮廓特征批量分类花朵类型（雌花、雄花）"""
+        if not contours:
+            return []
+
+        # 未模糊的黄色掩码，用于计算每个轮廓外接框内的黄色像素比例
+        yellow_mask = cv2.inRange(hsv,
+                                  np.array([20, 100, 100]),
+                                  np.array([30, 255, 255]))
+
+        # 一次性计算所有轮廓的面积、中心、外接框和黄色比例
+        features = contour_features(contours, ratio_mask=yellow_mask)
+        areas = features["areas"]
+
+        # 过滤过小或过大的轮廓
+        keep = np.flatnonzero((areas >= self.config.MIN_FLOWER_AREA) &
+                              (areas <= self.config.MAX_FLOWER_AREA) &
+                              (areas > 0))
+
+        # 雌花中心黄色区域较大，黄色比例超过阈值判为雌花
+        is_female = features["ratios"][keep] > self.config.FEMALE_YELLOW_RATIO
+        centroids = features["centroids"][keep].astype(np.int32)
+
         flowers = []
-        
-        for contour in contours:
-            area = cv2.contourArea(contour)
-            
-            # 过滤过小或过大的轮廓
-            if area < self.config.MIN_FLOWER_AREA or area > self.config.MAX_FLOWER_AREA:
-                continue
-                
-            # 计算轮廓中心
-            M = cv2.moments(contour)
-            if M["m00"] != 0:
-                cX = int(M["m10"] / M["m00"])
-                cY = int(M["m01"] / M["m00"])
-                
-                # 判断花朵类型
-                flower_type = self._determine_flower_type(frame, contour)
-                
-                flowers.append({
-                    "type": flower_type,
-                    "position": (cX, cY),
-                    "area": area,
-                    "contour": contour
-                })
-                
+        for i, index in enumerate(keep):
+            flowers.append({
+                "type": "female" if is_female[i] else "male",
+                "position": (int(centroids[i, 0]), int(centroids[i, 1])),
+                "area": float(areas[index]),
+                "contour": contours[index]
+            })
+
         return flowers
-        
-    def _determine_flower_type(self, frame, contour):
-        """根据花朵特征确定类型（雌花、雄花或未知）"""
-        # 获取轮廓的边界框
-        x, y, w, h = cv2.boundingRect(contour)
-        roi = frame[y:y+h, x:x+w]
-        
-        # 计算黄色像素比例（雌花中心黄色区域较大）
-        hsv_roi = cv2.cvtColor(roi, cv2.COLOR_BGR2HSV)
-        yellow_mask = cv2.inRange(hsv_roi, 
-                                  np.array([20, 100, 100]), 
-                                  np.array([30, 255, 255]))
-        yellow_ratio = np.count_nonzero(yellow_mask) / (w * h)
-        
-        # 根据黄色比例和形状特征判断花朵类型
-        if yellow_ratio > self.config.FEMALE_YELLOW_RATIO:
-            return "female"
-        else:
-            return "male"    
\ No newline at end of file
@@ -0,0 +1,244 @@
+# benchmark.py
+import argparse
+import json
+import os
+import platform
+import resource
+import sys
+import time
+import tracemalloc
+
+import cv2
+import numpy as np
+
+from config.config import Config
+from config.config_competition import CompetitionConfig
+from vision.flower_detector import FlowerDetector
+from vision.obstacle_detector import ObstacleDetector
+from vision.pollination_checker import PollinationChecker
+from vision.target_locator import TargetLocator
+from vision.frame_context import FrameContext
+from vision.recording import Recording, MANIFEST_FILE
+from navigation.lane_follower import LaneFollower
+from utils.scene_generator import SceneGenerator
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg')
+PERCENTILES = (50, 95, 99)
+
+def load_frames(source, limit=None):
+    """从图片文件夹或录像目录加载帧"""
+    if os.path.exists(os.path.join(source, MANIFEST_FILE)):
+        recording = Recording(source)
+        count = len(recording) if limit is None else min(limit, len(recording))
+        return [np.array(recording[i]) for i in range(count)]
+
+    frames = []
+    for filename in sorted(os.listdir(source)):
+        if not filename.lower().endswith(IMAGE_EXTENSIONS):
+            continue
+        frame = cv2.imread(os.path.join(source, filename))
+        if frame is None:
+            print(f"无法读取图片: {filename}")
+            continue
+        frames.append(frame)
+        if limit is not None and len(frames) >= limit:
+            break
+    return frames
+
+def synthetic_frames(count, width, height, seed=0, **scene):
+    """用场景生成器生成合成帧（参数见 SceneGenerator.generate）"""
+    generator = SceneGenerator(width, height, seed=seed)
+    return [frame for frame, _ in generator.frames(count, **scene)]
+
+def build_stages(config):
+    """构建待测阶段：名称 → 接收 FrameContext 的函数
+
+    目标定位和授粉检查依赖花朵检测结果，这些输入在计时前预先算好，
+    每个阶段只计自身的耗时。
+    """
+    flower_detector = FlowerDetector(config)
+    obstacle_detector = ObstacleDetector(config)
+    pollination_checker = PollinationChecker(config)
+    target_locator = TargetLocator(config)
+    lane_follower = LaneFollower(config)
+    reference = FlowerDetector(config)
+
+    def prepare(frame):
+        """计算下游阶段需要的输入（不计时）"""
+        flowers = reference.detect(frame)
+        target = target_locator.locate(frame, flowers)
+        height, width = frame.shape[:2]
+        position = target["position"] if target is not None else (width // 2, height // 2)
+        return {"flowers": flowers, "position": position}
+
+    stages = {
+        "flower_detector": lambda ctx, inputs: flower_detector.detect(ctx),
+        "obstacle_detector": lambda ctx, inputs: obstacle_detector.detect(ctx),
+        "pollination_checker": lambda ctx, inputs: pollination_checker.check(ctx, inputs["position"]),
+        "target_locator": lambda ctx, inputs: target_locator.locate(ctx.frame, inputs["flowers"]),
+        "lane_follower": lambda ctx, inputs: lane_follower.detect_lane(ctx),
+    }
+
+    def all_stages(ctx, inputs):
+        # 共享同一帧上下文，与主循环中一帧的实际开销一致
+        flowers = flower_detector.detect(ctx)
+        obstacle_detector.detect(ctx)
+        lane_follower.detect_lane(ctx)
+        target = target_locator.locate(ctx.frame, flowers)
+        if target is not None:
+            pollination_checker.check(ctx, target["position"])
+
+    stages["total"] = all_stages
+    return stages, prepare
+
+def summarize(latencies):
+    """把单次耗时 (秒) 汇总为毫秒百分位和吞吐量"""
+    latencies = np.asarray(latencies) * 1000
+    summary = {f"p{p}_ms": round(float(np.percentile(latencies, p)), 3) for p in PERCENTILES}
+    summary["mean_ms"] = round(float(latencies.mean()), 3)
+    summary["max_ms"] = round(float(latencies.max()), 3)
+    summary["throughput_fps"] = round(float(1000 / latencies.mean()), 1) if latencies.mean() > 0 else None
+    summary["samples"] = int(latencies.size)
+    return summary
+
+def measure_peak_memory(stage, frames, inputs, config):
+    """用 tracemalloc 单独跑一遍，记录阶段内的峰值内存（不与计时混在一起）"""
+    tracemalloc.start()
+    peak = 0
+    for frame, frame_inputs in zip(frames, inputs):
+        ctx = FrameContext(frame, config)
+        tracemalloc.reset_peak()
+        start, _ = tracemalloc.get_traced_memory()
+        stage(ctx, frame_inputs)
+        _, frame_peak = tracemalloc.get_traced_memory()
+        peak = max(peak, frame_peak - start)
+    tracemalloc.stop()
+    return peak
+
+def run_benchmark(frames, config, repeat=3, warmup=5, stage_names=None):
+    """对每个阶段测量延迟分布、吞吐量和峰值内存，返回可序列化为 JSON 的字典"""
+    stages, prepare = build_stages(config)
+    if stage_names:
+        unknown = set(stage_names) - set(stages)
+        if unknown:
+            raise ValueError(f"未知阶段: {', '.join(sorted(unknown))}")
+        stages = {name: stages[name] for name in stage_names}
+
+    inputs = [prepare(frame) for frame in frames]
+    results = {}
+    for name, stage in stages.items():
+        # 预热：触发 OpenCV 内部初始化和查找表构建
+        for frame, frame_inputs in list(zip(frames, inputs))[:warmup]:
+            stage(FrameContext(frame, config), frame_inputs)
+
+        latencies = []
+        for _ in range(repeat):
+            for frame, frame_inputs in zip(frames, inputs):
+                # 每次使用新的帧上下文，避免命中上一轮缓存的 HSV/掩码
+                ctx = FrameContext(frame, config)
+                start_time = time.perf_counter()
+                stage(ctx, frame_inputs)
+                latencies.append(time.perf_counter() - start_time)
+
+        results[name] = summarize(latencies)
+        results[name]["peak_memory_bytes"] = measure_peak_memory(stage, frames, inputs, config)
+
+    height, width = frames[0].shape[:2]
+    return {
+        "frames": len(frames),
+        "resolution": [width, height],
+        "repeat": repeat,
+        "opencv_threads": cv2.getNumThreads(),
+        "python": platform.python_version(),
+        "opencv": cv2.__version__,
+        "numpy": np.__version__,
+        "max_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        "stages": results
+    }
+
+def run_scaling(config, flower_counts, sizes, frames_per_point=10, repeat=3, seed=0):
+    """测量 FlowerDetector.detect 延迟随花朵（轮廓）数量和分辨率的变化
+
+    实际放置的花朵数以生成器标注为准（小分辨率下可能放不下）。
+    """
+    detector = FlowerDetector(config)
+    points = []
+    for width, height in sizes:
+        generator = SceneGenerator(width, height, seed=seed)
+        for count in flower_counts:
+            scenes = list(generator.frames(frames_per_point, females=count - count // 2, males=count // 2,
+                                           obstacles=0, radius=(13, 20)))
+            latencies = []
+            for _ in range(repeat):
+                for frame, _ in scenes:
+                    ctx = FrameContext(frame, config)
+                    start_time = time.perf_counter()
+                    detector.detect(ctx)
+                    latencies.append(time.perf_counter() - start_time)
+
+            point = {"width": width, "height": height, "requested_flowers": count,
+                     "flowers": round(float(np.mean([len(labels["flowers"]) for _, labels in scenes])), 1)}
+            point.update(summarize(latencies))
+            points.append(point)
+    return points
+
+def parse_size(text):
+    """解析 WIDTHxHEIGHT 形式的分辨率"""
+    width, height = text.lower().split("x")
+    return int(width), int(height)
+
+def main():
+    parser = argparse.ArgumentParser(description='视觉模块离线性能基准测试')
+    parser.add_argument('--folder', type=str, help='测试图片文件夹或录像目录')
+    parser.add_argument('--synthetic', type=int, default=50, help='未指定 --folder 时生成的合成帧数')
+    parser.add_argument('--width', type=int, default=None, help='合成帧宽度（默认取配置）')
+    parser.add_argument('--height', type=int, default=None, help='合成帧高度（默认取配置）')
+    parser.add_argument('--limit', type=int, help='最多加载的帧数')
+    parser.add_argument('--repeat', type=int, default=3, help='每帧重复测量次数')
+    parser.add_argument('--warmup', type=int, default=5, help='预热帧数')
+    parser.add_argument('--stages', type=str, nargs='+', help='只测试指定阶段')
+    parser.add_argument('--threads', type=int, help='OpenCV 线程数（默认不修改）')
+    parser.add_argument('--sweep', action='store_true', help='额外测量花朵检测延迟随花朵数量和分辨率的变化')
+    parser.add_argument('--sweep-counts', type=int, nargs='+', default=[0, 5, 10, 20, 40, 80],
+                        help='扫描的花朵数量')
+    parser.add_argument('--sweep-sizes', type=parse_size, nargs='+',
+                        default=[(320, 240), (640, 480), (1280, 720), (1920, 1080)],
+                        help='扫描的分辨率（WIDTHxHEIGHT）')
+    parser.add_argument('--output', type=str, help='JSON 结果输出路径（默认打印到标准输出）')
+    parser.add_argument('--mode', type=str, default='debug', choices=['debug', 'competition'],
+                        help='运行模式：debug（调试）或competition（比赛）')
+    args = parser.parse_args()
+
+    config = Config() if args.mode == 'debug' else CompetitionConfig()
+    if args.threads is not None:
+        cv2.setNumThreads(args.threads)
+
+    if args.folder:
+        if not os.path.exists(args.folder):
+            print(f"错误：文件夹 '{args.folder}' 不存在")
+            sys.exit(1)
+        frames = load_frames(args.folder, args.limit)
+        source = args.folder
+    else:
+        frames = synthetic_frames(args.synthetic, args.width or config.CAMERA_WIDTH,
+                                  args.height or config.CAMERA_HEIGHT)
+        source = "synthetic"
+    if not frames:
+        print("错误：没有可用的测试帧")
+        sys.exit(1)
+
+    report = run_benchmark(frames, config, repeat=args.repeat, warmup=args.warmup, stage_names=args.stages)
+    report["source"] = source
+    if args.sweep:
+        report["scaling"] = run_scaling(config, args.sweep_counts, args.sweep_sizes, repeat=args.repeat)
+
+    output = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+        print(f"结果已保存至: {args.output}")
+    else:
+        print(output)
+
+if __name__ == "__main__":
+    main()
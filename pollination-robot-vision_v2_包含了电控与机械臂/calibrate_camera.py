@@ -0,0 +1,68 @@
+# calibrate_camera.py
+import argparse
+import os
+import sys
+
+import cv2
+
+from vision.calibration import CameraCalibration
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg')
+
+def load_images(folder):
+    """按文件名顺序读取文件夹中的图片"""
+    images = []
+    for filename in sorted(os.listdir(folder)):
+        if not filename.lower().endswith(IMAGE_EXTENSIONS):
+            continue
+        image = cv2.imread(os.path.join(folder, filename))
+        if image is None:
+            print(f"无法读取图片: {filename}")
+            continue
+        images.append(image)
+    return images
+
+def main():
+    parser = argparse.ArgumentParser(description='摄像头标定：内参/畸变、机械臂单应和去畸变映射表')
+    parser.add_argument('--images', type=str, help='棋盘格标定图片文件夹（不同角度、覆盖整个视野）')
+    parser.add_argument('--load', type=str, help='在已有标定结果上只重新估计机械臂单应')
+    parser.add_argument('--plane', type=str, help='平放在机械臂工作平面上的棋盘格图片，用于估计单应')
+    parser.add_argument('--origin', type=float, nargs=2, default=[0.0, 0.0], metavar=('X', 'Y'),
+                        help='工作平面棋盘格第一个内角点的机械臂坐标')
+    parser.add_argument('--pattern', type=int, nargs=2, default=[9, 6], metavar=('COLS', 'ROWS'),
+                        help='棋盘格内角点数（列 行）')
+    parser.add_argument('--square', type=float, default=2.5, help='棋盘格方格边长（与机械臂坐标单位一致）')
+    parser.add_argument('--alpha', type=float, default=0.0, help='去畸变视野：0 裁掉黑边，1 保留全部像素')
+    parser.add_argument('--output', type=str, default='calibration.npz', help='标定结果输出路径')
+    args = parser.parse_args()
+
+    pattern_size = tuple(args.pattern)
+    if args.images:
+        if not os.path.isdir(args.images):
+            print(f"错误：文件夹 '{args.images}' 不存在")
+            sys.exit(1)
+        calibration, used = CameraCalibration.from_images(load_images(args.images), pattern_size,
+                                                          args.square, alpha=args.alpha)
+        print(f"内参标定完成：使用 {used} 张图片，重投影误差 {calibration.rms:.3f} 像素")
+    elif args.load:
+        calibration = CameraCalibration.load(args.load)
+    else:
+        print("错误：需要 --images 或 --load")
+        sys.exit(1)
+
+    if args.plane:
+        plane = cv2.imread(args.plane)
+        if plane is None:
+            print(f"错误：无法读取图片 '{args.plane}'")
+            sys.exit(1)
+        error = calibration.estimate_homography(plane, pattern_size, args.square, args.origin)
+        print(f"机械臂单应估计完成，平均误差 {error:.3f}")
+    elif calibration.homography is None:
+        print("提示：未指定 --plane，标定结果中没有机械臂单应，TargetLocator 仍输出像素坐标")
+
+    calibration.save(args.output)
+    print(f"标定结果已保存至: {args.output}（去畸变映射表缓存在同一目录）")
+    print(f"在配置中设置 CAMERA_CALIBRATION_FILE = \"{args.output}\" 启用")
+
+if __name__ == "__main__":
+    main()
@@ -9,6 +9,17 @@ class Config:
     CAMERA_WIDTH = 640
     CAMERA_HEIGHT = 480
     FRAME_RATE = 30
+    CAMERA_THREADED = True     # 后台线程采集，主循环只取最新帧
+    CAMERA_BUFFER_SIZE = 4     # 采集环形缓冲区容量（帧）
+    PIPELINE_MODE = True       # 感知各阶段在流水线线程上并行处理连续帧
+    PIPELINE_QUEUE_SIZE = 2    # 流水线阶段间队列容量（帧）
+    PERCEPTION_WORKERS = 4     # 并行感知线程数（各检测器同时处理同一帧）
+    ASYNC_RUNTIME = False      # 用 asyncio 运行时协调采集、感知、状态机、电机和界面，代替主循环
+    RUNTIME_QUEUE_SIZE = 1     # 运行时采集 → 感知队列容量（帧），满时丢弃最旧帧
+    RUNTIME_WORKERS = 4        # 运行时执行器线程数（阻塞的 OpenCV 运算和硬件调用）
+    RUNTIME_UI_RATE = 15       # 调试画面刷新频率上限 (Hz)
+    CAMERA_CALIBRATION_FILE = None  # 标定结果 (.npz，由 calibrate_camera.py 生成)；设置后 TargetLocator 输出机械臂坐标
+    UNDISTORT_FRAMES = False        # 采集后按缓存的映射表整帧去畸变，检测在去畸变图像上进行
     
     # 颜色识别阈值 (HSV)
     YELLOW_LOWER = (20, 100, 100)
@@ -17,6 +28,19 @@ class Config:
     WHITE_UPPER = (180, 30, 255)   # 雄花/授粉标记颜色
     BLACK_LOWER = (0, 0, 0)
     BLACK_UPPER = (180, 255, 30)   # 障碍物颜色
+    SINGLE_PASS_SEGMENTATION = False  # 用查找表一次性分割所有颜色（颜色类别较多时更快），代替逐颜色 inRange
+    COLOR_LUT_FILE = None             # ThresholdTuner 导出的 BGR→颜色类别查找表 (.npy)，设置后优先于上面的阈值
+    COLOR_LUT_CATEGORY = "medium"     # 使用查找表中的哪个光照类别
+    
+    # 光照自适应：按画面亮度在 bright/medium/dark 阈值之间切换
+    # 各类别阈值可直接粘贴 ThresholdTuner 生成的变量（如 YELLOW_LOWER_BRIGHT），缺失时使用上面的默认阈值
+    ADAPTIVE_LIGHTING = False
+    LIGHTING_BRIGHT_THRESHOLD = 180   # 平均亮度高于此值为 bright（与 ThresholdTuner 分类一致）
+    LIGHTING_DARK_THRESHOLD = 80      # 平均亮度低于此值为 dark
+    LIGHTING_HYSTERESIS = 10          # 切换类别需越过分界线的亮度幅度
+    LIGHTING_SMOOTHING = 0.3          # 亮度估计的指数平滑系数
+    LIGHTING_UPDATE_INTERVAL = 5      # 每隔多少帧估计一次亮度
+    LIGHTING_SAMPLE_SIZE = (64, 48)   # 亮度估计的降采样尺寸
     
     # 形态学操作参数
     ERODE_KERNEL = (5, 5)
@@ -27,6 +51,29 @@ class Config:
     # 花朵检测参数
     MIN_FLOWER_AREA = 500
     MAX_FLOWER_AREA = 5000
+    TRACK_WINDOW_PADDING = 40        # 跟踪模式搜索窗口在目标外接框外的边距 (像素)
+    TRACK_VELOCITY_SMOOTHING = 0.5   # 跟踪速度估计的指数平滑系数
+    # 多目标跟踪：花朵跨帧保持稳定ID，状态机按ID锁定目标。目标需连续匹配 TRACKER_MIN_HITS 帧
+    # 才确认，锁定比直接用单帧检测晚 TRACKER_MIN_HITS - 1 帧，因此默认关闭
+    FLOWER_TRACKING = False
+    TRACKER_ASSOCIATION = "greedy"   # 数据关联：greedy（按距离贪心）或 hungarian（需要 scipy）
+    TRACKER_MAX_DISTANCE = 60        # 预测位置与检测中心的最大关联距离 (像素)
+    TRACKER_MIN_HITS = 2             # 连续匹配该帧数后才确认目标，过滤单帧误检
+    TRACKER_MAX_MISSES = 5           # 连续漏检超过该帧数后删除目标，期间按预测位置保留
+    TRACKER_PROCESS_NOISE = 2000.0   # 卡尔曼过程噪声（加速度谱密度，像素²/秒³）
+    TRACKER_MEASUREMENT_NOISE = 4.0  # 检测中心的测量噪声标准差 (像素)
+    DETECTION_SCALE = 1              # 粗到精检测：先在缩小该倍数（2或4）的图像上找候选，1为关闭
+    PYRAMID_REFINE_PADDING = 8       # 全分辨率精修窗口在候选外接框外的边距 (像素)
+    
+    # 巡线参数
+    LANE_FAST_MODE = False    # detect_lane 使用扫描线快速估计，代替整帧灰度 + 质心
+    LANE_ROI_TOP = 0.6        # 车道ROI起始行（占图像高度的比例）
+    LANE_SCANLINES = 8        # ROI内采样的水平扫描线数
+    LANE_THRESHOLD = 127      # 灰度不超过该值视为车道像素（质心与扫描线两种巡线方式共用）
+    LANE_MIN_PIXELS = 3       # 扫描线上至少有这么多车道像素才算有效
+    LANE_CONTROL_LOOP = True  # 流水线模式下由独立线程按固定周期巡线转向，不受花朵检测耗时影响
+    LANE_CONTROL_PERIOD = 0.02  # 巡线控制周期 (秒)
+    LANE_LOST_TIMEOUT = 0.35  # 连续丢线超过该时间 (秒) 后原地旋转寻找赛道（约为 30 帧/秒下的 10 帧）
     
     # 运动控制参数
     MOTOR_SPEED = 50        # 前进速度
@@ -34,8 +81,24 @@ class Config:
     APPROACH_SPEED = 30     # 接近花朵速度
     ROTATION_SPEED = 20     # 旋转速度
     BACKUP_SPEED = 40       # 后退速度
+    
+    # 转向控制（PID + 曲率前馈），误差按半幅图像宽度归一化
+    STEERING_PID = False            # PID 转向（增益需按实车整定后再开启），关闭时使用原来的死区 + 开关式转向
+    STEER_KP = 0.8
+    STEER_KI = 0.2
+    STEER_KD = 0.05
+    STEER_KFF = 0.5                 # 曲率前馈增益
+    STEER_INTEGRAL_LIMIT = 0.5      # 积分项上限（归一化误差·秒）
+    STEER_DERIVATIVE_SMOOTHING = 0.3  # 微分项低通系数
+    STEER_RATE_LIMIT = 400          # 转向量每秒最大变化
+    STEER_MAX_DT = 0.3              # 两次更新间隔超过该值 (秒) 时重置控制器
     APPROACH_DISTANCE = 15  # 接近花朵的距离 (厘米)
     POLLINATION_HEIGHT = 5  # 授粉高度 (厘米)
+    ARM_HOME = (0, 0, 20)   # 机械臂初始位置
+    # 机械臂抬离后用授粉检查确认，未通过则重新定位再授粉。检查要求花朵周围 ±50 像素内
+    # 白色授粉标记像素超过 10%，授粉装置不留白色标记时每次都会判为失败，因此默认关闭
+    VERIFY_POLLINATION = False
+    POLLINATION_MAX_ATTEMPTS = 2  # 同一朵花最多尝试授粉的次数，用尽后放弃并返回赛道
     
     # 比赛参数
     MAX_RUNNING_TIME = 600  # 最大运行时间 (秒)
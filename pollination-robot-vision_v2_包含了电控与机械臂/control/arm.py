@@ -1,41 +1,167 @@
+import queue
+import threading
+from concurrent.futures import Future
+
+class PollinationJob:
+    """一次授粉的动作序列
+
+    pollinated: 授粉完成且机械臂已抬离花朵时完成，此后小车即可移动
+    finished: 机械臂回到初始位置时完成
+    """
+
+    def __init__(self, flower, pollinated, finished):
+        self.flower = flower
+        self.pollinated = pollinated
+        self.finished = finished
+
+    @property
+    def succeeded(self):
+        """授粉动作是否已成功完成（未完成、取消或出错时为 False）"""
+        return (self.pollinated.done() and not self.pollinated.cancelled()
+                and self.pollinated.exception() is None)
+
 class ArmController:
-    """控制机械臂进行授粉操作"""
-    
+    """控制机械臂进行授粉操作
+
+    所有动作进入同一个动作队列，由后台线程按顺序执行；提交动作立即返回 Future，
+    调用方可以在机械臂运动期间继续感知和控制小车。某个动作出错时，
+    队列中其余的路点基于错误的位置，会被一并取消。
+    """
+
     def __init__(self, config):
         self.config = config
+        self._queue = queue.Queue()
+        self._pending = 0  # 已提交但尚未结束的动作数
+        self._cond = threading.Condition(threading.RLock())
+        self._thread = threading.Thread(target=self._run, name="arm", daemon=True)
+        self._thread.start()
         # 初始化机械臂驱动
         print("机械臂控制器初始化完成")
-        
+
+    @property
+    def busy(self):
+        """是否还有未完成的动作"""
+        return self._pending > 0
+
     def calibrate(self):
-        """校准机械臂位置"""
-        print("机械臂校准中...")
-        # 实际项目中这里会执行校准程序
-        
+        """校准机械臂位置（等待校准完成）"""
+        return self._submit(self._calibrate).result()
+
+    def move_to(self, x, y, z):
+        """提交一个路点，返回到位时完成的 Future"""
+        return self._submit(self._move, x, y, z)
+
     def move_to_position(self, x, y, z):
-        """移动机械臂到指定位置"""
-        print(f"机械臂移动到位置: ({x}, {y}, {z})")
-        # 实际项目中这里会控制机械臂移动
-        
-    def pollinate(self, flower):
-        """对指定花朵进行授粉"""
+        """移动机械臂到指定位置（等待到位）"""
+        return self.move_to(x, y, z).result()
+
+    def pollinate_async(self, flower, position=None):
+        """提交对指定花朵的整套授粉动作，立即返回 PollinationJob
+
+        position: 机械臂坐标系中的目标位置（TargetLocator.arm_position），缺省时使用花朵像素坐标
+        """
         print(f"开始对花朵授粉: {flower}")
-        
+
         # 获取花朵位置
-        x, y = flower["position"]
-        
-        # 移动到花朵上方
-        self.move_to_position(x, y, self.config.POLLINATION_HEIGHT + 5)
-        
-        # 下降到授粉高度
-        self.move_to_position(x, y, self.config.POLLINATION_HEIGHT)
-        
-        # 执行授粉动作
+        x, y = position if position is not None else flower["position"]
+        height = self.config.POLLINATION_HEIGHT
+
+        # 一次性入队，中途出错时不会有后续路点漏在取消之后
+        with self._cond:
+            self.move_to(x, y, height + 5)                  # 移动到花朵上方
+            self.move_to(x, y, height)                      # 下降到授粉高度
+            self._submit(self._apply_pollen)                # 执行授粉动作
+            pollinated = self.move_to(x, y, height + 10)    # 上升离开花朵
+            finished = self.move_to(*self.config.ARM_HOME)  # 返回初始位置
+        return PollinationJob(flower, pollinated, finished)
+
+    def pollinate(self, flower, position=None):
+        """对指定花朵进行授粉，等待机械臂回到初始位置"""
+        job = self.pollinate_async(flower, position)
+        try:
+            job.finished.result()
+        except Exception:
+            # 出错的动作已在后台线程打印原因，后续路点被取消
+            print("授粉失败")
+            return False
+        return True
+
+    def wait_idle(self, timeout=None):
+        """等待队列中的动作全部结束，超时返回 False"""
+        with self._cond:
+            return self._cond.wait_for(lambda: self._pending == 0, timeout)
+
+    def cancel(self):
+        """取消所有尚未开始的动作，返回取消的数量"""
+        cancelled = 0
+        with self._cond:
+            while True:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    # 关闭标记放回队尾
+                    self._queue.put(None)
+                    break
+                item[2].cancel()
+                cancelled += 1
+            self._finish(cancelled)
+        return cancelled
+
+    def close(self):
+        """执行完已提交的动作后停止后台线程"""
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join()
+            self._thread = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _submit(self, action, *args):
+        """动作入队，返回其 Future"""
+        future = Future()
+        with self._cond:
+            self._pending += 1
+            self._queue.put((action, args, future))
+        return future
+
+    def _finish(self, count=1):
+        """记录动作结束，唤醒 wait_idle"""
+        with self._cond:
+            self._pending -= count
+            self._cond.notify_all()
+
+    def _run(self):
+        """后台线程：依次执行队列中的动作"""
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            action, args, future = item
+            try:
+                if future.set_running_or_notify_cancel():
+                    try:
+                        future.set_result(action(*args))
+                    except Exception as e:
+                        print(f"机械臂动作异常: {e}")
+                        future.set_exception(e)
+                        self.cancel()
+            finally:
+                self._finish()
+
+    def _calibrate(self):
+        print("机械臂校准中...")
+        # 实际项目中这里会执行校准程序
+
+    def _move(self, x, y, z):
+        print(f"机械臂移动到位置: ({x}, {y}, {z})")
+        # 实际项目中这里会控制机械臂移动，并等待到位
+
+    def _apply_pollen(self):
         print("执行授粉动作...")
         # 实际项目中这里会控制授粉装置
-        
-        # 上升并返回初始位置
-        self.move_to_position(x, y, self.config.POLLINATION_HEIGHT + 10)
-        self.move_to_position(0, 0, 20)  # 返回初始位置
-        
-        print("授粉完成")
-        return True  # 返回授粉成功    
\ No newline at end of file
@@ -1,57 +1,118 @@
+import threading
 import time
 
+from control.steering import SteeringController
+
 class MotorController:
     """控制机器人的电机和移动"""
     
-    def __init__(self, config):
+    def __init__(self, config, clock=None):
         self.config = config
+        self.clock = clock or time.monotonic  # 定时动作使用的时钟，回放时为录像时钟
+        self.speed = config.MOTOR_SPEED  # 当前巡航速度
+        self.steering = SteeringController(config)
+        self.action = None           # 进行中的定时动作（如 "backward"、"rotate"）
+        self.action_deadline = None  # 定时动作的结束时刻 (self.clock)
+        self._action_lock = threading.Lock()  # 状态机与巡线控制线程都会下发指令
         # 初始化GPIO或电机驱动
         print("电机控制器初始化完成")
         
+    @property
+    def busy(self):
+        """是否有尚未结束的定时动作"""
+        return self.action is not None
+        
+    def poll(self, now=None):
+        """检查定时动作是否到期：到期则停车并返回动作名称，否则返回 None"""
+        with self._action_lock:
+            if self.action is None:
+                return None
+            now = self.clock() if now is None else now
+            if now < self.action_deadline:
+                return None
+            action = self.action
+            self.action = None
+            self.action_deadline = None
+        self.stop()
+        return action
+        
+    def _start_action(self, action, duration):
+        """登记定时动作，到期后由 poll() 停车，调用方不等待"""
+        with self._action_lock:
+            self.action = action
+            self.action_deadline = self.clock() + duration
+            
+    def _cancel_action(self):
+        """新的运动指令覆盖尚未结束的定时动作"""
+        with self._action_lock:
+            self.action = None
+            self.action_deadline = None
+        
     def forward(self, speed=None):
         """向前移动"""
+        self._cancel_action()
         speed = speed or self.config.MOTOR_SPEED
         print(f"电机向前，速度: {speed}")
         # 实际项目中这里会控制电机
         
     def backward(self, speed=None, duration=None):
-        """向后移动"""
+        """向后移动；指定 duration 时到期由 poll() 停车（不阻塞）"""
+        self._cancel_action()
         speed = speed or self.config.BACKUP_SPEED
         print(f"电机向后，速度: {speed}")
         # 实际项目中这里会控制电机
         
         if duration:
-            time.sleep(duration)
-            self.stop()
+            self._start_action("backward", duration)
         
     def turn_left(self, speed=None):
         """向左转"""
+        self._cancel_action()
         speed = speed or self.config.TURN_SPEED
         print(f"电机左转，速度: {speed}")
         # 实际项目中这里会控制电机
         
     def turn_right(self, speed=None):
         """向右转"""
+        self._cancel_action()
         speed = speed or self.config.TURN_SPEED
         print(f"电机右转，速度: {speed}")
         # 实际项目中这里会控制电机
         
     def rotate(self, speed=None, duration=0.5):
-        """旋转"""
+        """旋转；到期由 poll() 停车（不阻塞）"""
+        self._cancel_action()
         speed = speed or self.config.ROTATION_SPEED
         print(f"电机旋转，速度: {speed}")
         # 实际项目中这里会控制电机
         
-        time.sleep(duration)
-        self.stop()
+        self._start_action("rotate", duration)
         
     def set_speed(self, speed):
         """设置电机速度"""
+        self.speed = speed
         print(f"设置电机速度: {speed}")
         # 实际项目中这里会设置电机速度
         
-    def steer(self, direction):
-        """根据方向值转向 (-100 到 100)"""
+    def drive(self, speed, turn):
+        """差速行驶：turn 为 -100（左）到 100（右），按比例降低内侧车轮速度"""
+        self._cancel_action()
+        left = speed * (1 + min(0, turn) / 100)
+        right = speed * (1 - max(0, turn) / 100)
+        print(f"电机差速，左轮: {left:.0f}，右轮: {right:.0f}")
+        # 实际项目中这里会分别设置左右电机速度
+        
+    def steer(self, direction, timestamp=None, curvature=0.0):
+        """根据车道偏移转向（负值偏左，正值偏右）
+
+        启用 STEERING_PID 时由 PID 控制器（带曲率前馈，按时间戳计算）输出差速转向，
+        否则使用原来的死区 + 开关式转向。
+        """
+        if self.config.STEERING_PID:
+            turn = self.steering.update(direction, timestamp, curvature)
+            self.drive(self.speed, turn)
+            return
+
         if direction < -20:
             self.turn_left(abs(direction) // 2)
         elif direction > 20:
@@ -59,12 +120,24 @@ class MotorController:
         else:
             self.forward()
             
+    def reset_steering(self):
+        """重置转向控制器状态（重新进入巡线时调用）"""
+        self.steering.reset()
+        
     def stop(self):
         """停止所有电机"""
+        self._cancel_action()
         print("电机停止")
         # 实际项目中这里会停止电机
         
     def emergency_stop(self):
         """紧急停止 - 立即断电"""
+        self._cancel_action()
         print("紧急停止！")
-        # 实际项目中这里会切断电机电源    
\ No newline at end of file
+        # 实际项目中这里会切断电机电源
+        
+    def __enter__(self):
+        return self
+        
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
@@ -1,5 +1,7 @@
 import time
 
+from vision.frame_context import FrameContext
+
 class StateMachine:
     """控制授粉机器人的状态转换和行为"""
     
@@ -15,7 +17,8 @@ class StateMachine:
     }
     
     def __init__(self, motor, camera, flower_detector, pollination_checker, 
-                 target_locator, obstacle_detector, lane_follower, config):
+                 target_locator, obstacle_detector, lane_follower, config, lane_control=None, arm=None,
+                 flower_tracker=None):
         self.motor = motor
         self.camera = camera
         self.flower_detector = flower_detector
@@ -24,16 +27,53 @@ class StateMachine:
         self.obstacle_detector = obstacle_detector
         self.lane_follower = lane_follower
         self.config = config
+        self.lane_control = lane_control  # 独立的巡线控制线程（LaneControlLoop），为 None 时在 update 中转向
+        self.arm = arm  # 机械臂控制器（ArmController），授粉动作在其后台队列中执行
+        self.flower_tracker = flower_tracker  # 多目标跟踪（FlowerTracker），为 None 时每帧重新检测和选择目标
         
         self.current_state = self.STATES["START"]
         self.pollination_count = 0
         self.last_flower = None
+        self.target_id = None  # 锁定目标的跟踪 ID
         self.start_time = time.time()
-        self.lane_lost_count = 0
+        self.lane_lost_since = None  # 开始丢线的帧时间戳，未丢线时为 None
+        self.returning = False     # RETURN_LANE 中的掉头旋转是否已下发
+        self.pollination_job = None     # 进行中的授粉动作（PollinationJob）
+        self.pollination_attempts = 0   # 当前目标花朵已尝试授粉的次数
+        self.frame_context = None  # 当前帧的预处理缓存，供调试显示复用
+
+    @property
+    def current_state(self):
+        return self._current_state
+
+    @current_state.setter
+    def current_state(self, state):
+        """切换状态；巡线控制线程只在巡线状态下控制电机"""
+        self._current_state = state
+        if self.lane_control is not None:
+            self.lane_control.set_active(state == self.STATES["FOLLOW_LANE"])
         
-    def update(self):
-        """根据当前状态执行相应的动作并处理状态转换"""
-        frame = self.camera.read()
+    def update(self, frame_context=None):
+        """根据当前状态执行相应的动作并处理状态转换
+
+        frame_context: 感知流水线已处理好的帧上下文；为 None 时自行从摄像头取帧
+        """
+        # 每帧只创建一次上下文，各检测器共享HSV/灰度图/掩码及检测结果
+        if frame_context is None:
+            frame_context = self.camera.read()
+        ctx = FrameContext.wrap(frame_context, self.config)
+        if ctx is None:
+            # 本轮没有取到帧（取帧超时或读取失败）：只推进定时动作，保持当前状态，
+            # 不当作丢线或丢失目标
+            self.motor.poll()
+            return
+        self.frame_context = ctx
+        
+        # 后退、旋转等定时动作由电机控制器按截止时间结束；动作进行中不下发新指令，
+        # 但每帧照常返回，取帧和检测不会因机动而停顿
+        self.motor.poll()
+        if self.motor.busy:
+            return
         
         if self.current_state == self.STATES["START"]:
             # 初始化并开始巡线
@@ -43,50 +83,90 @@ class StateMachine:
             
         elif self.current_state == self.STATES["FOLLOW_LANE"]:
             # 巡线逻辑
-            lane_direction = self.lane_follower.detect_lane(frame)
+            if self.lane_control is not None:
+                # 转向由巡线控制线程按固定周期完成，这里只处理花朵和丢线
+                lane_found = self.lane_control.lane_lost_count == 0
+            else:
+                lane_direction = self.lane_follower.detect_lane(ctx)
+                lane_found = lane_direction is not None
+                if lane_found:
+                    # PID 转向的曲率前馈取自扫描线估计（与巡线控制线程一致）
+                    curvature = 0.0
+                    if self.config.STEERING_PID:
+                        estimate = self.lane_follower.detect_lane_estimate(ctx)
+                        curvature = estimate.curvature if estimate is not None else 0.0
+                    self.motor.steer(lane_direction, ctx.timestamp, curvature)
             
-            if lane_direction is not None:
-                self.lane_lost_count = 0
-                self.motor.steer(lane_direction)
+            if lane_found:
+                self.lane_lost_since = None
                 
                 # 检测花朵
-                flowers = self.flower_detector.detect(frame)
-                female_flowers = [f for f in flowers if f["type"] == "female"]
+                if self.flower_tracker is not None:
+                    # 只对已确认的跟踪目标反应，单帧误检不会打断巡线
+                    self.flower_tracker.track(ctx)
+                    female_flowers = self.flower_tracker.confirmed("female")
+                else:
+                    female_flowers = self.flower_detector.detect(ctx).of_type("female")
                 
-                if female_flowers:
+                if len(female_flowers):
                     # 选择最佳目标花朵 (面积最大的)
-                    self.last_flower = max(female_flowers, key=lambda f: f["area"])
+                    self.last_flower = max(female_flowers, key=lambda flower: flower["area"])
+                    self.target_id = None
+                    self.pollination_attempts = 0
                     self.current_state = self.STATES["DETECT_FLOWER"]
                     self.motor.set_speed(self.config.APPROACH_SPEED)
                     print("发现雌花，准备接近")
             else:
-                # 丢失赛道
-                self.lane_lost_count += 1
-                if self.lane_lost_count > 10:
+                # 丢失赛道：按时间而不是帧数或控制周期数判断，与帧率和巡线控制周期无关
+                if self.lane_lost_since is None:
+                    self.lane_lost_since = ctx.timestamp
+                if ctx.timestamp - self.lane_lost_since > self.config.LANE_LOST_TIMEOUT:
                     print("丢失赛道，尝试旋转寻找")
                     self.motor.rotate(self.config.ROTATION_SPEED)
-                    self.lane_lost_count = 0
+                    self.lane_lost_since = None
             
         elif self.current_state == self.STATES["DETECT_FLOWER"]:
             # 精确定位花朵
-            flowers = self.flower_detector.detect(frame)
-            female_flowers = [f for f in flowers if f["type"] == "female"]
+            if self.flower_tracker is not None:
+                self.flower_tracker.track(ctx)
+                female_flowers = self.flower_tracker.confirmed("female")
+            else:
+                female_flowers = self.flower_detector.detect(ctx).of_type("female")
             
-            if not female_flowers:
+            if not len(female_flowers):
                 # 丢失目标，返回巡线
                 self.current_state = self.STATES["FOLLOW_LANE"]
                 self.motor.set_speed(self.config.MOTOR_SPEED)
                 print("丢失花朵目标，返回巡线")
                 return
                 
-            # 选择最佳目标
-            best_flower = self.target_locator.locate(frame, female_flowers)
+            # 选择最佳目标（跟踪模式下已锁定的花朵仍在视野中时保持不变，不在相似的花之间来回切换）
+            if self.flower_tracker is not None:
+                best_flower = self.target_locator.locate_track(female_flowers, self.target_id)
+            else:
+                best_flower = self.target_locator.locate(ctx, female_flowers)
             if best_flower:
                 self.last_flower = best_flower
+                self.target_id = getattr(best_flower, "id", None)
+                self.flower_detector.reset_tracking()
                 self.current_state = self.STATES["APPROACH_FLOWER"]
                 print("锁定花朵，开始接近")
                 
         elif self.current_state == self.STATES["APPROACH_FLOWER"]:
+            if self.flower_tracker is not None:
+                # 按 ID 跟随目标；短暂漏检时使用卡尔曼预测位置，连续漏检过多才算丢失
+                self.flower_tracker.track(ctx)
+                flower = self.flower_tracker.get(self.target_id)
+            else:
+                # 跟踪模式：只在目标附近的窗口内重新检测
+                flower = self.flower_detector.track(ctx, self.last_flower)
+            if flower is None:
+                # 跟踪丢失，重新定位
+                self.current_state = self.STATES["DETECT_FLOWER"]
+                print("跟踪丢失，重新定位花朵")
+                return
+            self.last_flower = flower
+
             # 接近花朵
             flower_pos = self.last_flower["position"]
             frame_center = (self.config.CAMERA_WIDTH // 2, self.config.CAMERA_HEIGHT // 2)
@@ -112,10 +192,24 @@ class StateMachine:
                 print("到达授粉位置，准备授粉")
                 
         elif self.current_state == self.STATES["POLLINATE"]:
-            # 控制机械臂进行授粉
-            success = self.arm.pollinate(self.last_flower)
+            # 机械臂动作在其后台队列中执行，状态机每帧只检查进度，感知不中断
+            if self.pollination_job is None:
+                position = self.target_locator.arm_position(self.last_flower)
+                self.pollination_job = self.arm.pollinate_async(self.last_flower, position)
+                self.pollination_attempts += 1
+                return
+            if not self.pollination_job.pollinated.done():
+                return
+            
+            # 机械臂已抬离花朵；回到初始位置的动作继续进行，小车可以同时返回赛道
+            success = self.pollination_job.succeeded
+            self.pollination_job = None
+            if success and self.config.VERIFY_POLLINATION:
+                success = self.pollination_checker.check(ctx, self.last_flower["position"])
+            
             if success:
                 self.pollination_count += 1
+                self.pollination_attempts = 0
                 print(f"授粉成功！已完成 {self.pollination_count}/{self.config.TOTAL_FEMALE_FLOWERS} 次授粉")
                 
                 # 检查是否完成所有授粉任务
@@ -125,16 +219,25 @@ class StateMachine:
                 else:
                     self.current_state = self.STATES["RETURN_LANE"]
                     self.motor.backward(duration=1.0)  # 后退一点
-            else:
+            elif self.pollination_attempts < self.config.POLLINATION_MAX_ATTEMPTS:
                 print("授粉失败，尝试重新定位")
                 self.current_state = self.STATES["DETECT_FLOWER"]
+            else:
+                print("多次授粉失败，放弃该花朵并返回赛道")
+                self.pollination_attempts = 0
+                self.current_state = self.STATES["RETURN_LANE"]
+                self.motor.backward(duration=1.0)
                 
         elif self.current_state == self.STATES["RETURN_LANE"]:
-            # 转回赛道
-            self.motor.rotate(self.config.ROTATION_SPEED, duration=1.5)  # 旋转180度
-            self.current_state = self.STATES["FOLLOW_LANE"]
-            self.motor.set_speed(self.config.MOTOR_SPEED)
-            print("返回赛道，继续巡线")
+            # 转回赛道：先下发旋转，旋转结束后的下一帧再恢复巡线
+            if not self.returning:
+                self.motor.rotate(self.config.ROTATION_SPEED, duration=1.5)  # 旋转180度
+                self.returning = True
+            else:
+                self.returning = False
+                self.current_state = self.STATES["FOLLOW_LANE"]
+                self.motor.set_speed(self.config.MOTOR_SPEED)
+                print("返回赛道，继续巡线")
             
         elif self.current_state == self.STATES["FINISH"]:
             # 完成所有任务，返回起点或停止
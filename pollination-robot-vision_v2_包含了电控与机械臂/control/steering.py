@@ -0,0 +1,74 @@
+import time
+
+class SteeringController:
+    """巡线转向 PID 控制器
+
+    - 输入车道横向偏移 (像素)，按半幅图像宽度归一化；输出转向量 -100 ~ 100
+    - 积分抗饱和：输出饱和且误差会继续加深饱和时停止积分，积分项另有上限
+    - 微分作用于误差并做一阶低通，抑制图像噪声
+    - 曲率前馈：按车道曲率提前打舵，弯道不必等误差积累
+    - 输出变化率限制，避免电机指令突变
+    - 每次更新携带时间戳，按实际间隔计算积分/微分，帧率变化时行为一致
+    """
+
+    def __init__(self, config):
+        self.config = config
+        self.kp = config.STEER_KP
+        self.ki = config.STEER_KI
+        self.kd = config.STEER_KD
+        self.kff = config.STEER_KFF
+        self.scale = config.CAMERA_WIDTH / 2  # 像素 → 归一化误差
+        self.reset()
+
+    def reset(self):
+        """清除积分、微分和输出历史（重新进入巡线时调用）"""
+        self.integral = 0.0
+        self.derivative = 0.0
+        self.last_error = None
+        self.last_timestamp = None
+        self.output = 0.0
+
+    def update(self, error, timestamp=None, curvature=0.0):
+        """根据横向偏移 (像素) 和车道曲率 (1/像素) 计算转向量 (-100 ~ 100)"""
+        timestamp = timestamp if timestamp is not None else time.time()
+        error = error / self.scale
+
+        dt = None
+        if self.last_timestamp is not None:
+            dt = timestamp - self.last_timestamp
+            if dt <= 0:
+                # 同一帧或乱序，保持上次输出
+                return self.output
+            if dt > self.config.STEER_MAX_DT:
+                # 间隔过长（如刚恢复巡线），历史误差已无参考价值
+                self.reset()
+                dt = None
+
+        proportional = self.kp * error
+        feedforward = self.kff * curvature * self.scale
+
+        if dt is not None:
+            alpha = self.config.STEER_DERIVATIVE_SMOOTHING
+            raw_derivative = (error - self.last_error) / dt
+            self.derivative = alpha * raw_derivative + (1 - alpha) * self.derivative
+
+            # 条件积分：若本次积分会让已饱和的输出更加饱和，则不积分
+            integral = self.integral + error * dt
+            limit = self.config.STEER_INTEGRAL_LIMIT
+            integral = max(-limit, min(limit, integral))
+            unsaturated = proportional + self.ki * integral + self.kd * self.derivative + feedforward
+            if abs(unsaturated) < 1.0 or (unsaturated > 0) != (error > 0):
+                self.integral = integral
+
+        output = proportional + self.ki * self.integral + self.kd * self.derivative + feedforward
+        output = max(-1.0, min(1.0, output)) * 100
+
+        # 变化率限制（每秒最大变化量）
+        if dt is not None:
+            max_step = self.config.STEER_RATE_LIMIT * dt
+            output = max(self.output - max_step, min(self.output + max_step, output))
+
+        self.last_error = error
+        self.last_timestamp = timestamp
+        self.output = output
+        return output
@@ -1,110 +1,308 @@
 import argparse
+import asyncio
 import logging
+import time
 import cv2
 from config.config import Config
 from config.config_competition import CompetitionConfig
 from vision.camera import Camera
+from vision.recording import FrameRecorder, ReplayCamera
+from vision.calibration import CameraCalibration
+from vision.tracker import FlowerTracker
 from vision.flower_detector import FlowerDetector
 from vision.pollination_checker import PollinationChecker
 from vision.target_locator import TargetLocator
 from vision.obstacle_detector import ObstacleDetector
+from vision.frame_context import FrameContext
+from vision.perception_pool import PerceptionPool
+from vision.segmentation import LutSegmenter
 from navigation.lane_follower import LaneFollower
+from navigation.lane_control import LaneControlLoop
 from control.motor import MotorController
 from control.arm import ArmController
 from control.state_machine import StateMachine
 from utils.visualization import Visualizer
 from utils.logger import setup_logger
+from utils.pipeline import Pipeline, LatestResult
+from utils.runtime import RobotRuntime
+
+def build_perception_pool(config, flower_detector, obstacle_detector, lane_follower,
+                          pollination_checker, state_machine):
+    """注册所有检测器：花朵、障碍物、车道，以及对当前目标花朵的授粉检查
+
+    检测器按状态机当前状态启用：整帧花朵检测只在巡线和定位花朵时运行（接近花朵时由状态机
+    在目标附近的窗口内跟踪），车道只在巡线时检测，授粉检查只在授粉状态下运行。
+    花朵跟踪（FlowerTracker）不在这里更新，由状态机在自己的线程中按帧顺序更新。
+    """
+    states = StateMachine.STATES
+
+    def in_states(*names):
+        return lambda: state_machine.current_state in [states[name] for name in names]
+
+    def check_pollination(ctx):
+        target = state_machine.last_flower
+        if target is None:
+            return None
+        return pollination_checker.check(ctx, target["position"])
+
+    return (PerceptionPool(config)
+            .register("flowers", flower_detector.detect, when=in_states("FOLLOW_LANE", "DETECT_FLOWER"))
+            .register("obstacles", obstacle_detector.detect)
+            .register("lane", lane_follower.detect_lane, when=in_states("FOLLOW_LANE"))
+            .register("pollination", check_pollination, when=in_states("POLLINATE")))
+
+def make_capture(config, camera, frames=None):
+    """构建取帧函数：返回新一帧的 FrameContext，暂无新帧时返回 None
+
+    frames: 可选的 LatestResult，每采集一帧就发布其上下文，供巡线控制使用。
+    配置 UNDISTORT_FRAMES 时先按标定结果去畸变，后续检测和坐标换算都基于去畸变图像。
+    """
+    calibration = CameraCalibration.for_config(config) if config.UNDISTORT_FRAMES else None
+
+    def capture():
+        if camera.threaded:
+            frame, timestamp = camera.read_next(timeout=0.1)
+        else:
+            frame = camera.read()
+            timestamp = camera.last_timestamp
+        if frame is None:
+            return None
+        if calibration is not None:
+            frame = calibration.undistort(frame)
+        ctx = FrameContext(frame, config, timestamp)
+        if frames is not None:
+            frames.put(ctx)
+        return ctx
+
+    return capture
+
+def build_perception_pipeline(config, camera, perception_pool, frames=None):
+    """构建感知流水线：采集 → 花朵检测（及授粉检查）→ 障碍物检测 → 车道检测
+
+    每个阶段在独立线程上运行，连续的帧同时处于不同阶段；各检测器的结果缓存在帧上下文中，
+    状态机拿到上下文后直接复用。
+    """
+    return Pipeline(make_capture(config, camera, frames), perception_pool.stages([
+        ("flowers", ("flowers", "pollination")),
+        ("obstacles", ("obstacles",)),
+        ("lane", ("lane",))
+    ]), queue_size=config.PIPELINE_QUEUE_SIZE)
+
+def show_debug(config, state_machine, flower_detector, obstacle_detector, lane_follower,
+               perception, start_time, camera=None):
+    """绘制并显示调试画面，按q键时返回False
+
+    camera 为逐帧回放的 ReplayCamera 时等待按键：n 或空格前进一帧，q 退出。
+    """
+    # 复用状态机本轮的帧上下文，检测结果已缓存，不再重复计算
+    ctx = state_machine.frame_context
+    if ctx is None:
+        return True
+
+    # 绘制花朵和障碍物
+    flowers = flower_detector.detect(ctx)
+    obstacles = obstacle_detector.detect(ctx)
+    
+    result_frame = Visualizer.draw_flowers(ctx.frame, flowers)
+    result_frame = Visualizer.draw_obstacles(result_frame, obstacles)
+    
+    # 绘制车道信息
+    lane_error = lane_follower.detect_lane(ctx)
+    result_frame = Visualizer.draw_lane(result_frame, lane_error)
+    
+    # 绘制跟踪目标（只读取状态机已更新的结果，不在界面线程中更新跟踪）
+    if state_machine.flower_tracker is not None:
+        result_frame = Visualizer.draw_tracks(result_frame, state_machine.flower_tracker.confirmed(),
+                                              state_machine.target_id)
+    
+    # 显示状态信息
+    cv2.putText(result_frame, f"State: {list(StateMachine.STATES.keys())[list(StateMachine.STATES.values()).index(state_machine.current_state)]}", 
+               (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
+    cv2.putText(result_frame, f"Pollinations: {state_machine.pollination_count}/{config.TOTAL_FEMALE_FLOWERS}", 
+               (10, 60), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
+    cv2.putText(result_frame, f"Time: {time.time()-start_time:.1f}s / {config.MAX_RUNNING_TIME}s", 
+               (10, 90), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
+    
+    # 各检测器耗时
+    if perception is not None:
+        timing_text = ", ".join(f"{name}: {seconds * 1000:.1f}ms"
+                                for name, seconds in perception.timings.items())
+        cv2.putText(result_frame, timing_text, (10, 120),
+                   cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 1)
+    
+    # 显示结果
+    cv2.imshow("Pollination Robot Vision", result_frame)
+    
+    # 逐帧回放：停在当前帧，直到按键前进或退出
+    if getattr(camera, "mode", None) == "step":
+        while True:
+            key = cv2.waitKey(0) & 0xFF
+            if key in (ord('n'), ord(' ')):
+                camera.step()
+                return True
+            if key == ord('q'):
+                return False
+    
+    # 按q键退出（调试模式）
+    return cv2.waitKey(1) & 0xFF != ord('q')
 
 def main():
     # 解析命令行参数
     parser = argparse.ArgumentParser(description='授粉机器人控制系统')
     parser.add_argument('--mode', type=str, default='debug', choices=['debug', 'competition'],
                         help='运行模式：debug（调试）或competition（比赛）')
+    parser.add_argument('--record', type=str, help='把采集到的原始帧录制到指定目录')
+    parser.add_argument('--replay', type=str, help='回放指定目录中的录像，代替摄像头')
+    parser.add_argument('--replay-mode', type=str, default='realtime', choices=ReplayCamera.MODES,
+                        help='回放模式：realtime（按录制时间）、fast（尽可能快）或step（逐帧，调试画面中按n或空格前进）')
+    parser.add_argument('--runtime', type=str, choices=['loop', 'async'],
+                        help='运行方式：loop（主循环）或async（asyncio 协作任务），默认取配置 ASYNC_RUNTIME')
     args = parser.parse_args()
     
     # 根据模式选择配置
     config = CompetitionConfig() if args.mode == 'competition' else Config()
+    use_async = args.runtime == 'async' if args.runtime else config.ASYNC_RUNTIME
+    step_replay = bool(args.replay) and args.replay_mode == 'step'
+    if step_replay:
+        # 逐帧回放由调试画面的按键推进：在主循环中单线程运行，每次按键只处理一帧
+        config.DEBUG_MODE = True
+        config.PIPELINE_MODE = False
+        use_async = False
     
     # 设置日志
     logger = setup_logger('pollination_robot', level=getattr(logging, config.LOG_LEVEL), 
                          log_file=config.LOG_FILE if args.mode == 'competition' else None)
     logger.info(f"机器人启动，运行模式: {args.mode}")
     
+    pipeline = None
+    perception_pool = None
+    lane_control = None
     try:
         # 初始化硬件和算法模块
-        with Camera(config.CAMERA_ID, config.CAMERA_WIDTH, config.CAMERA_HEIGHT) as camera, \
-             MotorController(config) as motor, \
+        clock = None  # 电机定时动作和巡线延迟统计使用的时钟，默认为墙钟
+        if args.replay:
+            camera_source = ReplayCamera(args.replay, mode=args.replay_mode)
+            # 回放时由录像时间戳驱动，结果不受处理速度影响
+            clock = camera_source.clock
+        else:
+            camera_source = Camera(config.CAMERA_ID, config.CAMERA_WIDTH, config.CAMERA_HEIGHT,
+                                   threaded=config.CAMERA_THREADED, buffer_size=config.CAMERA_BUFFER_SIZE,
+                                   recorder=FrameRecorder(args.record) if args.record else None)
+        
+        with camera_source as camera, \
+             MotorController(config, clock=clock) as motor, \
              ArmController(config) as arm:
             
-            camera.open()
+            try:
+                camera.open()
             
-            flower_detector = FlowerDetector(config)
-            pollination_checker = PollinationChecker(config)
-            target_locator = TargetLocator(config)
-            obstacle_detector = ObstacleDetector(config)
-            lane_follower = LaneFollower(config)
+                flower_detector = FlowerDetector(config)
+                pollination_checker = PollinationChecker(config)
+                target_locator = TargetLocator(config)
+                obstacle_detector = ObstacleDetector(config)
+                lane_follower = LaneFollower(config)
+                flower_tracker = FlowerTracker(config, flower_detector) if config.FLOWER_TRACKING else None
+                if config.COLOR_LUT_FILE:
+                    # 启动时加载并检查查找表（光照类别不符时在这里告警并回退），之后各帧共享
+                    LutSegmenter.for_config(config)
             
-            # 初始化状态机
-            state_machine = StateMachine(
-                motor=motor,
-                camera=camera,
-                flower_detector=flower_detector,
-                pollination_checker=pollination_checker,
-                target_locator=target_locator,
-                obstacle_detector=obstacle_detector,
-                lane_follower=lane_follower,
-                config=config
-            )
+                # 巡线控制（流水线模式下由独立线程、asyncio 运行时下由电机任务按固定周期转向，与感知解耦）
+                frames = None
+                if (config.PIPELINE_MODE or use_async) and config.LANE_CONTROL_LOOP:
+                    frames = LatestResult()
+                    lane_control = LaneControlLoop(config, frames, lane_follower, motor, clock=clock)
             
-            # 校准机械臂
-            arm.calibrate()
+                # 初始化状态机
+                state_machine = StateMachine(
+                    motor=motor,
+                    camera=camera,
+                    flower_detector=flower_detector,
+                    pollination_checker=pollination_checker,
+                    target_locator=target_locator,
+                    obstacle_detector=obstacle_detector,
+                    lane_follower=lane_follower,
+                    config=config,
+                    lane_control=lane_control,
+                    arm=arm,
+                    flower_tracker=flower_tracker
+                )
             
-            # 启动计时器
-            start_time = time.time()
+                # 校准机械臂
+                arm.calibrate()
             
-            # 主循环
-            while not state_machine.is_mission_complete() and not state_machine.is_time_up():
-                try:
-                    # 更新状态机
-                    state_machine.update()
-                    
-                    # 可视化（调试模式）
+                if use_async:
+                    perception_pool = build_perception_pool(config, flower_detector, obstacle_detector,
+                                                            lane_follower, pollination_checker, state_machine)
+                    start_time = time.time()
+                    display = None
                     if config.DEBUG_MODE:
-                        frame = camera.read()
-                        if frame is not None:
-                            # 绘制花朵和障碍物
-                            flowers = flower_detector.detect(frame)
-                            obstacles = obstacle_detector.detect(frame)
-                            
-                            result_frame = Visualizer.draw_flowers(frame, flowers)
-                            result_frame = Visualizer.draw_obstacles(result_frame, obstacles)
-                            
-                            # 绘制车道信息
-                            lane_error = lane_follower.detect_lane(frame)
-                            result_frame = Visualizer.draw_lane(result_frame, lane_error)
-                            
-                            # 显示状态信息
-                            cv2.putText(result_frame, f"State: {list(StateMachine.STATES.keys())[list(StateMachine.STATES.values()).index(state_machine.current_state)]}", 
-                                       (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
-                            cv2.putText(result_frame, f"Pollinations: {state_machine.pollination_count}/{config.TOTAL_FEMALE_FLOWERS}", 
-                                       (10, 60), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
-                            cv2.putText(result_frame, f"Time: {time.time()-start_time:.1f}s / {config.MAX_RUNNING_TIME}s", 
-                                       (10, 90), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
-                            
-                            # 显示结果
-                            cv2.imshow("Pollination Robot Vision", result_frame)
-                            
-                            # 按q键退出（调试模式）
-                            if cv2.waitKey(1) & 0xFF == ord('q'):
+                        display = lambda perception: show_debug(config, state_machine, flower_detector,
+                                                                obstacle_detector, lane_follower,
+                                                                perception, start_time)
+                    runtime = RobotRuntime(
+                        config,
+                        capture=make_capture(config, camera, frames),
+                        perceive=perception_pool.run,
+                        state_machine=state_machine,
+                        motor=motor,
+                        lane_control=lane_control,
+                        display=display,
+                        until=lambda: state_machine.is_mission_complete() or state_machine.is_time_up()
+                    )
+                    asyncio.run(runtime.run())
+                    logger.info(f"运行时统计: {runtime.get_stats()}")
+                    logger.info(f"任务完成！总授粉数: {state_machine.pollination_count}")
+                    return
+            
+                # 启动感知流水线
+                if config.PIPELINE_MODE:
+                    perception_pool = build_perception_pool(config, flower_detector, obstacle_detector,
+                                                            lane_follower, pollination_checker, state_machine)
+                    pipeline = build_perception_pipeline(config, camera, perception_pool, frames).start()
+                if lane_control is not None:
+                    lane_control.start()
+                capture = make_capture(config, camera)
+                frame_version = 0
+                perception = None
+            
+                # 启动计时器
+                start_time = time.time()
+            
+                # 主循环
+                while not state_machine.is_mission_complete() and not state_machine.is_time_up():
+                    try:
+                        # 更新状态机（流水线模式下取最新处理完的帧）
+                        if pipeline is not None:
+                            perception, version = pipeline.latest.wait_newer(frame_version, timeout=0.1)
+                            if perception is None or version == frame_version:
+                                continue
+                            frame_version = version
+                            state_machine.update(perception.frame_context)
+                        else:
+                            ctx = capture()
+                            if ctx is None:
+                                continue
+                            state_machine.update(ctx)
+                    
+                        # 可视化（调试模式）
+                        if config.DEBUG_MODE:
+                            if not show_debug(config, state_machine, flower_detector, obstacle_detector,
+                                              lane_follower, perception, start_time, camera):
                                 break
                                 
-                except Exception as e:
-                    logger.error(f"主循环异常: {e}")
-                    # 发生异常时继续运行，避免程序崩溃
-                    time.sleep(0.1)
+                    except Exception as e:
+                        logger.error(f"主循环异常: {e}")
+                        # 发生异常时继续运行，避免程序崩溃
+                        time.sleep(0.1)
             
-            # 任务完成或时间结束
-            logger.info(f"任务完成！总授粉数: {state_machine.pollination_count}")
+                # 任务完成或时间结束
+                logger.info(f"任务完成！总授粉数: {state_machine.pollination_count}")
+            finally:
+                # 先停止巡线控制和流水线，再退出电机/机械臂上下文，避免电机停止后仍有转向指令
+                if lane_control is not None:
+                    lane_control.stop()
+                if pipeline is not None:
+                    pipeline.stop()
             
     except Exception as e:
         logger.critical(f"系统错误: {e}", exc_info=True)
@@ -115,6 +313,8 @@ def main():
             pass
     finally:
         # 清理资源
+        if perception_pool is not None:
+            perception_pool.shutdown()
         cv2.destroyAllWindows()
         logger.info("系统已关闭")
 
@@ -0,0 +1,108 @@
+import threading
+import time
+
+class LaneControlLoop:
+    """独立的巡线控制线程：按固定周期读取最新帧、估计车道并转向
+
+    与感知流水线共享最新帧（LatestResult），转向频率不再受花朵检测耗时影响。
+    车道估计缓存在帧上下文中，同一帧不会重复计算；没有新帧时本周期不更新转向。
+    """
+
+    def __init__(self, config, frames, lane_follower, motor, period=None, clock=None):
+        self.config = config
+        self.frames = frames  # LatestResult，元素为 FrameContext
+        self.lane_follower = lane_follower
+        self.motor = motor
+        self.period = period or config.LANE_CONTROL_PERIOD
+        self.clock = clock or time.time  # 与帧时间戳同一时基的时钟，回放时为录像时钟
+
+        self.active = False         # 只在巡线状态下控制电机
+        self.estimate = None        # 最近一次的车道估计
+        self.lane_lost_count = 0    # 连续未检测到车道的帧数
+        self._version = 0           # 最近处理的帧版本号
+        self._lock = threading.Lock()  # 保证暂停后不再有进行中的转向
+        self._thread = None
+        self._running = False
+
+        # 统计
+        self.iterations = 0
+        self.updates = 0            # 实际执行转向的次数
+        self.overruns = 0           # 单周期耗时超过控制周期的次数
+        self.last_latency = None    # 最近一次转向时距帧采集的时间 (秒)
+
+    def start(self):
+        """启动控制线程"""
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="lane-control", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """停止控制线程"""
+        self._running = False
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+
+    def set_active(self, active):
+        """开启或暂停转向控制；暂停时等待进行中的周期结束后返回"""
+        with self._lock:
+            if active and not self.active:
+                self.lane_lost_count = 0
+                self.motor.reset_steering()
+            self.active = active
+
+    def get_stats(self):
+        """返回控制循环统计信息"""
+        return {
+            "iterations": self.iterations,
+            "updates": self.updates,
+            "overruns": self.overruns,
+            "last_latency": self.last_latency,
+            "lane_lost_count": self.lane_lost_count
+        }
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    def _run(self):
+        """固定周期循环；落后超过一个周期时重新对齐，不补跑错过的周期"""
+        next_time = time.perf_counter()
+        while self._running:
+            try:
+                self.step()
+            except Exception as e:
+                print(f"巡线控制异常: {e}")
+            self.iterations += 1
+
+            next_time += self.period
+            delay = next_time - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                self.overruns += 1
+                next_time = time.perf_counter()
+
+    def step(self):
+        """单个控制周期：有新帧时估计车道并转向（asyncio 运行时直接按周期调用）"""
+        with self._lock:
+            if not self.active:
+                return
+            ctx, version = self.frames.get()
+            if ctx is None or version == self._version:
+                return
+            self._version = version
+
+            estimate = self.lane_follower.detect_lane_estimate(ctx)
+            if estimate is None:
+                self.lane_lost_count += 1
+                return
+
+            self.lane_lost_count = 0
+            self.estimate = estimate
+            self.motor.steer(estimate.error, ctx.timestamp, estimate.curvature)
+            self.updates += 1
+            self.last_latency = self.clock() - ctx.timestamp
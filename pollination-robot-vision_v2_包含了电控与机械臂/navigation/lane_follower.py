@@ -1,6 +1,30 @@
 import cv2
 import numpy as np
 
+from vision.frame_context import FrameContext
+
+class LaneEstimate:
+    """扫描线车道估计结果
+
+    error:     车道中心与图像中心的横向偏移 (像素)，负值表示向左偏，正值表示向右偏
+    heading:   车道在图像底部的方向角 (弧度)，正值表示车道向前方右侧延伸
+    curvature: 车道曲率 (1/像素)，正值表示向右弯
+    points:    各扫描线上检测到的车道中心 (N, 2) [x, y]
+    """
+
+    __slots__ = ("error", "heading", "curvature", "points", "timestamp")
+
+    def __init__(self, error, heading, curvature, points, timestamp=None):
+        self.error = error
+        self.heading = heading
+        self.curvature = curvature
+        self.points = points
+        self.timestamp = timestamp
+
+    def __repr__(self):
+        return (f"LaneEstimate(error={self.error}, heading={self.heading:.3f}, "
+                f"curvature={self.curvature:.5f}, points={len(self.points)})")
+
 class LaneFollower:
     """巡线控制模块"""
     
@@ -8,15 +32,70 @@ class LaneFollower:
         self.config = config
         
     def detect_lane(self, frame):
-        """检测赛道并计算转向方向"""
+        """检测赛道并计算转向方向（frame可为原始图像或FrameContext）"""
         if frame is None:
             return None
-            
-        # 转换为灰度图
-        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+
+        ctx = FrameContext.wrap(frame, self.config)
+        if getattr(self.config, "LANE_FAST_MODE", False):
+            estimate = self.detect_lane_estimate(ctx)
+            return None if estimate is None else estimate.error
+        return ctx.cached(("lane", id(self)), lambda: self._detect_lane(ctx))
+
+    def detect_lane_estimate(self, frame):
+        """快速车道估计：只在ROI内采样若干条水平扫描线，返回 LaneEstimate，检测不到时返回 None
+
+        不需要整帧灰度图，开销只与扫描线数量成正比，适合高频转向控制。
+        """
+        if frame is None:
+            return None
+
+        ctx = FrameContext.wrap(frame, self.config)
+        return ctx.cached(("lane_estimate", id(self)), lambda: self._scan_lane(ctx))
+
+    def _scan_lane(self, ctx):
+        """在ROI内的扫描线上找车道像素，拟合车道中心线"""
+        frame = ctx.frame
+        height, width = frame.shape[:2]
+        top = int(height * self.config.LANE_ROI_TOP)
+        rows = np.linspace(height - 1, top, self.config.LANE_SCANLINES).astype(np.int32)
+
+        # 只转换采样到的行：(扫描线数, 宽度) 的灰度图
+        gray = cv2.cvtColor(frame[rows], cv2.COLOR_BGR2GRAY)
+        dark = gray <= self.config.LANE_THRESHOLD
+
+        counts = dark.sum(axis=1)
+        valid = counts >= self.config.LANE_MIN_PIXELS
+        if not valid.any():
+            return None
+
+        xs = np.arange(width)
+        centers = (dark[valid] * xs).sum(axis=1) / counts[valid]
+        ys = rows[valid]
+        points = np.column_stack([centers, ys])
+
+        # 车道中心按像素数加权，与整块ROI求质心的偏移含义一致
+        error = int(np.average(centers, weights=counts[valid])) - width // 2
+
+        # 以离底部的距离为自变量拟合 x = a·d² + b·d + c，得到底部的方向和曲率
+        heading, curvature = 0.0, 0.0
+        distances = (height - 1) - ys
+        if len(ys) >= 3:
+            a, b, _ = np.polyfit(distances, centers, 2)
+            heading = float(np.arctan(b))
+            curvature = float(2 * a / (1 + b * b) ** 1.5)
+        elif len(ys) == 2 and distances[1] != distances[0]:
+            heading = float(np.arctan((centers[1] - centers[0]) / (distances[1] - distances[0])))
+
+        return LaneEstimate(error, heading, curvature, points, ctx.timestamp)
+
+    def _detect_lane(self, ctx):
+        """在帧上下文中计算赛道偏移"""
+        # 复用缓存的灰度图
+        gray = ctx.gray
         
         # 二值化
-        _, binary = cv2.threshold(gray, 127, 255, cv2.THRESH_BINARY_INV)
+        _, binary = cv2.threshold(gray, self.config.LANE_THRESHOLD, 255, cv2.THRESH_BINARY_INV)
         
         # 只关注图像下半部分（赛道通常在下方）
         height, width = binary.shape
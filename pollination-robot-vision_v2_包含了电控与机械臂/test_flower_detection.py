@@ -1,15 +1,32 @@
 # test_flower_detection.py
 import cv2
 import argparse
+import csv
+import json
 import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
 from config.config import Config
+from config.config_competition import CompetitionConfig
 from vision.flower_detector import FlowerDetector
 from utils.visualization import Visualizer
+from utils.scene_generator import SceneGenerator
 
 def main():
     parser = argparse.ArgumentParser(description='测试花朵识别算法')
     parser.add_argument('--image', type=str, help='测试图片路径')
     parser.add_argument('--folder', type=str, help='测试图片文件夹路径')
+    parser.add_argument('--synthetic', type=int, help='生成指定数量的合成场景进行测试')
+    parser.add_argument('--seed', type=int, default=0, help='合成场景随机种子')
+    parser.add_argument('--export-synthetic', type=str, help='把合成场景及真值标注 (labels.json) 保存到指定文件夹')
+    parser.add_argument('--batch', action='store_true', help='批量评估 --folder 中的图片（无界面，多进程）')
+    parser.add_argument('--workers', type=int, default=None, help='批量评估的进程数（默认CPU核数）')
+    parser.add_argument('--report', type=str, help='批量评估报告路径（.jsonl 或 .csv）')
+    parser.add_argument('--labels', type=str, help='真值标注文件 (JSON)，用于计算精确率/召回率')
+    parser.add_argument('--match-distance', type=float, default=30, help='检测与真值匹配的最大中心距离 (像素)')
     parser.add_argument('--mode', type=str, default='debug', choices=['debug', 'competition'],
                         help='运行模式：debug（调试）或competition（比赛）')
     args = parser.parse_args()
@@ -20,8 +37,20 @@ def main():
     # 初始化花朵检测器
     detector = FlowerDetector(config)
     
+    # 批量评估（无界面）
+    if args.batch:
+        if not args.folder or not os.path.exists(args.folder):
+            print("错误：批量评估需要有效的 --folder 参数")
+            return
+        labels = load_labels(args.labels) if args.labels else None
+        run_batch(args.folder, args.mode, labels, args.report, args.workers, args.match_distance)
+    
+    # 导出合成场景
+    elif args.export_synthetic:
+        export_synthetic(args.export_synthetic, args.synthetic or 100, args.seed, config)
+    
     # 处理单张图片
-    if args.image:
+    elif args.image:
         if os.path.exists(args.image):
             process_image(args.image, detector, config)
         else:
@@ -37,8 +66,14 @@ def main():
         else:
             print(f"错误：文件夹 '{args.folder}' 不存在")
     
+    # 处理合成场景（带真值标注）
+    elif args.synthetic:
+        generator = SceneGenerator(config.CAMERA_WIDTH, config.CAMERA_HEIGHT, seed=args.seed)
+        for index, (frame, labels) in enumerate(generator.frames(args.synthetic)):
+            process_synthetic(f"synthetic_{index}", frame, labels, detector)
+    
     else:
-        print("请提供 --image 或 --folder 参数")
+        print("请提供 --image、--folder 或 --synthetic 参数")
 
 def process_image(image_path, detector, config):
     """处理单张图片并显示检测结果"""
@@ -67,6 +102,164 @@ def process_image(image_path, detector, config):
     cv2.waitKey(0)
     cv2.destroyWindow(window_name)
 
+def process_synthetic(name, frame, labels, detector):
+    """检测合成场景并与真值数量对比"""
+    flowers = detector.detect(frame)
+    for flower_type in ("female", "male"):
+        expected = sum(1 for label in labels["flowers"] if label["type"] == flower_type)
+        detected = len(flowers.of_type(flower_type))
+        print(f"{name}: {flower_type} 真值 {expected}，检测到 {detected}")
+    
+    result_frame = Visualizer.draw_flowers(frame, flowers)
+    cv2.imshow(name, result_frame)
+    cv2.waitKey(0)
+    cv2.destroyWindow(name)
+
+def export_synthetic(folder, count, seed, config):
+    """保存合成场景图片和 labels.json，可直接用于 --batch --labels"""
+    os.makedirs(folder, exist_ok=True)
+    generator = SceneGenerator(config.CAMERA_WIDTH, config.CAMERA_HEIGHT, seed=seed)
+    labels = {}
+    for index, (frame, scene_labels) in enumerate(generator.frames(count)):
+        filename = f"synthetic_{index:05d}.png"
+        cv2.imwrite(os.path.join(folder, filename), frame)
+        labels[filename] = [{"type": flower["type"], "position": list(flower["position"])}
+                            for flower in scene_labels["flowers"]]
+    with open(os.path.join(folder, "labels.json"), "w") as f:
+        json.dump(labels, f)
+    print(f"已生成 {count} 个合成场景: {folder}")
+
+def load_labels(path):
+    """读取真值标注：{文件名: [{"type": "female"|"male", "position": [x, y]}, ...]}"""
+    with open(path) as f:
+        labels = json.load(f)
+    # 兼容场景生成器的标注格式 {"flowers": [...], ...}
+    return {name: entry["flowers"] if isinstance(entry, dict) else entry for name, entry in labels.items()}
+
+# 批量评估工作进程中的检测器（每个进程初始化一次）
+_batch_detector = None
+
+def _init_batch_worker(mode):
+    """工作进程初始化：创建检测器，并限制 OpenCV 内部线程避免与进程池争抢CPU"""
+    global _batch_detector
+    cv2.setNumThreads(1)
+    _batch_detector = FlowerDetector(Config() if mode == 'debug' else CompetitionConfig())
+
+def _evaluate_image(task):
+    """在工作进程中检测一张图片，返回该图片的报告行"""
+    image_path, truth, match_distance = task
+    start_time = time.perf_counter()
+    frame = cv2.imread(image_path)
+    read_time = time.perf_counter() - start_time
+    row = {"image": os.path.basename(image_path), "female": 0, "male": 0,
+           "read_ms": round(read_time * 1000, 3), "detect_ms": None, "error": None}
+    if frame is None:
+        row["error"] = "unreadable"
+        return row
+
+    start_time = time.perf_counter()
+    flowers = _batch_detector.detect(frame)
+    row["detect_ms"] = round((time.perf_counter() - start_time) * 1000, 3)
+    for flower_type in ("female", "male"):
+        row[flower_type] = len(flowers.of_type(flower_type))
+
+    if truth is not None:
+        for flower_type in ("female", "male"):
+            expected = np.array([label["position"] for label in truth if label["type"] == flower_type],
+                                dtype=np.float32).reshape(-1, 2)
+            tp, fp, fn = match_detections(flowers.of_type(flower_type).positions, expected, match_distance)
+            row[f"{flower_type}_tp"], row[f"{flower_type}_fp"], row[f"{flower_type}_fn"] = tp, fp, fn
+    return row
+
+def match_detections(detected, expected, max_distance):
+    """按中心距离贪心一对一匹配检测与真值，返回 (TP, FP, FN)"""
+    if len(detected) == 0 or len(expected) == 0:
+        return 0, len(detected), len(expected)
+
+    distances = np.linalg.norm(detected[:, None, :].astype(np.float32) - expected[None, :, :], axis=2)
+    pairs = np.argwhere(distances <= max_distance)
+    pairs = pairs[np.argsort(distances[pairs[:, 0], pairs[:, 1]])]
+    used_detected, used_expected = set(), set()
+    for i, j in pairs:
+        if i not in used_detected and j not in used_expected:
+            used_detected.add(i)
+            used_expected.add(j)
+    tp = len(used_detected)
+    return tp, len(detected) - tp, len(expected) - tp
+
+class ReportWriter:
+    """逐行写出批量评估报告，按扩展名选择 JSONL 或 CSV"""
+
+    FIELDS = ["image", "female", "male", "read_ms", "detect_ms", "error",
+              "female_tp", "female_fp", "female_fn", "male_tp", "male_fp", "male_fn"]
+
+    def __init__(self, path):
+        self.file = open(path, "w", newline="") if path else None
+        self.csv = None
+        if self.file is not None and path.lower().endswith(".csv"):
+            self.csv = csv.DictWriter(self.file, fieldnames=self.FIELDS, extrasaction="ignore")
+            self.csv.writeheader()
+
+    def write(self, row):
+        if self.file is None:
+            return
+        if self.csv is not None:
+            self.csv.writerow(row)
+        else:
+            self.file.write(json.dumps(row, ensure_ascii=False) + "\n")
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+
+def run_batch(folder, mode, labels, report_path, workers, match_distance):
+    """用进程池批量评估文件夹中的图片，边处理边写报告，最后打印汇总"""
+    filenames = sorted(f for f in os.listdir(folder) if f.lower().endswith(('.png', '.jpg', '.jpeg')))
+    if labels is not None:
+        missing = [f for f in filenames if f not in labels]
+        if missing:
+            print(f"警告：{len(missing)} 张图片没有标注，不计入精确率/召回率")
+    tasks = [(os.path.join(folder, f), labels.get(f) if labels is not None else None, match_distance)
+             for f in filenames]
+
+    writer = ReportWriter(report_path)
+    totals = {"female": 0, "male": 0, "errors": 0}
+    counts = {key: 0 for key in ("female_tp", "female_fp", "female_fn", "male_tp", "male_fp", "male_fn")}
+    detect_times = []
+    start_time = time.time()
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_batch_worker,
+                                 initargs=(mode,)) as executor:
+            # 分块提交减少进程间通信；结果按顺序流式返回并立即写入报告
+            chunksize = max(1, len(tasks) // ((workers or os.cpu_count() or 1) * 8))
+            for index, row in enumerate(executor.map(_evaluate_image, tasks, chunksize=chunksize), 1):
+                writer.write(row)
+                if row["error"]:
+                    totals["errors"] += 1
+                    continue
+                totals["female"] += row["female"]
+                totals["male"] += row["male"]
+                detect_times.append(row["detect_ms"])
+                for key in counts:
+                    counts[key] += row.get(key, 0)
+                if index % 500 == 0:
+                    print(f"已处理 {index}/{len(tasks)} 张图片")
+    finally:
+        writer.close()
+
+    elapsed = time.time() - start_time
+    print(f"共处理 {len(tasks)} 张图片，用时 {elapsed:.1f}s ({len(tasks) / max(elapsed, 1e-9):.1f} 张/秒)")
+    print(f"检测到雌花 {totals['female']} 朵，雄花 {totals['male']} 朵，无法读取 {totals['errors']} 张")
+    if detect_times:
+        print(f"单张检测耗时: 平均 {np.mean(detect_times):.2f}ms，p95 {np.percentile(detect_times, 95):.2f}ms")
+    if labels is not None:
+        for flower_type in ("female", "male"):
+            tp, fp, fn = (counts[f"{flower_type}_{key}"] for key in ("tp", "fp", "fn"))
+            precision = tp / (tp + fp) if tp + fp else 0.0
+            recall = tp / (tp + fn) if tp + fn else 0.0
+            print(f"{flower_type}: 精确率 {precision:.3f}，召回率 {recall:.3f} (TP {tp}, FP {fp}, FN {fn})")
+    if report_path:
+        print(f"报告已保存至: {report_path}")
+
 if __name__ == "__main__":
-    from config.config_competition import CompetitionConfig
     main()
\ No newline at end of file
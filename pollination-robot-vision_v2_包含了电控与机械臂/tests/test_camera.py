@@ -0,0 +1,84 @@
+import time
+
+import numpy as np
+
+from vision.camera import Camera
+
+class FakeCapture:
+    """按顺序返回编号帧的假摄像头；limit 帧之后读取失败"""
+
+    def __init__(self, interval=0.005, limit=None):
+        self.interval = interval
+        self.limit = limit
+        self.count = 0
+        self.released = False
+        self.reading = False
+
+    def isOpened(self):
+        return True
+
+    def read(self):
+        self.reading = True
+        time.sleep(self.interval)
+        self.reading = False
+        if self.limit is not None and self.count >= self.limit:
+            return False, None
+        self.count += 1
+        return True, np.full((4, 4, 3), self.count % 256, np.uint8)
+
+    def release(self):
+        assert not self.reading, "采集线程仍在读取时释放了摄像头"
+        self.released = True
+
+def threaded_camera(capture=None):
+    camera = Camera(threaded=True)
+    camera.cap = capture or FakeCapture()
+    camera._start_capture_thread()
+    return camera
+
+def test_read_next_returns_frames_in_order():
+    camera = threaded_camera()
+    try:
+        first, first_time = camera.read_next(timeout=1.0)
+        second, second_time = camera.read_next(timeout=1.0)
+        assert first is not None and second is not None
+        assert second_time > first_time
+    finally:
+        camera.release()
+
+def test_read_after_release_returns_none():
+    camera = threaded_camera()
+    assert camera.read_next(timeout=1.0)[0] is not None
+    time.sleep(0.05)  # 让缓冲区里积累未读取的帧
+    camera.release()
+
+    start = time.perf_counter()
+    assert camera.read_next(timeout=1.0) == (None, None)
+    assert camera.read_latest(timeout=1.0) == (None, None)
+    # 采集已停止时不等待超时
+    assert time.perf_counter() - start < 0.5
+
+    stats = camera.get_stats()
+    assert stats["buffered"] == 0
+    assert stats["delivered"] + stats["dropped"] == stats["captured"]
+
+def test_read_latest_does_not_repeat_frames():
+    camera = threaded_camera(FakeCapture(limit=1))
+    try:
+        frame, _ = camera.read_latest(timeout=1.0)
+        assert frame is not None
+        # 没有新帧到达时不再返回已读取过的帧
+        assert camera.read_latest(timeout=0.05) == (None, None)
+        assert camera.read(timeout=0.05) is None
+    finally:
+        camera.release()
+
+def test_release_waits_for_blocked_read():
+    capture = FakeCapture(interval=1.3)  # 比 join 的超时更长
+    camera = threaded_camera(capture)
+    time.sleep(0.05)  # 采集线程阻塞在 read() 中
+    camera.release()
+
+    assert capture.released
+    assert camera.get_stats()["buffered"] == 0
+    assert camera.read_next(timeout=0.05) == (None, None)
@@ -0,0 +1,56 @@
+import cv2
+import numpy as np
+import pytest
+
+from vision.contour_features import contour_features
+
+def find_contours(mask):
+    contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    return contours
+
+def blob_mask():
+    mask = np.zeros((120, 160), np.uint8)
+    cv2.circle(mask, (40, 40), 18, 255, -1)
+    cv2.rectangle(mask, (90, 20), (130, 50), 255, -1)
+    cv2.fillPoly(mask, [np.array([[20, 100], [70, 80], [60, 115]], np.int32)], 255)
+    cv2.ellipse(mask, (120, 95), (25, 10), 30, 0, 360, 255, -1)
+    return mask
+
+def test_matches_opencv_per_contour():
+    contours = find_contours(blob_mask())
+    assert len(contours) == 4
+    features = contour_features(contours)
+
+    for i, contour in enumerate(contours):
+        moments = cv2.moments(contour)
+        assert features["areas"][i] == pytest.approx(cv2.contourArea(contour))
+        assert features["centroids"][i][0] == pytest.approx(moments["m10"] / moments["m00"])
+        assert features["centroids"][i][1] == pytest.approx(moments["m01"] / moments["m00"])
+        assert tuple(features["boxes"][i]) == cv2.boundingRect(contour)
+
+def test_ratio_mask_matches_box_crop():
+    mask = blob_mask()
+    contours = find_contours(mask)
+    features = contour_features(contours, ratio_mask=mask)
+
+    for i, (x, y, w, h) in enumerate(features["boxes"]):
+        expected = cv2.countNonZero(mask[y:y + h, x:x + w]) / (w * h)
+        assert features["ratios"][i] == pytest.approx(expected)
+
+def test_offset_contours():
+    mask = blob_mask()
+    roi = mask[10:70, 80:150]
+    contours, _ = cv2.findContours(roi, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE, offset=(80, 10))
+    features = contour_features(contours, ratio_mask=roi, offset=(80, 10))
+    assert tuple(features["boxes"][0]) == (90, 20, 41, 31)
+    assert features["ratios"][0] == pytest.approx(1.0)
+
+def test_degenerate_and_empty():
+    line = np.array([[[5, 5]], [[15, 5]]], np.int32)
+    features = contour_features([line])
+    assert features["areas"][0] == 0
+    assert np.isnan(features["centroids"][0]).all()
+    assert tuple(features["boxes"][0]) == (5, 5, 11, 1)
+
+    empty = contour_features([], ratio_mask=np.zeros((4, 4), np.uint8))
+    assert len(empty["areas"]) == 0 and len(empty["ratios"]) == 0
@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+
+from vision.detections import Detection, Detections
+
+def make_detections():
+    return Detections.from_records([
+        {"type": "female", "position": (10, 20), "area": 600, "x": 5, "y": 15, "width": 10, "height": 10,
+         "yellow_ratio": 0.8},
+        {"type": "male", "position": (50, 60), "area": 900, "x": 40, "y": 50, "width": 20, "height": 20},
+        {"type": "female", "area": 1200, "x": 100, "y": 80, "width": 30, "height": 40},
+    ])
+
+def test_of_type_selects_matching_records():
+    detections = make_detections()
+
+    females = detections.of_type("female")
+    assert isinstance(females, Detections)
+    assert [flower["area"] for flower in females] == [600.0, 1200.0]
+    assert len(detections.of_type("male")) == 1
+    assert len(detections.of_type("obstacle")) == 0
+
+def test_position_defaults_to_box_center():
+    detections = make_detections()
+    assert detections[2]["position"] == (115, 100)
+    assert detections.positions.tolist() == [[10, 20], [50, 60], [115, 100]]
+
+def test_detection_dict_access():
+    flower = make_detections()[0]
+    assert isinstance(flower, Detection)
+    assert "position" in flower and "bounding_box" in flower
+    assert "score" not in flower
+    assert flower.get("score", -1) == -1
+    assert flower["bounding_box"] == (5, 15, 15, 25)
+    assert flower["yellow_ratio"] == pytest.approx(0.8)
+    with pytest.raises(KeyError):
+        flower["score"]
+
+def test_indexing_and_concatenate():
+    detections = make_detections()
+    assert detections[-1]["area"] == 1200.0
+    with pytest.raises(IndexError):
+        detections[3]
+
+    subset = detections[np.array([True, False, True])]
+    assert subset.areas.tolist() == [600.0, 1200.0]
+    assert len(subset.contours) == 2
+
+    merged = Detections.concatenate([subset, Detections(), detections.of_type("male")])
+    assert [d["type"] for d in merged] == ["female", "female", "male"]
+    assert Detections.from_records(merged) is merged
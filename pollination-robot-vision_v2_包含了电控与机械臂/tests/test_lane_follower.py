@@ -0,0 +1,32 @@
+import numpy as np
+
+from config.config import Config
+from navigation.lane_follower import LaneFollower
+from vision.frame_context import FrameContext
+
+def stripe_frame(lane_gray, center_x, width=64, height=48, background=200):
+    """灰色背景上一条竖直车道，车道灰度为 lane_gray"""
+    frame = np.full((height, width, 3), background, np.uint8)
+    frame[:, center_x - 3:center_x + 4] = lane_gray
+    return frame
+
+def detect_both(config, frame):
+    follower = LaneFollower(config)
+    centroid = follower.detect_lane(FrameContext(frame, config))
+    estimate = follower.detect_lane_estimate(FrameContext(frame, config))
+    return centroid, None if estimate is None else estimate.error
+
+def test_lane_paths_share_threshold():
+    config = Config()
+    frame = stripe_frame(100, center_x=42)
+
+    centroid, scan = detect_both(config, frame)
+    assert centroid == scan == 10
+
+    config.LANE_THRESHOLD = 90
+    assert detect_both(config, frame) == (None, None)
+
+def test_pixels_at_threshold_count_as_lane():
+    config = Config()
+    frame = stripe_frame(config.LANE_THRESHOLD, center_x=22)
+    assert detect_both(config, frame) == (-10, -10)
@@ -0,0 +1,45 @@
+import numpy as np
+
+from config.config import Config
+from vision.frame_context import FrameContext
+from vision.perception_pool import PerceptionPool, PerceptionResult
+
+def make_ctx(config):
+    return FrameContext(np.zeros((8, 8, 3), np.uint8), config, 1.0)
+
+def test_disabled_detector_is_skipped():
+    config = Config()
+    calls = []
+    enabled = {"flowers": False}
+    with PerceptionPool(config, max_workers=2) as pool:
+        pool.register("flowers", lambda ctx: calls.append("flowers") or "F",
+                      when=lambda: enabled["flowers"])
+        pool.register("obstacles", lambda ctx: "O")
+
+        result = pool.run(make_ctx(config))
+        assert result["flowers"] is None and result["obstacles"] == "O"
+        assert "flowers" not in result.timings
+        assert calls == []
+
+        enabled["flowers"] = True
+        assert pool.run(make_ctx(config))["flowers"] == "F"
+        assert calls == ["flowers"]
+
+def test_stages_accumulate_into_one_result():
+    config = Config()
+    with PerceptionPool(config, max_workers=2) as pool:
+        pool.register("flowers", lambda ctx: "F")
+        pool.register("obstacles", lambda ctx: "O")
+        pool.register("lane", lambda ctx: 3)
+        stages = pool.stages([("flowers", ("flowers",)), ("rest", ("obstacles", "lane"))])
+        assert [name for name, _ in stages] == ["flowers", "rest"]
+
+        ctx = make_ctx(config)
+        item = ctx
+        for _, stage in stages:
+            item = stage(item)
+
+        assert isinstance(item, PerceptionResult)
+        assert item.frame_context is ctx
+        assert item.results == {"flowers": "F", "obstacles": "O", "lane": 3}
+        assert set(item.timings) == {"flowers", "obstacles", "lane", "total"}
@@ -0,0 +1,38 @@
+import numpy as np
+
+from config.config import Config
+from control.motor import MotorController
+from vision.recording import FrameRecorder, ReplayCamera
+
+def record(path, timestamps):
+    with FrameRecorder(str(path), chunk_frames=2) as recorder:
+        for i, timestamp in enumerate(timestamps):
+            recorder.write(np.full((4, 6, 3), i, np.uint8), timestamp)
+
+def test_step_replay_advances_only_on_step(tmp_path):
+    record(tmp_path, [10.0, 10.5, 11.0])
+    with ReplayCamera(str(tmp_path), mode="step") as camera:
+        assert camera.clock() == 10.0
+        assert camera.read()[0, 0, 0] == 0
+        assert camera.read()[0, 0, 0] == 0
+        camera.step()
+        assert camera.read()[0, 0, 0] == 1
+        assert camera.clock() == 10.5
+        camera.step(5)
+        assert camera.read() is None
+
+def test_motor_deadline_follows_replay_clock(tmp_path):
+    record(tmp_path, [10.0, 10.3, 10.6])
+    with ReplayCamera(str(tmp_path), mode="step") as camera:
+        motor = MotorController(Config(), clock=camera.clock)
+        camera.read()
+        motor.rotate(duration=0.5)
+
+        camera.step()
+        camera.read()
+        assert motor.poll() is None and motor.busy
+
+        camera.step()
+        camera.read()
+        assert motor.poll() == "rotate"
+        assert not motor.busy
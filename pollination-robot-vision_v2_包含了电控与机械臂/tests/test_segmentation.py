@@ -0,0 +1,63 @@
+import json
+
+import cv2
+import numpy as np
+
+from config.config import Config
+from vision.flower_detector import FlowerDetector
+from vision.frame_context import FrameContext
+from vision.segmentation import ColorSegmenter, LutSegmenter, in_range
+
+class WrappedHueConfig(Config):
+    """色相跨越 0/180 的阈值（红~橙黄），直方图模式可能导出这种区间"""
+    YELLOW_LOWER = (170, 100, 100)
+    YELLOW_UPPER = (10, 255, 255)
+
+def hsv_strip(hues):
+    """每个色相一个像素的 HSV 图像（S、V 取 200）"""
+    hsv = np.full((1, len(hues), 3), 200, np.uint8)
+    hsv[0, :, 0] = hues
+    return hsv
+
+def test_in_range_wrapped_hue():
+    hsv = hsv_strip([175, 179, 0, 5, 10, 11, 90, 169])
+    mask = in_range(hsv, WrappedHueConfig.YELLOW_LOWER, WrappedHueConfig.YELLOW_UPPER)
+    assert mask[0].tolist() == [255, 255, 255, 255, 255, 0, 0, 0]
+
+def test_in_range_plain_matches_opencv():
+    hsv = hsv_strip(np.arange(0, 180, 7))
+    lower, upper = Config.YELLOW_LOWER, Config.YELLOW_UPPER
+    assert np.array_equal(in_range(hsv, lower, upper), cv2.inRange(hsv, lower, upper))
+
+def test_wrapped_range_consistent_across_mask_paths():
+    config = WrappedHueConfig()
+    frame = cv2.cvtColor(hsv_strip([175, 5, 90, 10, 171, 30]), cv2.COLOR_HSV2BGR)
+    ctx = FrameContext(frame, config)
+
+    expected = in_range(ctx.hsv, config.YELLOW_LOWER, config.YELLOW_UPPER)
+    assert np.count_nonzero(expected) > 0
+    assert np.array_equal(ctx.mask("yellow"), expected)
+
+    segmenter = ColorSegmenter(config)
+    assert np.array_equal(segmenter.plane(segmenter.label(ctx.hsv), "yellow"), expected)
+
+    yellow, _ = FlowerDetector._color_masks(ctx, frame)
+    assert np.array_equal(yellow, expected)
+
+def test_lut_missing_default_category_falls_back(tmp_path):
+    # 只含 bright 类别的 2 位查找表：所有颜色都归为黄色
+    path = str(tmp_path / "lut.npy")
+    np.save(path, np.full((1, 4, 4, 4), LutSegmenter.CLASS_BITS["yellow"], np.uint8))
+    with open(str(tmp_path / "lut.json"), "w") as f:
+        json.dump({"categories": ["bright"], "bits": 2, "classes": LutSegmenter.CLASS_BITS}, f)
+
+    class LutConfig(Config):
+        COLOR_LUT_FILE = path
+        COLOR_LUT_CATEGORY = "medium"
+
+    config = LutConfig()
+    segmenter = LutSegmenter.for_config(config)
+    assert segmenter.category == "bright"
+
+    ctx = FrameContext(np.zeros((2, 3, 3), np.uint8), config)
+    assert ctx.mask("yellow").all()
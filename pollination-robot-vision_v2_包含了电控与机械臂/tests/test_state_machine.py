@@ -0,0 +1,115 @@
+import numpy as np
+
+from config.config import Config
+from control.motor import MotorController
+from control.state_machine import StateMachine
+from vision.detections import Detections
+from vision.frame_context import FrameContext
+
+class NoFrameCamera:
+    """取帧总是失败的摄像头"""
+
+    def read(self):
+        return None
+
+class FakeEstimate:
+    def __init__(self, curvature):
+        self.curvature = curvature
+
+class FakeLaneFollower:
+    def __init__(self, direction=None, curvature=0.0):
+        self.direction = direction
+        self.curvature = curvature
+
+    def detect_lane(self, ctx):
+        return self.direction
+
+    def detect_lane_estimate(self, ctx):
+        return None if self.direction is None else FakeEstimate(self.curvature)
+
+class FakeFlowerDetector:
+    """记录调用；没有花朵，跟踪总是丢失目标"""
+
+    def __init__(self):
+        self.track_calls = 0
+
+    def detect(self, ctx):
+        return Detections()
+
+    def track(self, ctx, flower):
+        self.track_calls += 1
+        return None
+
+    def reset_tracking(self):
+        pass
+
+class RecordingMotor(MotorController):
+    def __init__(self, config):
+        super().__init__(config)
+        self.rotations = 0
+        self.steer_calls = []
+
+    def steer(self, direction, timestamp=None, curvature=0.0):
+        self.steer_calls.append((direction, timestamp, curvature))
+        super().steer(direction, timestamp, curvature)
+
+    def rotate(self, speed=None, duration=0.5):
+        self.rotations += 1
+        super().rotate(speed, duration)
+
+def make_state_machine(config, lane_direction=None, curvature=0.0):
+    motor = RecordingMotor(config)
+    state_machine = StateMachine(motor=motor, camera=NoFrameCamera(), flower_detector=FakeFlowerDetector(),
+                                 pollination_checker=None, target_locator=None, obstacle_detector=None,
+                                 lane_follower=FakeLaneFollower(lane_direction, curvature), config=config)
+    return state_machine, motor
+
+def frame_at(config, timestamp):
+    return FrameContext(np.zeros((48, 64, 3), np.uint8), config, timestamp)
+
+def test_dropped_frame_in_follow_lane_holds_state():
+    config = Config()
+    state_machine, motor = make_state_machine(config)
+    state_machine.current_state = StateMachine.STATES["FOLLOW_LANE"]
+    state_machine.update(frame_at(config, 100.0))
+    assert state_machine.lane_lost_since == 100.0
+
+    state_machine.update(None)
+
+    assert state_machine.current_state == StateMachine.STATES["FOLLOW_LANE"]
+    assert state_machine.lane_lost_since == 100.0
+    assert motor.rotations == 0
+
+def test_lane_lost_rotates_after_timeout():
+    config = Config()
+    state_machine, motor = make_state_machine(config)
+    state_machine.current_state = StateMachine.STATES["FOLLOW_LANE"]
+
+    state_machine.update(frame_at(config, 100.0))
+    state_machine.update(frame_at(config, 100.0 + config.LANE_LOST_TIMEOUT * 0.9))
+    assert motor.rotations == 0
+
+    state_machine.update(frame_at(config, 100.0 + config.LANE_LOST_TIMEOUT * 1.1))
+    assert motor.rotations == 1
+    assert state_machine.lane_lost_since is None
+
+def test_dropped_frame_keeps_approach_lock():
+    config = Config()
+    state_machine, _ = make_state_machine(config)
+    state_machine.current_state = StateMachine.STATES["APPROACH_FLOWER"]
+    state_machine.last_flower = {"type": "female", "position": (320, 240), "area": 1000}
+
+    state_machine.update(None)
+
+    assert state_machine.current_state == StateMachine.STATES["APPROACH_FLOWER"]
+    assert state_machine.flower_detector.track_calls == 0
+
+def test_pid_steering_gets_lane_curvature():
+    config = Config()
+    config.STEERING_PID = True
+    state_machine, motor = make_state_machine(config, lane_direction=40, curvature=0.002)
+    state_machine.current_state = StateMachine.STATES["FOLLOW_LANE"]
+
+    state_machine.update(frame_at(config, 5.0))
+
+    assert motor.steer_calls == [(40, 5.0, 0.002)]
@@ -0,0 +1,74 @@
+import pytest
+
+from config.config import Config
+from control.steering import SteeringController
+
+class PConfig(Config):
+    """只保留比例项，便于核对输出"""
+    STEER_KI = 0.0
+    STEER_KD = 0.0
+    STEER_KFF = 0.0
+    STEER_RATE_LIMIT = 1e9
+
+class PIConfig(PConfig):
+    STEER_KP = 0.0
+    STEER_KI = 1.0
+    STEER_INTEGRAL_LIMIT = 10.0
+
+def half_width():
+    return Config.CAMERA_WIDTH / 2
+
+def test_proportional_output_and_saturation():
+    controller = SteeringController(PConfig())
+    assert controller.update(half_width() / 2, 0.0) == pytest.approx(PConfig.STEER_KP * 50)
+    controller.reset()
+    assert controller.update(10 * half_width(), 0.0) == 100
+    controller.reset()
+    assert controller.update(-10 * half_width(), 0.0) == -100
+
+def test_integral_uses_timestamp_interval():
+    error = 0.1 * half_width()  # 归一化误差 0.1
+
+    fast = SteeringController(PIConfig())
+    for i in range(11):
+        fast.update(error, i * 0.01)   # 100 帧/秒，共 0.1 秒
+
+    slow = SteeringController(PIConfig())
+    for i in range(3):
+        slow.update(error, i * 0.05)   # 20 帧/秒，共 0.1 秒
+
+    # 积分只取决于经过的时间，与帧率无关
+    assert fast.integral == pytest.approx(0.01)
+    assert slow.integral == pytest.approx(0.01)
+    assert fast.output == pytest.approx(slow.output)
+
+def test_repeated_or_stale_timestamp_keeps_output():
+    controller = SteeringController(PIConfig())
+    controller.update(50, 1.0)
+    output = controller.update(50, 1.1)
+    assert controller.update(300, 1.1) == output
+    assert controller.update(300, 1.05) == output
+
+def test_long_gap_resets_history():
+    controller = SteeringController(PIConfig())
+    controller.update(50, 1.0)
+    controller.update(50, 1.1)
+    assert controller.integral > 0
+    controller.update(50, 1.1 + Config.STEER_MAX_DT + 0.1)
+    assert controller.integral == 0
+
+def test_curvature_feedforward():
+    class FFConfig(PConfig):
+        STEER_KP = 0.0
+        STEER_KFF = 0.5
+    controller = SteeringController(FFConfig())
+    curvature = 0.2 / half_width()  # 归一化后为 0.2
+    assert controller.update(0, 0.0, curvature) == pytest.approx(0.5 * 0.2 * 100)
+
+def test_rate_limit_per_second():
+    class RateConfig(PConfig):
+        STEER_RATE_LIMIT = 100
+    controller = SteeringController(RateConfig())
+    controller.update(0, 0.0)
+    # 0.1 秒内最多变化 10
+    assert controller.update(half_width(), 0.1) == pytest.approx(10)
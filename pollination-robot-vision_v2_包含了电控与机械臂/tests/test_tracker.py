@@ -0,0 +1,73 @@
+import pytest
+
+from config.config import Config
+from vision.tracker import FlowerTracker
+
+class TrackerConfig(Config):
+    TRACKER_MIN_HITS = 2
+    TRACKER_MAX_MISSES = 2
+    TRACKER_MAX_DISTANCE = 30
+    TRACKER_ASSOCIATION = "greedy"
+
+def flower(x, y, flower_type="female", area=800):
+    return {"type": flower_type, "position": (x, y), "area": area}
+
+def test_track_confirmed_after_min_hits():
+    tracker = FlowerTracker(TrackerConfig())
+    assert tracker.update([flower(100, 100)], 0.0) == []
+    confirmed = tracker.update([flower(104, 100)], 0.1)
+    assert len(confirmed) == 1
+    assert confirmed[0].id == 1
+    assert confirmed[0].matched
+
+def test_ids_persist_and_types_do_not_mix():
+    tracker = FlowerTracker(TrackerConfig())
+    for i in range(4):
+        t = i * 0.1
+        tracker.update([flower(100 + 5 * i, 100), flower(300, 200, "male")], t)
+    ids = {track.type: track.id for track in tracker.confirmed()}
+    assert ids == {"female": 1, "male": 2}
+
+    # 雄花出现在雌花预测位置附近时不会被关联到雌花目标上
+    tracker.update([flower(120, 100, "male")], 0.4)
+    female = tracker.get(1)
+    assert female.misses == 1
+    # 它也离原来的雄花太远，建立新目标（尚未确认）
+    assert sorted(track.id for track in tracker.tracks) == [1, 2, 3]
+    assert [track.id for track in tracker.confirmed("male")] == [2]
+
+def test_coasting_track_follows_velocity_then_drops():
+    tracker = FlowerTracker(TrackerConfig())
+    for i in range(6):
+        tracker.update([flower(100 + 10 * i, 100)], i * 0.1)  # 100 像素/秒向右
+    track = tracker.get(1)
+    assert track.velocity[0] == pytest.approx(100, rel=0.2)
+
+    # 漏检期间按预测位置继续存在，ID 不变
+    tracker.update([], 0.6)
+    coasting = tracker.get(1)
+    assert coasting is not None and not coasting.matched
+    assert coasting.position[0] == pytest.approx(160, abs=5)
+
+    # 重新出现在预测位置附近时仍关联到同一目标
+    tracker.update([flower(170, 100)], 0.7)
+    assert tracker.get(1).matched
+    assert len(tracker.tracks) == 1
+
+    # 连续漏检超过 TRACKER_MAX_MISSES 后删除
+    for i in range(TrackerConfig.TRACKER_MAX_MISSES + 1):
+        tracker.update([], 0.8 + i * 0.1)
+    assert tracker.get(1) is None
+    assert tracker.confirmed() == []
+
+def test_far_detection_starts_new_track():
+    tracker = FlowerTracker(TrackerConfig())
+    tracker.update([flower(100, 100)], 0.0)
+    tracker.update([flower(100 + TrackerConfig.TRACKER_MAX_DISTANCE * 3, 100)], 0.1)
+    assert sorted(track.id for track in tracker.tracks) == [1, 2]
+
+def test_duplicate_timestamp_is_ignored():
+    tracker = FlowerTracker(TrackerConfig())
+    tracker.update([flower(100, 100)], 1.0)
+    tracker.update([flower(100, 100)], 1.0)
+    assert tracker.get(1).hits == 1
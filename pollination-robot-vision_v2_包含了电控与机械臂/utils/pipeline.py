@@ -0,0 +1,121 @@
+import queue
+import threading
+import time
+
+class LatestResult:
+    """最新结果交接槽：新结果覆盖旧结果，消费者总是拿到最新的一帧"""
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._value = None
+        self._version = 0
+
+    def put(self, value):
+        """写入新结果"""
+        with self._cond:
+            self._value = value
+            self._version += 1
+            self._cond.notify_all()
+
+    def get(self):
+        """读取最新结果（不阻塞），返回 (结果, 版本号)"""
+        with self._cond:
+            return self._value, self._version
+
+    def wait_newer(self, version, timeout=None):
+        """等待版本号大于version的结果，超时返回当前结果"""
+        with self._cond:
+            self._cond.wait_for(lambda: self._version > version, timeout)
+            return self._value, self._version
+
+class Pipeline:
+    """多级流水线执行器
+
+    每个阶段由独立的工作线程执行，相邻阶段之间用有界队列连接，
+    因此连续的帧可以同时处于不同阶段（OpenCV 运算会释放 GIL）。
+    最后一个阶段的输出写入 LatestResult，供主循环取用。
+    """
+
+    def __init__(self, source, stages, queue_size=2):
+        """
+        source: 无参函数，返回下一个待处理对象，返回 None 表示暂无数据
+        stages: [(阶段名, 函数)]，函数接收上一阶段的输出并返回本阶段输出，返回 None 则丢弃该帧
+        """
+        self.source = source
+        self.stages = stages
+        self.queues = [queue.Queue(maxsize=queue_size) for _ in stages]
+        self.latest = LatestResult()
+        self.stage_times = {name: 0.0 for name, _ in stages}  # 各阶段最近一次耗时 (秒)
+        self.dropped = 0
+        self._running = False
+        self._threads = []
+
+    def start(self):
+        """启动所有阶段线程"""
+        self._running = True
+        self._threads = [threading.Thread(target=self._source_loop, name="pipeline-source", daemon=True)]
+        for i, (name, func) in enumerate(self.stages):
+            self._threads.append(threading.Thread(
+                target=self._stage_loop, args=(i, name, func), name=f"pipeline-{name}", daemon=True))
+        for thread in self._threads:
+            thread.start()
+        return self
+
+    def stop(self):
+        """停止流水线并等待线程退出"""
+        self._running = False
+        for thread in self._threads:
+            thread.join(timeout=1.0)
+        self._threads = []
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    def _source_loop(self):
+        """数据源线程：不断取帧送入第一级队列"""
+        while self._running:
+            item = self.source()
+            if item is None:
+                time.sleep(0.005)
+                continue
+            self._put(0, item)
+
+    def _stage_loop(self, index, name, func):
+        """阶段线程：从本级队列取数据，处理后送入下一级或写入最新结果"""
+        while self._running:
+            try:
+                item = self.queues[index].get(timeout=0.1)
+            except queue.Empty:
+                continue
+
+            start_time = time.time()
+            try:
+                result = func(item)
+            except Exception as e:
+                print(f"流水线阶段 {name} 异常: {e}")
+                result = None
+            self.stage_times[name] = time.time() - start_time
+
+            if result is None:
+                continue
+            if index + 1 < len(self.stages):
+                self._put(index + 1, result)
+            else:
+                self.latest.put(result)
+
+    def _put(self, index, item):
+        """送入指定队列；队列满时丢弃最旧的一帧，保证下游处理的是较新的帧"""
+        target = self.queues[index]
+        while self._running:
+            try:
+                target.put_nowait(item)
+                return
+            except queue.Full:
+                try:
+                    target.get_nowait()
+                    self.dropped += 1
+                except queue.Empty:
+                    pass
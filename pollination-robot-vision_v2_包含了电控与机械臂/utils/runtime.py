@@ -0,0 +1,172 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+class RateLimiter:
+    """按固定周期节拍等待；落后超过一个周期时重新对齐，不补跑错过的节拍"""
+
+    def __init__(self, period):
+        self.period = period
+        self.overruns = 0  # 单次迭代耗时超过周期的次数
+        self._next_time = None
+
+    async def wait(self):
+        """等待到下一个节拍"""
+        now = time.perf_counter()
+        if self._next_time is None:
+            self._next_time = now
+        self._next_time += self.period
+        delay = self._next_time - now
+        if delay > 0:
+            await asyncio.sleep(delay)
+        else:
+            self.overruns += 1
+            self._next_time = now
+
+class RobotRuntime:
+    """基于 asyncio 的机器人运行时：采集、感知、状态机、电机和界面作为协作任务运行
+
+    - 采集任务限速取帧，送入有界队列；感知跟不上时丢弃最旧的帧（背压）
+    - 感知任务在执行器中并行检测，结果覆盖写入最新结果槽
+    - 状态机任务每个新感知结果更新一次
+    - 电机任务按巡线控制周期轮询定时动作并执行巡线转向，节拍不受检测耗时影响
+    - 界面任务限速刷新调试画面，固定在同一个线程里调用 HighGUI
+
+    阻塞的 OpenCV 运算和硬件调用都放到线程池执行器中，事件循环本身只做调度。
+    """
+
+    def __init__(self, config, capture, perceive, state_machine, motor,
+                 lane_control=None, display=None, until=None):
+        """
+        capture: 无参函数，返回下一帧的 FrameContext，暂无新帧时返回 None
+        perceive: 接收 FrameContext、返回 PerceptionResult 的函数（如 PerceptionPool.run）
+        lane_control: 可选的 LaneControlLoop，由电机任务按周期调用其 step()，不再启动独立线程
+        display: 可选的界面函数，接收最新的 PerceptionResult，返回 False 时结束运行
+        until: 可选的无参函数，返回 True 时结束运行（如任务完成或超时）
+        """
+        self.config = config
+        self.capture = capture
+        self.perceive = perceive
+        self.state_machine = state_machine
+        self.motor = motor
+        self.lane_control = lane_control
+        self.display = display
+        self.until = until
+
+        self.latest = None   # 最新的感知结果
+        self.version = 0     # 感知结果版本号
+        self.dropped = 0     # 感知跟不上而丢弃的帧数
+        self.task_times = {}  # 任务名称 → 最近一次执行器调用耗时 (秒)
+        self.limiters = {}    # 任务名称 → RateLimiter
+
+        self._executor = None
+        self._ui_executor = None
+        self._frames = None
+        self._new_result = None
+        self._stop = None
+
+    async def run(self):
+        """运行全部任务，直到调用 stop()、until() 为真或界面要求退出"""
+        self._executor = ThreadPoolExecutor(max_workers=self.config.RUNTIME_WORKERS,
+                                            thread_name_prefix="runtime")
+        # HighGUI 要求在同一个线程里创建和刷新窗口
+        self._ui_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="runtime-ui")
+        self._frames = asyncio.Queue(maxsize=self.config.RUNTIME_QUEUE_SIZE)
+        self._new_result = asyncio.Event()
+        self._stop = asyncio.Event()
+
+        tasks = [asyncio.create_task(self._capture_task(), name="capture"),
+                 asyncio.create_task(self._perception_task(), name="perception"),
+                 asyncio.create_task(self._state_task(), name="state"),
+                 asyncio.create_task(self._motor_task(), name="motor")]
+        if self.display is not None:
+            tasks.append(asyncio.create_task(self._ui_task(), name="ui"))
+
+        try:
+            await self._stop.wait()
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            self._executor.shutdown(wait=True)
+            self._ui_executor.shutdown(wait=True)
+
+    def stop(self):
+        """请求结束运行（需在事件循环线程中调用）"""
+        if self._stop is not None:
+            self._stop.set()
+
+    def get_stats(self):
+        """返回运行时统计信息"""
+        return {
+            "frames": self.version,
+            "dropped": self.dropped,
+            "task_times": dict(self.task_times),
+            "overruns": {name: limiter.overruns for name, limiter in self.limiters.items()}
+        }
+
+    async def _call(self, name, func, *args, executor=None):
+        """在执行器中运行阻塞函数并记录耗时；异常时打印并返回 None，任务继续运行"""
+        loop = asyncio.get_running_loop()
+        start_time = time.perf_counter()
+        try:
+            return await loop.run_in_executor(executor or self._executor, func, *args)
+        except Exception as e:
+            print(f"运行时任务 {name} 异常: {e}")
+            return None
+        finally:
+            self.task_times[name] = time.perf_counter() - start_time
+
+    async def _capture_task(self):
+        """采集：限速取帧；队列满时丢弃最旧的帧，感知总是处理较新的帧"""
+        limiter = self.limiters["capture"] = RateLimiter(1.0 / self.config.FRAME_RATE)
+        while True:
+            ctx = await self._call("capture", self.capture)
+            if ctx is not None:
+                if self._frames.full():
+                    self._frames.get_nowait()
+                    self.dropped += 1
+                self._frames.put_nowait(ctx)
+            await limiter.wait()
+
+    async def _perception_task(self):
+        """感知：在执行器中并行运行各检测器，结果写入最新结果槽"""
+        while True:
+            ctx = await self._frames.get()
+            result = await self._call("perception", self.perceive, ctx)
+            if result is not None:
+                self.latest = result
+                self.version += 1
+                self._new_result.set()
+
+    async def _state_task(self):
+        """状态机：每个新感知结果更新一次（检测结果已缓存在帧上下文中）"""
+        while True:
+            await self._new_result.wait()
+            self._new_result.clear()
+            await self._call("state", self.state_machine.update, self.latest.frame_context)
+            if self.until is not None and self.until():
+                self.stop()
+                return
+
+    async def _motor_task(self):
+        """电机：按巡线控制周期轮询定时动作的截止时间，并执行一次巡线转向"""
+        limiter = self.limiters["motor"] = RateLimiter(self.config.LANE_CONTROL_PERIOD)
+        while True:
+            self.motor.poll()
+            if self.lane_control is not None:
+                await self._call("motor", self.lane_control.step)
+            await limiter.wait()
+
+    async def _ui_task(self):
+        """界面：限速刷新调试画面，没有新结果时不重绘"""
+        limiter = self.limiters["ui"] = RateLimiter(1.0 / self.config.RUNTIME_UI_RATE)
+        version = 0
+        while True:
+            if self.version != version:
+                version = self.version
+                keep_running = await self._call("ui", self.display, self.latest, executor=self._ui_executor)
+                if keep_running is False:
+                    self.stop()
+                    return
+            await limiter.wait()
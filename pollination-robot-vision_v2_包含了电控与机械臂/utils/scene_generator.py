@@ -0,0 +1,109 @@
+import numpy as np
+
+class SceneGenerator:
+    """合成温室场景：黄色雌花、白色雄花、黑色障碍物和车道线，附带真值标注
+
+    全部用 NumPy 渲染，可任意指定分辨率、花朵数量与大小、光照和杂物密度，
+    用于基准测试和检测算法的回归检查。颜色为 BGR，与摄像头输出一致。
+    """
+
+    BACKGROUND = (170, 190, 200)  # 浅色地面，灰度高于车道二值化阈值
+    FEMALE_COLOR = (0, 220, 230)  # 黄色 (HSV H≈27)
+    MALE_COLOR = (235, 235, 235)  # 白色
+    OBSTACLE_COLOR = (10, 10, 10) # 黑色 (V < 30)
+    LANE_COLOR = (70, 70, 70)     # 深灰：灰度低于车道阈值，但不落入障碍物的黑色范围
+
+    def __init__(self, width=640, height=480, seed=None):
+        self.width = width
+        self.height = height
+        self.rng = np.random.default_rng(seed)
+        self._ys, self._xs = np.mgrid[0:height, 0:width]
+
+    def generate(self, females=6, males=4, obstacles=2, radius=(15, 35), brightness=1.0,
+                 gradient=0.0, noise=0.0, lane=True, lane_offset=None, petals=5):
+        """生成一帧场景，返回 (frame, labels)
+
+        females/males/obstacles: 目标数量（空间不足时实际数量可能更少，以标注为准）
+        radius: 花朵半径范围 (像素)
+        brightness: 整体亮度增益；gradient: 从左到右的亮度变化幅度（-1~1）
+        noise: 高斯噪声标准差；lane_offset: 车道远端相对图像中心的横向偏移 (像素)
+        """
+        frame = np.empty((self.height, self.width, 3), np.float32)
+        frame[:] = self.BACKGROUND
+        occupied = []  # 已放置目标的外接框，用于避免重叠
+        labels = {"flowers": [], "obstacles": [], "lane": None}
+
+        if lane:
+            labels["lane"] = self._draw_lane(frame, lane_offset)
+
+        for _ in range(obstacles):
+            box = self._place(occupied, int(self.rng.integers(40, 90)), int(self.rng.integers(40, 90)))
+            if box is None:
+                break
+            x, y, w, h = box
+            frame[y:y + h, x:x + w] = self.OBSTACLE_COLOR
+            labels["obstacles"].append({"position": (x + w // 2, y + h // 2), "bounding_box": box})
+
+        for flower_type, count, color in (("female", females, self.FEMALE_COLOR),
+                                          ("male", males, self.MALE_COLOR)):
+            for _ in range(count):
+                r = int(self.rng.integers(radius[0], radius[1] + 1))
+                box = self._place(occupied, 2 * r + 1, 2 * r + 1)
+                if box is None:
+                    break
+                center = (box[0] + r, box[1] + r)
+                area = self._draw_flower(frame, center, r, color, petals)
+                labels["flowers"].append({"type": flower_type, "position": center, "radius": r,
+                                          "area": area, "bounding_box": box})
+
+        # 光照：整体增益 × 水平亮度梯度
+        if brightness != 1.0 or gradient:
+            gain = brightness * (1 + gradient * (np.linspace(-0.5, 0.5, self.width, dtype=np.float32)))
+            frame *= gain[None, :, None]
+        if noise:
+            frame += self.rng.normal(0, noise, frame.shape).astype(np.float32)
+
+        return np.clip(frame, 0, 255).astype(np.uint8), labels
+
+    def frames(self, count, **kwargs):
+        """连续生成count帧，参数同generate"""
+        for _ in range(count):
+            yield self.generate(**kwargs)
+
+    def _place(self, occupied, w, h, attempts=50):
+        """随机寻找不与已有目标重叠的位置，返回外接框 (x, y, w, h)"""
+        if w >= self.width or h >= self.height:
+            return None
+        for _ in range(attempts):
+            x = int(self.rng.integers(0, self.width - w))
+            y = int(self.rng.integers(0, self.height - h))
+            if all(x + w <= ox or ox + ow <= x or y + h <= oy or oy + oh <= y
+                   for ox, oy, ow, oh in occupied):
+                occupied.append((x, y, w, h))
+                return x, y, w, h
+        return None
+
+    def _draw_flower(self, frame, center, r, color, petals):
+        """在外接框内用极坐标花瓣形状渲染花朵，返回像素面积"""
+        cx, cy = center
+        ys = self._ys[cy - r:cy + r + 1, cx - r:cx + r + 1] - cy
+        xs = self._xs[cy - r:cy + r + 1, cx - r:cx + r + 1] - cx
+        # r(θ) = r·(0.85 + 0.15·cos(kθ))，k为花瓣数
+        boundary = r * (0.85 + 0.15 * np.cos(petals * np.arctan2(ys, xs)))
+        inside = xs * xs + ys * ys <= boundary * boundary
+        frame[cy - r:cy + r + 1, cx - r:cx + r + 1][inside] = color
+        return int(np.count_nonzero(inside))
+
+    def _draw_lane(self, frame, lane_offset):
+        """在图像下半部分渲染一条从底部中心延伸到远端的车道线"""
+        if lane_offset is None:
+            lane_offset = int(self.rng.integers(-self.width // 6, self.width // 6 + 1))
+        top = (self.width // 2 + lane_offset, self.height // 2)
+        bottom = (self.width // 2, self.height)
+        half_width = max(2, self.width // 80)
+
+        rows = np.arange(top[1], self.height)
+        centers = bottom[0] + (top[0] - bottom[0]) * (bottom[1] - rows) / (bottom[1] - top[1])
+        inside = np.abs(self._xs[top[1]:] - centers[:, None]) <= half_width
+        frame[top[1]:][inside] = self.LANE_COLOR
+        return {"top": top, "bottom": bottom, "width": 2 * half_width + 1}
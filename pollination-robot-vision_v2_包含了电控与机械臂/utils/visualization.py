@@ -76,4 +76,26 @@ class Visualizer:
             cv2.putText(result, text, (10, height-20), 
                        cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 255), 2)
                        
-        return result    
\ No newline at end of file
+        return result
+        
+    @staticmethod
+    def draw_tracks(frame, tracks, target_id=None):
+        """在图像上绘制跟踪目标的 ID 和速度（当前锁定目标用红色）"""
+        if frame is None:
+            return None
+            
+        result = frame.copy()
+        
+        for track in tracks:
+            x, y = track["position"]
+            vx, vy = track.velocity
+            color = (0, 0, 255) if track.id == target_id else (255, 0, 255)
+            
+            # 速度箭头（0.5秒后的预测位置）
+            cv2.arrowedLine(result, (x, y), (int(x + vx * 0.5), int(y + vy * 0.5)), color, 2)
+            
+            # 添加标签
+            cv2.putText(result, f"#{track.id}", (x + 8, y + 20),
+                       cv2.FONT_HERSHEY_SIMPLEX, 0.6, color, 2)
+                       
+        return result
@@ -0,0 +1,181 @@
+import hashlib
+import os
+import weakref
+
+import cv2
+import numpy as np
+
+def find_corners(image, pattern_size):
+    """检测棋盘格内角点并做亚像素细化，未找到时返回 None"""
+    gray = image if image.ndim == 2 else cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    found, corners = cv2.findChessboardCorners(gray, pattern_size,
+                                               cv2.CALIB_CB_ADAPTIVE_THRESH | cv2.CALIB_CB_NORMALIZE_IMAGE)
+    if not found:
+        return None
+    criteria = (cv2.TERM_CRITERIA_EPS + cv2.TERM_CRITERIA_MAX_ITER, 30, 0.001)
+    return cv2.cornerSubPix(gray, corners, (11, 11), (-1, -1), criteria)
+
+def board_points(pattern_size, square_size):
+    """棋盘格内角点在棋盘平面上的坐标 (N, 2)，顺序与 findChessboardCorners 一致"""
+    columns, rows = pattern_size
+    grid = np.mgrid[0:columns, 0:rows].T.reshape(-1, 2)
+    return grid.astype(np.float32) * square_size
+
+class CameraCalibration:
+    """摄像头标定：内参与畸变、去畸变映射表，以及图像平面到机械臂坐标的单应
+
+    - 内参由多张棋盘格图片标定；单应由一张平放在机械臂工作平面上的棋盘格图片估计，
+      作用于去畸变后的像素坐标，因此只对工作平面（花朵高度）上的点成立
+    - initUndistortRectifyMap 的映射表只计算一次，以 .npy 存在标定文件旁边并内存映射加载，
+      文件名带内参摘要，重新标定后旧表自动失效
+    - 单个目标点的换算（pixel_to_arm）只做点的去畸变和透视变换，不需要对整帧去畸变
+    """
+
+    # 按配置对象共享，避免每个模块各自加载标定文件和映射表
+    _instances = weakref.WeakKeyDictionary()
+
+    def __init__(self, camera_matrix, dist_coeffs, image_size, homography=None, rms=None,
+                 alpha=0.0, path=None):
+        self.camera_matrix = np.asarray(camera_matrix, np.float64)
+        self.dist_coeffs = np.asarray(dist_coeffs, np.float64).reshape(-1)
+        self.image_size = tuple(int(v) for v in image_size)  # (宽, 高)
+        self.homography = None if homography is None else np.asarray(homography, np.float64)
+        self.rms = rms      # 内参标定的重投影误差 (像素)
+        self.alpha = alpha  # getOptimalNewCameraMatrix 的 alpha：0 裁掉黑边，1 保留全部像素
+        self.path = path
+        self.new_camera_matrix, _ = cv2.getOptimalNewCameraMatrix(
+            self.camera_matrix, self.dist_coeffs, self.image_size, alpha, self.image_size)
+        self._maps = None
+
+    @classmethod
+    def for_config(cls, config):
+        """返回配置中 CAMERA_CALIBRATION_FILE 对应的共享实例，未配置时返回 None"""
+        path = getattr(config, "CAMERA_CALIBRATION_FILE", None)
+        if not path:
+            return None
+        calibration = cls._instances.get(config)
+        if calibration is None:
+            calibration = cls.load(path)
+            cls._instances[config] = calibration
+        return calibration
+
+    @classmethod
+    def from_images(cls, images, pattern_size, square_size, alpha=0.0):
+        """由多张棋盘格图片标定内参与畸变，返回 (标定, 使用的图片数)"""
+        object_points, image_points = [], []
+        image_size = None
+        objp = np.zeros((pattern_size[0] * pattern_size[1], 3), np.float32)
+        objp[:, :2] = board_points(pattern_size, square_size)
+
+        for image in images:
+            size = (image.shape[1], image.shape[0])
+            if image_size is None:
+                image_size = size
+            elif size != image_size:
+                raise ValueError(f"标定图片分辨率不一致: {size} 与 {image_size}")
+            corners = find_corners(image, pattern_size)
+            if corners is None:
+                continue
+            object_points.append(objp)
+            image_points.append(corners)
+
+        if len(image_points) < 3:
+            raise ValueError(f"只在 {len(image_points)} 张图片中找到棋盘格，至少需要 3 张")
+
+        rms, camera_matrix, dist_coeffs, _, _ = cv2.calibrateCamera(
+            object_points, image_points, image_size, None, None)
+        return cls(camera_matrix, dist_coeffs, image_size, rms=rms, alpha=alpha), len(image_points)
+
+    def estimate_homography(self, image, pattern_size, square_size, origin=(0.0, 0.0)):
+        """由平放在工作平面上的棋盘格图片估计 像素 → 机械臂坐标 的单应，返回平均误差 (机械臂单位)
+
+        棋盘格的行列方向与机械臂 x、y 轴对齐，origin 为第一个内角点的机械臂坐标。
+        """
+        corners = find_corners(image, pattern_size)
+        if corners is None:
+            raise ValueError("工作平面图片中未找到棋盘格")
+        pixels = self.undistort_points(corners.reshape(-1, 2))
+        arm_points = board_points(pattern_size, square_size) + np.asarray(origin, np.float32)
+
+        homography, _ = cv2.findHomography(pixels, arm_points)
+        if homography is None:
+            raise ValueError("无法估计单应矩阵")
+        self.homography = homography
+
+        projected = cv2.perspectiveTransform(pixels.reshape(-1, 1, 2), homography).reshape(-1, 2)
+        return float(np.linalg.norm(projected - arm_points, axis=1).mean())
+
+    def save(self, path):
+        """保存标定结果 (.npz)，并生成去畸变映射表缓存"""
+        np.savez(path, camera_matrix=self.camera_matrix, dist_coeffs=self.dist_coeffs,
+                 image_size=np.asarray(self.image_size),
+                 homography=self.homography if self.homography is not None else np.zeros(0),
+                 rms=np.asarray(np.nan if self.rms is None else self.rms), alpha=np.asarray(self.alpha))
+        self.path = path
+        self._maps = None
+        self.undistort_maps()
+
+    @classmethod
+    def load(cls, path):
+        """加载 save() 保存的标定结果"""
+        with np.load(path) as data:
+            homography = data["homography"] if data["homography"].size else None
+            rms = float(data["rms"])
+            return cls(data["camera_matrix"], data["dist_coeffs"], data["image_size"], homography,
+                       rms=None if np.isnan(rms) else rms, alpha=float(data["alpha"]), path=path)
+
+    def undistort_maps(self):
+        """返回 (map1, map2) 定点映射表；有标定文件时缓存到磁盘并内存映射加载"""
+        if self._maps is not None:
+            return self._maps
+
+        cache = self._map_cache_paths()
+        if cache is not None and all(os.path.exists(p) for p in cache):
+            self._maps = tuple(np.load(p, mmap_mode="r") for p in cache)
+            return self._maps
+
+        # CV_16SC2 定点表：remap 速度最快，表也只有浮点表的一半大
+        maps = cv2.initUndistortRectifyMap(self.camera_matrix, self.dist_coeffs, None,
+                                           self.new_camera_matrix, self.image_size, cv2.CV_16SC2)
+        if cache is not None:
+            for p, table in zip(cache, maps):
+                np.save(p, table)
+            maps = tuple(np.load(p, mmap_mode="r") for p in cache)
+        self._maps = maps
+        return self._maps
+
+    def undistort(self, frame):
+        """整帧去畸变（查表 remap）"""
+        if (frame.shape[1], frame.shape[0]) != self.image_size:
+            raise ValueError(f"帧分辨率 {frame.shape[1]}x{frame.shape[0]} 与标定分辨率 {self.image_size} 不一致")
+        map1, map2 = self.undistort_maps()
+        return cv2.remap(frame, map1, map2, cv2.INTER_LINEAR)
+
+    def undistort_points(self, points):
+        """原始像素坐标 (N, 2) → 去畸变后的像素坐标（与 undistort() 输出的图像一致）"""
+        points = np.asarray(points, np.float32).reshape(-1, 1, 2)
+        return cv2.undistortPoints(points, self.camera_matrix, self.dist_coeffs,
+                                   P=self.new_camera_matrix).reshape(-1, 2)
+
+    def pixel_to_arm(self, points, undistorted=False):
+        """像素坐标 (N, 2) → 机械臂工作平面坐标 (N, 2)
+
+        undistorted: 输入是否已是去畸变图像上的坐标（如检测在 undistort() 后的帧上进行）
+        """
+        if self.homography is None:
+            raise ValueError("标定结果中没有机械臂单应，请先用工作平面图片估计")
+        points = np.asarray(points, np.float32).reshape(-1, 2)
+        if not undistorted:
+            points = self.undistort_points(points)
+        return cv2.perspectiveTransform(points.reshape(-1, 1, 2), self.homography).reshape(-1, 2)
+
+    def _map_cache_paths(self):
+        """映射表缓存文件路径，文件名带内参与分辨率摘要"""
+        if self.path is None:
+            return None
+        digest = hashlib.sha1()
+        for array in (self.camera_matrix, self.dist_coeffs, self.new_camera_matrix,
+                      np.asarray(self.image_size)):
+            digest.update(np.ascontiguousarray(array, np.float64).tobytes())
+        stem = f"{os.path.splitext(self.path)[0]}_undistort_{digest.hexdigest()[:12]}"
+        return f"{stem}_map1.npy", f"{stem}_map2.npy"
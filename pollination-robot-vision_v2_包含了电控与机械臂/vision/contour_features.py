@@ -0,0 +1,67 @@
+import cv2
+import numpy as np
+
+def contour_features(contours, ratio_mask=None, offset=(0, 0)):
+    """一次性计算一组轮廓的特征，代替逐个调用 contourArea / moments / boundingRect
+
+    所有轮廓的点拼接成一个数组，用格林公式（与 cv2.contourArea、cv2.moments 相同）
+    按轮廓分段求和。返回字典，各字段均为按轮廓排列的NumPy数组：
+        areas      轮廓面积
+        centroids  质心 (x, y)，面积为0的轮廓为 NaN
+        boxes      外接矩形 (x, y, w, h)
+        ratios     ratio_mask 在外接矩形内的像素占比（未提供 ratio_mask 时为 None）
+    offset 为 ratio_mask 左上角在轮廓坐标系中的位置（轮廓用 findContours 的 offset 提取时传入同一值）
+    """
+    count = len(contours)
+    if count == 0:
+        return {
+            "areas": np.empty(0),
+            "centroids": np.empty((0, 2)),
+            "boxes": np.empty((0, 4), np.int32),
+            "ratios": None if ratio_mask is None else np.empty(0)
+        }
+
+    lengths = np.fromiter((len(c) for c in contours), np.intp, count)
+    starts = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+    points = np.concatenate(contours).reshape(-1, 2)
+
+    # 每个点的下一个点（轮廓首尾相接）
+    following = np.arange(1, len(points) + 1)
+    following[starts + lengths - 1] = starts
+
+    x = points[:, 0].astype(np.float64)
+    y = points[:, 1].astype(np.float64)
+    x_next, y_next = x[following], y[following]
+    cross = x * y_next - x_next * y
+
+    doubled_area = np.add.reduceat(cross, starts)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cx = np.add.reduceat((x + x_next) * cross, starts) / (3 * doubled_area)
+        cy = np.add.reduceat((y + y_next) * cross, starts) / (3 * doubled_area)
+
+    lower = np.minimum.reduceat(points, starts)
+    upper = np.maximum.reduceat(points, starts)
+    boxes = np.hstack((lower, upper - lower + 1)).astype(np.int32)
+
+    features = {
+        "areas": np.abs(doubled_area) / 2,
+        "centroids": np.column_stack((cx, cy)),
+        "boxes": boxes,
+        "ratios": None
+    }
+
+    if ratio_mask is not None:
+        local_boxes = boxes - np.array([offset[0], offset[1], 0, 0], np.int32)
+        features["ratios"] = box_ratios(cv2.integral(ratio_mask), local_boxes)
+
+    return features
+
+def box_ratios(integral, boxes):
+    """用积分图向量化计算每个矩形内掩码像素（0/255）的占比"""
+    if len(boxes) == 0:
+        return np.empty(0)
+
+    x1, y1 = boxes[:, 0], boxes[:, 1]
+    x2, y2 = x1 + boxes[:, 2], y1 + boxes[:, 3]
+    sums = integral[y2, x2] - integral[y1, x2] - integral[y2, x1] + integral[y1, x1]
+    return sums / (255.0 * boxes[:, 2] * boxes[:, 3])
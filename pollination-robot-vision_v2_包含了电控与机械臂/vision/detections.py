@@ -0,0 +1,167 @@
+import numpy as np
+
+class Detections:
+    """一帧检测结果的紧凑容器：所有字段存放在一个NumPy结构化数组中，轮廓单独存放
+
+    按序号访问得到 Detection 视图，兼容原来的字典式访问（flower["position"] 等），
+    同时提供按列的数组属性，便于向量化打分。
+    """
+
+    TYPES = ("female", "male", "obstacle")
+    _TYPE_CODES = {name: code for code, name in enumerate(TYPES)}
+
+    DTYPE = np.dtype([
+        ("type", np.uint8),
+        ("position", np.int32, (2,)),  # 中心 (x, y)
+        ("area", np.float32),
+        ("box", np.int32, (4,)),       # 外接矩形 (x, y, w, h)
+        ("yellow_ratio", np.float32)
+    ])
+
+    def __init__(self, records=None, contours=None):
+        self.records = records if records is not None else np.zeros(0, self.DTYPE)
+        self.contours = contours if contours is not None else []
+
+    @classmethod
+    def from_arrays(cls, detection_type, positions, areas, boxes, contours, yellow_ratios=None):
+        """由同一类型的特征数组构建"""
+        records = np.zeros(len(areas), cls.DTYPE)
+        records["type"] = cls._TYPE_CODES[detection_type]
+        records["position"] = positions
+        records["area"] = areas
+        records["box"] = boxes
+        if yellow_ratios is not None:
+            records["yellow_ratio"] = yellow_ratios
+        return cls(records, list(contours))
+
+    @classmethod
+    def from_records(cls, detections):
+        """由字典列表（或 Detection 列表）构建，兼容旧接口"""
+        if isinstance(detections, cls):
+            return detections
+
+        records = np.zeros(len(detections), cls.DTYPE)
+        contours = []
+        for i, detection in enumerate(detections):
+            records[i]["type"] = cls._TYPE_CODES[detection.get("type", "obstacle")]
+            records[i]["area"] = detection["area"]
+            records[i]["yellow_ratio"] = detection.get("yellow_ratio", 0)
+            if "x" in detection:
+                records[i]["box"] = (detection["x"], detection["y"], detection["width"], detection["height"])
+            if "position" in detection:
+                records[i]["position"] = detection["position"]
+            else:
+                x, y, w, h = records[i]["box"]
+                records[i]["position"] = (x + w // 2, y + h // 2)
+            contours.append(detection.get("contour"))
+        return cls(records, contours)
+
+    @classmethod
+    def concatenate(cls, batches):
+        """合并多个检测结果"""
+        batches = [batch for batch in batches if len(batch)]
+        if not batches:
+            return cls()
+        records = np.concatenate([batch.records for batch in batches])
+        contours = [contour for batch in batches for contour in batch.contours]
+        return cls(records, contours)
+
+    def __len__(self):
+        return len(self.records)
+
+    def __iter__(self):
+        for i in range(len(self.records)):
+            yield Detection(self, i)
+
+    def __getitem__(self, index):
+        """整数索引返回单个检测视图，切片/布尔数组/索引数组返回子集"""
+        if isinstance(index, (int, np.integer)):
+            if index < 0:
+                index += len(self.records)
+            if not 0 <= index < len(self.records):
+                raise IndexError("检测结果索引越界")
+            return Detection(self, int(index))
+
+        selected = np.arange(len(self.records))[index]
+        return Detections(self.records[selected], [self.contours[i] for i in selected])
+
+    def __repr__(self):
+        return f"Detections({[detection.to_dict() for detection in self]})"
+
+    @property
+    def types(self):
+        """类型编码数组"""
+        return self.records["type"]
+
+    @property
+    def positions(self):
+        """中心坐标数组 (N, 2)"""
+        return self.records["position"]
+
+    @property
+    def areas(self):
+        """面积数组"""
+        return self.records["area"]
+
+    @property
+    def boxes(self):
+        """外接矩形数组 (N, 4)，格式为 (x, y, w, h)"""
+        return self.records["box"]
+
+    def of_type(self, detection_type):
+        """筛选指定类型的检测结果"""
+        return self[self.records["type"] == self._TYPE_CODES[detection_type]]
+
+class Detection:
+    """Detections 中单个检测结果的轻量视图，支持字典式访问"""
+
+    __slots__ = ("detections", "index")
+
+    KEYS = ("type", "position", "area", "contour", "yellow_ratio",
+            "x", "y", "width", "height", "bounding_box")
+
+    def __init__(self, detections, index):
+        self.detections = detections
+        self.index = index
+
+    def __getitem__(self, key):
+        record = self.detections.records[self.index]
+        if key == "type":
+            return Detections.TYPES[record["type"]]
+        if key == "position":
+            return int(record["position"][0]), int(record["position"][1])
+        if key == "area":
+            return float(record["area"])
+        if key == "contour":
+            return self.detections.contours[self.index]
+        if key == "yellow_ratio":
+            return float(record["yellow_ratio"])
+
+        x, y, w, h = (int(v) for v in record["box"])
+        if key == "x":
+            return x
+        if key == "y":
+            return y
+        if key == "width":
+            return w
+        if key == "height":
+            return h
+        if key == "bounding_box":
+            return x, y, x + w, y + h
+        raise KeyError(key)
+
+    def __contains__(self, key):
+        return key in self.KEYS
+
+    def get(self, key, default=None):
+        return self[key] if key in self.KEYS else default
+
+    def keys(self):
+        return self.KEYS
+
+    def to_dict(self):
+        """转换为普通字典（不含轮廓）"""
+        return {key: self[key] for key in self.KEYS if key != "contour"}
+
+    def __repr__(self):
+        return f"Detection({self.to_dict()})"
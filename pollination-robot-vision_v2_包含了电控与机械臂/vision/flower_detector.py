@@ -1,78 +1,236 @@
 import cv2
 import numpy as np
 
+from vision.contour_features import contour_features
+from vision.detections import Detections
+from vision.frame_context import FrameContext
+from vision.segmentation import in_range
+
 class FlowerDetector:
     """检测和识别花朵"""
-    
+
     def __init__(self, config):
         self.config = config
         self.erode_kernel = np.ones(self.config.ERODE_KERNEL, np.uint8)
         self.dilate_kernel = np.ones(self.config.DILATE_KERNEL, np.uint8)
-        
+        self._pyramid_kernels = {}  # 缩放倍数 → 缩小后的 (腐蚀核, 膨胀核)
+
+        # 跟踪模式状态（匀速模型）
+        self.track_position = None  # 上次跟踪到的位置
+        self.track_velocity = (0.0, 0.0)  # 像素/秒
+        self.track_timestamp = None
+
     def detect(self, frame):
-        """检测图像中的花朵"""
+        """检测图像中的花朵（frame可为原始图像或FrameContext）"""
         if frame is None:
-            return []
-            
-        # 转换到HSV颜色空间
-        hsv = cv2.cvtColor(frame, cv2.COLOR_BGR2HSV)
-        
-        # 创建黄色掩码（雌花特征）
-        yellow_mask = cv2.inRange(hsv, 
-                                 self.config.YELLOW_LOWER, 
-                                 self.config.YELLOW_UPPER)
-                                 
-        # 创建白色掩码（雄花/授粉标记）
-        white_mask = cv2.inRange(hsv, 
-                                self.config.WHITE_LOWER, 
-                                self.config.WHITE_UPPER)
-                                
-        # 形态学操作
-        yellow_mask = cv2.erode(yellow_mask, self.erode_kernel, iterations=self.config.ERODE_ITERATIONS)
-        yellow_mask = cv2.dilate(yellow_mask, self.dilate_kernel, iterations=self.config.DILATE_ITERATIONS)
-        
-        white_mask = cv2.erode(white_mask, self.erode_kernel, iterations=self.config.ERODE_ITERATIONS)
-        white_mask = cv2.dilate(white_mask, self.dilate_kernel, iterations=self.config.DILATE_ITERATIONS)
-        
-        # 查找轮廓
-        yellow_contours, _ = cv2.findContours(yellow_mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-        white_contours, _ = cv2.findContours(white_mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-        
-        # 过滤并分类花朵
-        flowers = []
-        
-        # 处理雌花
-        for cnt in yellow_contours:
-            area = cv2.contourArea(cnt)
-            if self.config.MIN_FLOWER_AREA < area < self.config.MAX_FLOWER_AREA:
-                # 计算轮廓中心
-                M = cv2.moments(cnt)
-                if M["m00"] != 0:
-                    cX = int(M["m10"] / M["m00"])
-                    cY = int(M["m01"] / M["m00"])
-                    
-                    flowers.append({
-                        "type": "female",
-                        "position": (cX, cY),
-                        "area": area,
-                        "contour": cnt
-                    })
-                    
-        # 处理雄花
-        for cnt in white_contours:
-            area = cv2.contourArea(cnt)
-            if self.config.MIN_FLOWER_AREA < area < self.config.MAX_FLOWER_AREA:
-                # 计算轮廓中心
-                M = cv2.moments(cnt)
-                if M["m00"] != 0:
-                    cX = int(M["m10"] / M["m00"])
-                    cY = int(M["m01"] / M["m00"])
-                    
-                    flowers.append({
-                        "type": "male",
-                        "position": (cX, cY),
-                        "area": area,
-                        "contour": cnt
-                    })
-                    
-        return flowers    
\ No newline at end of file
+            return Detections()
+
+        ctx = FrameContext.wrap(frame, self.config)
+        return ctx.cached(("flowers", id(self)), lambda: self._detect(ctx))
+
+    def _detect(self, ctx):
+        """在帧上下文中检测花朵"""
+        scale = getattr(self.config, "DETECTION_SCALE", 1)
+        if scale > 1:
+            return self._detect_pyramid(ctx, scale)
+
+        # 黄色掩码（雌花特征）与白色掩码（雄花/授粉标记），已做形态学去噪
+        return self._find_flowers(ctx.cleaned_mask("yellow"), ctx.cleaned_mask("white"))
+
+    def _find_flowers(self, yellow_mask, white_mask, offset=(0, 0)):
+        """从黄色/白色掩码中提取花朵，offset为掩码左上角在整帧中的坐标"""
+        batches = []
+
+        # 黄色轮廓为雌花，白色轮廓为雄花；特征批量计算，面积过滤为数组运算
+        for flower_type, mask in (("female", yellow_mask), ("male", white_mask)):
+            contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE, offset=offset)
+            features = contour_features(contours, ratio_mask=yellow_mask, offset=offset)
+
+            areas = features["areas"]
+            keep = np.flatnonzero((areas > self.config.MIN_FLOWER_AREA) & (areas < self.config.MAX_FLOWER_AREA))
+            batches.append(Detections.from_arrays(
+                flower_type,
+                features["centroids"][keep].astype(np.int32),
+                areas[keep],
+                features["boxes"][keep],
+                [contours[i] for i in keep],
+                yellow_ratios=features["ratios"][keep]))
+
+        return Detections.concatenate(batches)
+
+    def _detect_pyramid(self, ctx, scale):
+        """粗到精检测：在缩小scale倍的图像上找候选区域，再在全分辨率窗口内重新分割
+
+        面积阈值按 scale² 缩小并放宽，只用于筛选候选。候选窗口内的全分辨率掩码
+        写回整帧大小的空白掩码后统一提取轮廓，面积过滤、质心和轮廓都来自全分辨率，
+        与整帧检测结果一致。
+        """
+        height, width = ctx.shape[:2]
+        small = ctx.cached(("downscaled", scale), lambda: cv2.resize(
+            ctx.frame, (width // scale, height // scale), interpolation=cv2.INTER_AREA))
+
+        erode_kernel, dilate_kernel = self._scaled_kernels(scale)
+        min_area = self.config.MIN_FLOWER_AREA / scale ** 2 * 0.5
+        max_area = self.config.MAX_FLOWER_AREA / scale ** 2 * 1.5
+        pad = self.config.PYRAMID_REFINE_PADDING + scale
+        windows = []
+        for mask in self._color_masks(ctx, small):
+            mask = cv2.erode(mask, erode_kernel, iterations=self.config.ERODE_ITERATIONS)
+            mask = cv2.dilate(mask, dilate_kernel, iterations=self.config.DILATE_ITERATIONS)
+            contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+            features = contour_features(contours)
+            keep = (features["areas"] > min_area) & (features["areas"] < max_area)
+            for x, y, w, h in features["boxes"][keep]:
+                windows.append((max(0, x * scale - pad), max(0, y * scale - pad),
+                                min(width, (x + w) * scale + pad), min(height, (y + h) * scale + pad)))
+
+        # 合并重叠窗口，避免窗口边界处的形态学结果覆盖相邻窗口内部
+        yellow_mask = np.zeros((height, width), np.uint8)
+        white_mask = np.zeros((height, width), np.uint8)
+        for x1, y1, x2, y2 in self._merge_windows(windows):
+            for full, mask in zip((yellow_mask, white_mask), self._color_masks(ctx, ctx.frame[y1:y2, x1:x2])):
+                mask = cv2.erode(mask, self.erode_kernel, iterations=self.config.ERODE_ITERATIONS)
+                full[y1:y2, x1:x2] = cv2.dilate(mask, self.dilate_kernel, iterations=self.config.DILATE_ITERATIONS)
+
+        return self._find_flowers(yellow_mask, white_mask)
+
+    @staticmethod
+    def _color_masks(ctx, image):
+        """对一块BGR图像做黄色/白色分割，返回原始掩码 [黄, 白]"""
+        segmenter = ctx.segmenter
+        if segmenter is not None:
+            # 查找表分割器直接处理BGR，无需颜色空间转换
+            labels = segmenter.label(image if segmenter.color_space == "bgr"
+                                     else cv2.cvtColor(image, cv2.COLOR_BGR2HSV))
+            return [segmenter.plane(labels, "yellow"), segmenter.plane(labels, "white")]
+
+        # 阈值随光照类别切换（光照估计基于整帧，每帧只算一次）
+        hsv = cv2.cvtColor(image, cv2.COLOR_BGR2HSV)
+        return [in_range(hsv, *ctx.color_range("yellow")),
+                in_range(hsv, *ctx.color_range("white"))]
+
+    def _scaled_kernels(self, scale):
+        """按缩放倍数缩小的形态学核"""
+        kernels = self._pyramid_kernels.get(scale)
+        if kernels is None:
+            kernels = tuple(np.ones(tuple(max(1, round(k / scale)) for k in size), np.uint8)
+                            for size in (self.config.ERODE_KERNEL, self.config.DILATE_KERNEL))
+            self._pyramid_kernels[scale] = kernels
+        return kernels
+
+    @staticmethod
+    def _merge_windows(windows):
+        """合并相互重叠的窗口 (x1, y1, x2, y2)"""
+        merged = []
+        for window in windows:
+            x1, y1, x2, y2 = (int(v) for v in window)
+            # 与已有窗口重叠时合并，合并后可能又与其他窗口重叠，继续吸收
+            changed = True
+            while changed:
+                changed = False
+                for other in merged:
+                    if x1 < other[2] and other[0] < x2 and y1 < other[3] and other[1] < y2:
+                        merged.remove(other)
+                        x1, y1 = min(x1, other[0]), min(y1, other[1])
+                        x2, y2 = max(x2, other[2]), max(y2, other[3])
+                        changed = True
+                        break
+            merged.append((x1, y1, x2, y2))
+        return merged
+
+    def track(self, frame, target):
+        """跟踪模式：只在目标预测位置附近的窗口内重新分割，丢失时回退到整帧检测"""
+        if frame is None or target is None:
+            return None
+
+        ctx = FrameContext.wrap(frame, self.config)
+        if self.track_position is None:
+            self._update_track(target["position"], ctx.timestamp)
+
+        # 匀速模型预测当前位置
+        dt = max(0.0, ctx.timestamp - self.track_timestamp)
+        predicted = (self.track_position[0] + self.track_velocity[0] * dt,
+                     self.track_position[1] + self.track_velocity[1] * dt)
+
+        window = self._track_window(ctx, target, predicted)
+        flower = None
+        if window is not None:
+            flower = self._nearest(self._detect_window(ctx, window), target["type"], predicted)
+            if flower is not None and self._touches_window_edge(flower, window, ctx.shape):
+                # 目标被窗口截断，窗口内的轮廓不可信
+                flower = None
+
+        if flower is None:
+            # 目标丢失，回退到整帧检测
+            flower = self._nearest(self.detect(ctx), target["type"], predicted)
+
+        if flower is None:
+            self.reset_tracking()
+            return None
+
+        self._update_track(flower["position"], ctx.timestamp)
+        return flower
+
+    def reset_tracking(self):
+        """清除跟踪状态"""
+        self.track_position = None
+        self.track_velocity = (0.0, 0.0)
+        self.track_timestamp = None
+
+    def _update_track(self, position, timestamp):
+        """更新跟踪位置，并对速度做指数平滑"""
+        if self.track_position is not None and timestamp > self.track_timestamp:
+            dt = timestamp - self.track_timestamp
+            alpha = self.config.TRACK_VELOCITY_SMOOTHING
+            vx = (position[0] - self.track_position[0]) / dt
+            vy = (position[1] - self.track_position[1]) / dt
+            self.track_velocity = (alpha * vx + (1 - alpha) * self.track_velocity[0],
+                                   alpha * vy + (1 - alpha) * self.track_velocity[1])
+        self.track_position = position
+        self.track_timestamp = timestamp
+
+    def _track_window(self, ctx, target, predicted):
+        """以预测位置为中心、按目标大小加边距得到搜索窗口 (x1, y1, x2, y2)"""
+        _, _, w, h = cv2.boundingRect(target["contour"])
+        pad = self.config.TRACK_WINDOW_PADDING
+        half_w = w // 2 + pad
+        half_h = h // 2 + pad
+        height, width = ctx.shape[:2]
+
+        x1 = max(0, int(predicted[0]) - half_w)
+        y1 = max(0, int(predicted[1]) - half_h)
+        x2 = min(width, int(predicted[0]) + half_w)
+        y2 = min(height, int(predicted[1]) + half_h)
+        if x2 <= x1 or y2 <= y1:
+            return None
+        return x1, y1, x2, y2
+
+    def _detect_window(self, ctx, window):
+        """只对窗口区域做颜色分割和轮廓提取"""
+        x1, y1, x2, y2 = window
+        raw_masks = self._color_masks(ctx, ctx.frame[y1:y2, x1:x2])
+
+        masks = []
+        for mask in raw_masks:
+            mask = cv2.erode(mask, self.erode_kernel, iterations=self.config.ERODE_ITERATIONS)
+            mask = cv2.dilate(mask, self.dilate_kernel, iterations=self.config.DILATE_ITERATIONS)
+            masks.append(mask)
+
+        return self._find_flowers(masks[0], masks[1], offset=(x1, y1))
+
+    @staticmethod
+    def _nearest(flowers, flower_type, position):
+        """返回指定类型中离给定位置最近的花朵"""
+        candidates = Detections.from_records(flowers).of_type(flower_type)
+        if not len(candidates):
+            return None
+        distances = np.sum((candidates.positions - np.asarray(position)) ** 2, axis=1)
+        return candidates[int(np.argmin(distances))]
+
+    @staticmethod
+    def _touches_window_edge(flower, window, shape):
+        """判断花朵是否贴住窗口边界（贴住整帧边界的不算）"""
+        x, y, w, h = flower["x"], flower["y"], flower["width"], flower["height"]
+        x1, y1, x2, y2 = window
+        return ((x <= x1 and x1 > 0) or (y <= y1 and y1 > 0) or
+                (x + w >= x2 and x2 < shape[1]) or (y + h >= y2 and y2 < shape[0]))
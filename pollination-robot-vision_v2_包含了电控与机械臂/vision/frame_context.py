@@ -0,0 +1,117 @@
+import threading
+import time
+
+import cv2
+import numpy as np
+
+from vision.lighting import LightingAdapter
+from vision.segmentation import ColorSegmenter, LutSegmenter, in_range
+
+class FrameContext:
+    """单帧预处理缓存，按需计算并复用HSV、灰度图和颜色掩码"""
+
+    # 颜色名称到配置中HSV阈值的映射
+    COLORS = {
+        "yellow": ("YELLOW_LOWER", "YELLOW_UPPER"),  # 雌花
+        "white": ("WHITE_LOWER", "WHITE_UPPER"),     # 雄花/授粉标记
+        "black": ("BLACK_LOWER", "BLACK_UPPER")      # 障碍物
+    }
+
+    def __init__(self, frame, config, timestamp=None, segmenter=None):
+        self.frame = frame
+        self.config = config
+        self.timestamp = timestamp if timestamp is not None else time.time()
+        if segmenter is None and getattr(config, "COLOR_LUT_FILE", None):
+            segmenter = LutSegmenter.for_config(config)
+        elif segmenter is None and getattr(config, "SINGLE_PASS_SEGMENTATION", False):
+            segmenter = ColorSegmenter.for_config(config)
+        self._segmenter = segmenter
+        # 光照自适应：按本帧光照类别选择阈值
+        self.lighting_adapter = LightingAdapter.for_config(config) \
+            if getattr(config, "ADAPTIVE_LIGHTING", False) else None
+        self._cache = {}
+        self._locks = {}
+        self._locks_guard = threading.Lock()
+
+    @classmethod
+    def wrap(cls, frame, config):
+        """已是FrameContext时原样返回，否则为原始帧创建上下文"""
+        if frame is None or isinstance(frame, cls):
+            return frame
+        return cls(frame, config)
+
+    @property
+    def shape(self):
+        return self.frame.shape
+
+    def cached(self, key, compute):
+        """返回key对应的缓存值，首次访问时调用compute计算（线程安全）"""
+        if key in self._cache:
+            return self._cache[key]
+
+        with self._locks_guard:
+            lock = self._locks.setdefault(key, threading.Lock())
+        with lock:
+            if key not in self._cache:
+                self._cache[key] = compute()
+        return self._cache[key]
+
+    @property
+    def lighting(self):
+        """本帧的光照类别（未开启光照自适应时为 None）"""
+        if self.lighting_adapter is None:
+            return None
+        return self.cached("lighting", lambda: self.lighting_adapter.update(self.frame))
+
+    @property
+    def segmenter(self):
+        """单遍分割器（开启光照自适应时为当前光照类别的版本），未启用时为 None"""
+        if self._segmenter is None or self.lighting_adapter is None:
+            return self._segmenter
+        return self.lighting_adapter.segmenter(self._segmenter, self.lighting)
+
+    def color_range(self, color):
+        """指定颜色的HSV阈值 (lower, upper)，开启光照自适应时取当前光照类别的阈值"""
+        if self.lighting_adapter is not None:
+            return self.lighting_adapter.ranges(self.lighting)[color]
+        lower_name, upper_name = self.COLORS[color]
+        return getattr(self.config, lower_name), getattr(self.config, upper_name)
+
+    @property
+    def hsv(self):
+        """HSV图像"""
+        return self.cached("hsv", lambda: cv2.cvtColor(self.frame, cv2.COLOR_BGR2HSV))
+
+    @property
+    def gray(self):
+        """灰度图像"""
+        return self.cached("gray", lambda: cv2.cvtColor(self.frame, cv2.COLOR_BGR2GRAY))
+
+    @property
+    def labels(self):
+        """单遍分割得到的像素类别位图（需要分割器）"""
+        def compute():
+            # 查找表分割器直接查BGR像素，不需要HSV
+            segmenter = self.segmenter
+            source = self.frame if segmenter.color_space == "bgr" else self.hsv
+            return segmenter.label(source)
+
+        return self.cached("labels", compute)
+
+    def mask(self, color):
+        """指定颜色的原始二值掩码"""
+        segmenter = self.segmenter
+        if segmenter is not None and color in segmenter.CLASS_BITS:
+            return self.cached(("mask", color), lambda: segmenter.plane(self.labels, color))
+
+        return self.cached(("mask", color), lambda: in_range(self.hsv, *self.color_range(color)))
+
+    def cleaned_mask(self, color):
+        """经过腐蚀、膨胀去噪后的颜色掩码"""
+        def compute():
+            erode_kernel = np.ones(self.config.ERODE_KERNEL, np.uint8)
+            dilate_kernel = np.ones(self.config.DILATE_KERNEL, np.uint8)
+            mask = cv2.erode(self.mask(color), erode_kernel, iterations=self.config.ERODE_ITERATIONS)
+            return cv2.dilate(mask, dilate_kernel, iterations=self.config.DILATE_ITERATIONS)
+
+        return self.cached(("cleaned_mask", color), compute)
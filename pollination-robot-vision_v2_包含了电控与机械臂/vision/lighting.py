@@ -0,0 +1,113 @@
+import threading
+import weakref
+
+import cv2
+
+from vision.segmentation import ColorSegmenter, LutSegmenter
+
+class LightingAdapter:
+    """运行时光照自适应：估计画面亮度，在 bright/medium/dark 三套阈值之间切换
+
+    亮度取自降采样后的小图（只读取采样到的像素），每隔若干帧估计一次并做指数平滑；
+    类别切换带滞回，亮度需越过分界线一定幅度才会切换，避免在分界附近来回抖动。
+    分界线与 ThresholdTuner 的图片分类一致。
+
+    各类别的阈值取自配置中 ThresholdTuner 生成的变量（如 YELLOW_LOWER_BRIGHT），
+    缺失时回退到 YELLOW_LOWER 等默认阈值；使用查找表分割器时直接切换查找表类别。
+    """
+
+    # 由暗到亮排列
+    CATEGORIES = ("dark", "medium", "bright")
+
+    # 按配置对象共享，保证同一配置下的所有帧使用同一份平滑状态
+    _instances = weakref.WeakKeyDictionary()
+
+    def __init__(self, config):
+        self.config = config
+        self.boundaries = (config.LIGHTING_DARK_THRESHOLD, config.LIGHTING_BRIGHT_THRESHOLD)
+        self.category = None      # 当前光照类别
+        self.brightness = None    # 平滑后的亮度估计
+        self.frame_count = 0
+        self._ranges = {}         # 类别 → 各颜色阈值
+        self._segmenters = {}     # 类别 → 该类别阈值的单遍分割器
+        self._lock = threading.Lock()
+
+    @classmethod
+    def for_config(cls, config):
+        """返回该配置对应的共享实例"""
+        adapter = cls._instances.get(config)
+        if adapter is None:
+            adapter = cls(config)
+            cls._instances[config] = adapter
+        return adapter
+
+    def update(self, frame):
+        """按需更新亮度估计，返回当前光照类别"""
+        with self._lock:
+            self.frame_count += 1
+            if self.category is not None and (self.frame_count - 1) % self.config.LIGHTING_UPDATE_INTERVAL:
+                return self.category
+
+            brightness = self.estimate_brightness(frame)
+            alpha = self.config.LIGHTING_SMOOTHING
+            if self.brightness is None:
+                self.brightness = brightness
+            else:
+                self.brightness = alpha * brightness + (1 - alpha) * self.brightness
+
+            category = self._next_category(self.brightness)
+            if category != self.category:
+                if self.category is not None:
+                    print(f"光照类别切换: {self.category} → {category} (亮度 {self.brightness:.0f})")
+                self.category = category
+            return self.category
+
+    def estimate_brightness(self, frame):
+        """降采样估计平均亮度（灰度加权，与 BGR2GRAY 一致）"""
+        small = cv2.resize(frame, self.config.LIGHTING_SAMPLE_SIZE, interpolation=cv2.INTER_NEAREST)
+        b, g, r, _ = cv2.mean(small)
+        return 0.114 * b + 0.587 * g + 0.299 * r
+
+    def ranges(self, category):
+        """指定光照类别的各颜色阈值 {颜色: (lower, upper)}"""
+        if category in self._ranges:
+            return self._ranges[category]
+        ranges = {}
+        for color in ColorSegmenter.CLASS_BITS:
+            default_lower = getattr(self.config, f"{color.upper()}_LOWER")
+            default_upper = getattr(self.config, f"{color.upper()}_UPPER")
+            ranges[color] = (getattr(self.config, f"{color.upper()}_LOWER_{category.upper()}", default_lower),
+                             getattr(self.config, f"{color.upper()}_UPPER_{category.upper()}", default_upper))
+        self._ranges[category] = ranges
+        return ranges
+
+    def segmenter(self, base, category):
+        """把基础分割器换成指定光照类别的版本"""
+        if isinstance(base, LutSegmenter):
+            return base.with_category(category) if category in base.categories else base
+
+        segmenter = self._segmenters.get(category)
+        if segmenter is None:
+            segmenter = ColorSegmenter(self.config, self.ranges(category))
+            self._segmenters[category] = segmenter
+        return segmenter
+
+    def _classify(self, brightness):
+        """不带滞回的类别划分"""
+        dark, bright = self.boundaries
+        if brightness > bright:
+            return "bright"
+        if brightness < dark:
+            return "dark"
+        return "medium"
+
+    def _next_category(self, brightness):
+        """带滞回的类别切换：越过分界线超过 LIGHTING_HYSTERESIS 才切换"""
+        category = self._classify(brightness)
+        if self.category is None or category == self.category:
+            return category
+
+        margin = self.config.LIGHTING_HYSTERESIS
+        brighter = self.CATEGORIES.index(category) > self.CATEGORIES.index(self.category)
+        # 回退一个滞回量后仍然离开当前类别，才切换到回退后所在的类别
+        return self._classify(brightness - margin if brighter else brightness + margin)
@@ -1,6 +1,10 @@
 import cv2
 import numpy as np
 
+from vision.contour_features import contour_features
+from vision.detections import Detections
+from vision.frame_context import FrameContext
+
 class ObstacleDetector:
     """检测赛道上的障碍物"""
     
@@ -8,39 +12,29 @@ class ObstacleDetector:
         self.config = config
         
     def detect(self, frame):
-        """检测图像中的障碍物"""
+        """检测图像中的障碍物（frame可为原始图像或FrameContext）"""
         if frame is None:
-            return []
-            
-        # 转换到HSV颜色空间
-        hsv = cv2.cvtColor(frame, cv2.COLOR_BGR2HSV)
-        
-        # 创建黑色掩码（障碍物特征）
-        black_mask = cv2.inRange(hsv, 
-                                self.config.BLACK_LOWER, 
-                                self.config.BLACK_UPPER)
-                                
-        # 形态学操作
-        kernel = np.ones((5, 5), np.uint8)
-        black_mask = cv2.erode(black_mask, kernel, iterations=1)
-        black_mask = cv2.dilate(black_mask, kernel, iterations=2)
-        
+            return Detections()
+
+        ctx = FrameContext.wrap(frame, self.config)
+        return ctx.cached(("obstacles", id(self)), lambda: self._detect(ctx))
+
+    def _detect(self, ctx):
+        """在帧上下文中检测障碍物"""
+        # 黑色掩码（障碍物特征），已做形态学去噪
+        black_mask = ctx.cleaned_mask("black")
+
         # 查找轮廓
         contours, _ = cv2.findContours(black_mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
         
-        # 过滤障碍物
-        obstacles = []
-        for cnt in contours:
-            area = cv2.contourArea(cnt)
-            if area > 1000:  # 忽略小面积区域
-                x, y, w, h = cv2.boundingRect(cnt)
-                obstacles.append({
-                    "x": x,
-                    "y": y,
-                    "width": w,
-                    "height": h,
-                    "area": area,
-                    "contour": cnt
-                })
-                
-        return obstacles    
\ No newline at end of file
+        # 批量计算轮廓特征，过滤小面积区域
+        features = contour_features(contours)
+        keep = np.flatnonzero(features["areas"] > 1000)  # 忽略小面积区域
+        boxes = features["boxes"][keep]
+
+        return Detections.from_arrays(
+            "obstacle",
+            boxes[:, :2] + boxes[:, 2:] // 2,
+            features["areas"][keep],
+            boxes,
+            [contours[i] for i in keep])
@@ -0,0 +1,114 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from vision.frame_context import FrameContext
+
+class PerceptionResult:
+    """一帧并行感知的汇总结果"""
+
+    def __init__(self, frame_context, results, timings, errors):
+        self.frame_context = frame_context
+        self.results = results  # 检测器名称 → 检测结果
+        self.timings = timings  # 检测器名称 → 耗时 (秒)
+        self.errors = errors    # 检测器名称 → 异常
+
+    def __getitem__(self, name):
+        return self.results[name]
+
+    def get(self, name, default=None):
+        return self.results.get(name, default)
+
+    @property
+    def total_time(self):
+        """本帧感知的总墙钟时间 (秒)，流水线模式下为各阶段耗时之和"""
+        return self.timings.get("total", 0.0)
+
+class PerceptionPool:
+    """把一帧提交给所有已注册检测器并行处理
+
+    检测器共享同一个 FrameContext，HSV/灰度图/掩码只计算一次。
+    OpenCV 运算会释放 GIL，因此线程池即可实现多核并行。
+    检测器可带启用条件（如只在需要时运行整帧花朵检测），不满足时本帧跳过，结果为 None。
+    """
+
+    def __init__(self, config, max_workers=None):
+        self.config = config
+        self.detectors = {}
+        self.conditions = {}  # 检测器名称 → 无参启用条件
+        self.executor = ThreadPoolExecutor(max_workers=max_workers or config.PERCEPTION_WORKERS,
+                                           thread_name_prefix="perception")
+
+    def register(self, name, detector, when=None):
+        """注册检测器，detector 为接收 FrameContext 并返回检测结果的函数
+
+        when: 可选的无参函数，返回 False 时本帧跳过该检测器
+        """
+        self.detectors[name] = detector
+        if when is not None:
+            self.conditions[name] = when
+        return self
+
+    def unregister(self, name):
+        """注销检测器"""
+        self.detectors.pop(name, None)
+        self.conditions.pop(name, None)
+
+    def run(self, frame):
+        """并行运行所有检测器，返回 PerceptionResult"""
+        result = PerceptionResult(FrameContext.wrap(frame, self.config), {}, {}, {})
+        self._run_into(result, self.detectors)
+        return result
+
+    def stages(self, groups):
+        """把检测器按组拆成流水线阶段，返回 Pipeline 使用的 [(阶段名, 函数)]
+
+        groups: [(阶段名, 检测器名称列表)]。第一个阶段接收 FrameContext，之后的阶段接收上一阶段的
+        PerceptionResult；组内检测器并行运行，结果累积到同一个 PerceptionResult 中，
+        连续的帧可以同时处于不同阶段。
+        """
+        def make_stage(names):
+            def stage(item):
+                if not isinstance(item, PerceptionResult):
+                    item = PerceptionResult(FrameContext.wrap(item, self.config), {}, {}, {})
+                self._run_into(item, names)
+                return item
+            return stage
+        return [(name, make_stage(names)) for name, names in groups]
+
+    def _run_into(self, result, names):
+        """并行运行指定的检测器，结果、耗时和异常写入 result，total 累加本次墙钟时间"""
+        start_time = time.time()
+        futures = {}
+        for name in names:
+            when = self.conditions.get(name)
+            if when is not None and not when():
+                result.results[name] = None
+                continue
+            futures[name] = self.executor.submit(self._timed, self.detectors[name], result.frame_context)
+
+        for name, future in futures.items():
+            try:
+                result.results[name], result.timings[name] = future.result()
+            except Exception as e:
+                print(f"检测器 {name} 异常: {e}")
+                result.results[name] = None
+                result.errors[name] = e
+
+        result.timings["total"] = result.timings.get("total", 0.0) + time.time() - start_time
+
+    def shutdown(self):
+        """关闭线程池"""
+        self.executor.shutdown(wait=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.shutdown()
+
+    @staticmethod
+    def _timed(detector, ctx):
+        """执行检测器并返回 (结果, 耗时)"""
+        start_time = time.time()
+        result = detector(ctx)
+        return result, time.time() - start_time
@@ -0,0 +1,236 @@
+import json
+import os
+import time
+
+import numpy as np
+
+MANIFEST_FILE = "manifest.json"
+
+class FrameRecorder:
+    """把原始帧和采集时间戳分块写入磁盘，每块是一个可内存映射的 .npy 文件
+
+    目录结构：
+        manifest.json                 帧尺寸、分块列表、总帧数
+        chunk_00000.npy               (N, H, W, C) uint8 原始帧
+        chunk_00000_timestamps.npy    (N,) float64 采集时间戳
+    """
+
+    def __init__(self, path, chunk_frames=300):
+        self.path = path
+        self.chunk_frames = chunk_frames
+        self.frame_shape = None
+        self.chunks = []          # [{"frames": 文件名, "timestamps": 文件名, "count": 帧数}]
+        self.frame_count = 0
+        self._frames = None       # 当前块的内存映射
+        self._timestamps = None
+        self._chunk_count = 0
+        os.makedirs(path, exist_ok=True)
+
+    def write(self, frame, timestamp=None):
+        """追加一帧"""
+        if self.frame_shape is None:
+            self.frame_shape = frame.shape
+        elif frame.shape != self.frame_shape:
+            raise ValueError(f"帧尺寸不一致: {frame.shape} != {self.frame_shape}")
+
+        if self._frames is None:
+            self._open_chunk()
+
+        self._frames[self._chunk_count] = frame
+        self._timestamps[self._chunk_count] = timestamp if timestamp is not None else time.time()
+        self._chunk_count += 1
+        self.frame_count += 1
+
+        if self._chunk_count == self.chunk_frames:
+            self._close_chunk()
+
+    def close(self):
+        """写完当前块并保存清单"""
+        self._close_chunk()
+        self._write_manifest()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _open_chunk(self):
+        """预分配一个新的内存映射块"""
+        index = len(self.chunks)
+        frames_file = f"chunk_{index:05d}.npy"
+        timestamps_file = f"chunk_{index:05d}_timestamps.npy"
+        self._frames = np.lib.format.open_memmap(
+            os.path.join(self.path, frames_file), mode="w+", dtype=np.uint8,
+            shape=(self.chunk_frames,) + tuple(self.frame_shape))
+        self._timestamps = np.lib.format.open_memmap(
+            os.path.join(self.path, timestamps_file), mode="w+", dtype=np.float64,
+            shape=(self.chunk_frames,))
+        self.chunks.append({"frames": frames_file, "timestamps": timestamps_file, "count": 0})
+        self._chunk_count = 0
+
+    def _close_chunk(self):
+        """刷新当前块并更新清单"""
+        if self._frames is None:
+            return
+        self._frames.flush()
+        self._timestamps.flush()
+        self.chunks[-1]["count"] = self._chunk_count
+        self._frames = None
+        self._timestamps = None
+        self._write_manifest()
+
+    def _write_manifest(self):
+        manifest = {
+            "frame_shape": list(self.frame_shape) if self.frame_shape else None,
+            "chunk_frames": self.chunk_frames,
+            "frame_count": self.frame_count,
+            "chunks": self.chunks
+        }
+        with open(os.path.join(self.path, MANIFEST_FILE), "w") as f:
+            json.dump(manifest, f, indent=2)
+
+class Recording:
+    """以内存映射方式只读打开一段录像"""
+
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, MANIFEST_FILE)) as f:
+            manifest = json.load(f)
+
+        self.frame_shape = tuple(manifest["frame_shape"] or ())
+        self._chunks = []
+        timestamps = []
+        for chunk in manifest["chunks"]:
+            if chunk["count"] == 0:
+                continue
+            frames = np.load(os.path.join(path, chunk["frames"]), mmap_mode="r")[:chunk["count"]]
+            self._chunks.append(frames)
+            timestamps.append(np.load(os.path.join(path, chunk["timestamps"]))[:chunk["count"]])
+
+        self.timestamps = np.concatenate(timestamps) if timestamps else np.empty(0)
+        self._starts = np.cumsum([0] + [len(frames) for frames in self._chunks])
+
+    def __len__(self):
+        return len(self.timestamps)
+
+    def __getitem__(self, index):
+        """返回第index帧（只读内存映射视图）"""
+        chunk = int(np.searchsorted(self._starts, index, side="right")) - 1
+        return self._chunks[chunk][index - self._starts[chunk]]
+
+class ReplayCamera:
+    """回放录像的摄像头，接口与 vision.camera.Camera 相同
+
+    mode:
+        "realtime"  按录制时的时间间隔播放，处理跟不上时跳帧（与实时摄像头一致）
+        "fast"      不等待，每次 read() 返回下一帧，尽可能快地回放
+        "step"      逐帧：read() 返回当前帧，调用 step() 才前进
+    """
+
+    MODES = ("realtime", "fast", "step")
+
+    def __init__(self, path, mode="realtime", loop=False):
+        if mode not in self.MODES:
+            raise ValueError(f"未知回放模式: {mode}")
+        self.path = path
+        self.mode = mode
+        self.loop = loop
+        self.threaded = False
+        self.recording = None
+        self.width = 0
+        self.height = 0
+
+        self.position = 0           # 下一次 read() 返回的帧序号
+        self.last_timestamp = None  # 最近返回帧的录制时间戳
+        self.delivered_frames = 0
+        self.dropped_frames = 0
+        self._start_time = None     # 实时模式下回放开始的墙钟时间
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.release()
+
+    def open(self):
+        """打开录像"""
+        if self.recording is not None:
+            return
+        self.recording = Recording(self.path)
+        if len(self.recording) == 0:
+            raise ValueError(f"录像为空: {self.path}")
+        self.height, self.width = self.recording.frame_shape[:2]
+        print(f"回放录像: {self.path} ({len(self.recording)} 帧, 模式: {self.mode})")
+
+    def read(self):
+        """读取一帧图像，录像结束时返回 None"""
+        if self.recording is None:
+            return None
+
+        if self.position >= len(self.recording):
+            if not self.loop:
+                return None
+            self.position = 0
+            self._start_time = None
+
+        index = self.position
+        if self.mode == "realtime":
+            index = self._realtime_index()
+            self.dropped_frames += index - self.position
+            self.position = index + 1
+        elif self.mode == "fast":
+            self.position += 1
+
+        self.last_timestamp = float(self.recording.timestamps[index])
+        self.delivered_frames += 1
+        # 返回可写副本，避免下游原地修改只读映射
+        return np.array(self.recording[index])
+
+    def clock(self):
+        """回放时钟：最近返回帧的录制时间戳（尚未读帧时为第一帧的时间戳）
+
+        回放时代替墙钟驱动电机定时动作和巡线延迟统计，使结果只取决于录像内容。
+        """
+        if self.last_timestamp is not None:
+            return self.last_timestamp
+        return float(self.recording.timestamps[0]) if self.recording is not None else 0.0
+
+    def step(self, frames=1):
+        """逐帧模式下前进指定帧数"""
+        self.position = min(self.position + frames, len(self.recording))
+
+    def seek(self, index):
+        """跳到指定帧"""
+        self.position = max(0, min(index, len(self.recording)))
+        self._start_time = None
+
+    def get_stats(self):
+        """返回回放统计信息"""
+        return {
+            "captured": len(self.recording) if self.recording else 0,
+            "delivered": self.delivered_frames,
+            "dropped": self.dropped_frames,
+            "position": self.position,
+            "last_timestamp": self.last_timestamp
+        }
+
+    def release(self):
+        """关闭录像"""
+        self.recording = None
+
+    def _realtime_index(self):
+        """等待下一帧到期；若已落后，返回已到期的最新一帧"""
+        timestamps = self.recording.timestamps
+        if self._start_time is None:
+            self._start_time = time.time() - (timestamps[self.position] - timestamps[0])
+
+        elapsed = timestamps[0] + (time.time() - self._start_time)
+        wait = timestamps[self.position] - elapsed
+        if wait > 0:
+            time.sleep(wait)
+            return self.position
+
+        index = int(np.searchsorted(timestamps, elapsed, side="right")) - 1
+        return min(max(index, self.position), len(timestamps) - 1)
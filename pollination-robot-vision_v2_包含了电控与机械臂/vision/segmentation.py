@@ -0,0 +1,152 @@
+import copy
+import json
+import os
+import weakref
+
+import cv2
+import numpy as np
+
+def in_range(hsv, lower, upper):
+    """HSV 阈值分割，支持色相环绕的区间（lower H > upper H，如红色 170~10）
+
+    cv2.inRange 对这种区间直接返回全零掩码，这里拆成 [lower H, 179] 和 [0, upper H] 两段再合并。
+    """
+    if lower[0] <= upper[0]:
+        return cv2.inRange(hsv, tuple(lower), tuple(upper))
+    high = cv2.inRange(hsv, (lower[0], lower[1], lower[2]), (179, upper[1], upper[2]))
+    low = cv2.inRange(hsv, (0, lower[1], lower[2]), (upper[0], upper[1], upper[2]))
+    return cv2.bitwise_or(high, low)
+
+class ColorSegmenter:
+    """单遍多颜色分割：用查找表一次性把每个像素标记为黄/白/黑/无"""
+
+    # 颜色类别及其在标签图中的位（允许多个类别同时命中）
+    CLASS_BITS = {
+        "yellow": 1,
+        "white": 2,
+        "black": 4
+    }
+
+    # label() 输入图像的颜色空间
+    color_space = "hsv"
+
+    # 按配置对象缓存分割器，避免每帧重建查找表
+    _instances = weakref.WeakKeyDictionary()
+
+    def __init__(self, config, ranges=None):
+        """ranges: {颜色: (lower, upper)}，默认取自配置中的 *_LOWER / *_UPPER"""
+        self.config = config
+        if ranges is None:
+            ranges = {
+                color: (getattr(config, f"{color.upper()}_LOWER"), getattr(config, f"{color.upper()}_UPPER"))
+                for color in self.CLASS_BITS
+            }
+        self.ranges = ranges
+        self.lut = self._build_lut(ranges)
+
+    @classmethod
+    def for_config(cls, config):
+        """返回该配置对应的共享分割器"""
+        segmenter = cls._instances.get(config)
+        if segmenter is None:
+            segmenter = cls(config)
+            cls._instances[config] = segmenter
+        return segmenter
+
+    def _build_lut(self, ranges):
+        """构建HSV→类别位的查找表
+
+        阈值都是HSV空间中的轴对齐长方体，三维查找表 lut3d[h, s, v] 可以精确分解为
+        三个通道各自的位表按位与，因此只需一张 256x3 的表，用 cv2.LUT 一遍完成查表。
+        """
+        lut = np.zeros((256, 3), np.uint8)
+        channel_limits = (180, 256, 256)
+
+        for color, (lower, upper) in ranges.items():
+            bit = self.CLASS_BITS[color]
+            for channel in range(3):
+                lo, hi = int(lower[channel]), int(upper[channel])
+                values = np.arange(channel_limits[channel])
+                if lo <= hi:
+                    hit = (values >= lo) & (values <= hi)
+                else:
+                    # 色相环绕（如红色 170~10）
+                    hit = (values >= lo) | (values <= hi)
+                lut[:channel_limits[channel], channel][hit] |= bit
+
+        return lut.reshape(1, 256, 3)
+
+    def label(self, hsv):
+        """对HSV图像单遍查表，返回每个像素的类别位图"""
+        bits = cv2.LUT(hsv, self.lut)
+        h_bits, s_bits, v_bits = cv2.split(bits)
+        return cv2.bitwise_and(cv2.bitwise_and(h_bits, s_bits), v_bits)
+
+    def plane(self, labels, color):
+        """从类别位图中取出指定颜色的二值掩码（0/255）"""
+        bit = self.CLASS_BITS[color]
+        _, mask = cv2.threshold(cv2.bitwise_and(labels, bit), 0, 255, cv2.THRESH_BINARY)
+        return mask
+
+class LutSegmenter(ColorSegmenter):
+    """按光照类别查表的分割器：BGR像素直接查 ThresholdTuner 导出的三维查找表
+
+    查找表文件为 (类别数, N, N, N) 的 uint8 数组 (.npy)，以只读内存映射方式加载，
+    同名 .json 记录类别名称、每通道量化位数和类别位。每个像素只需一次查表，
+    省去 cvtColor 和逐颜色 inRange，且阈值不必再手工抄进配置。
+    """
+
+    color_space = "bgr"
+
+    _instances = weakref.WeakKeyDictionary()
+
+    def __init__(self, config, path=None, category=None):
+        self.config = config
+        path = path or config.COLOR_LUT_FILE
+        with open(os.path.splitext(path)[0] + ".json") as f:
+            metadata = json.load(f)
+        if metadata["classes"] != self.CLASS_BITS:
+            raise ValueError(f"查找表类别位 {metadata['classes']} 与分割器不一致")
+
+        self.path = path
+        self.categories = metadata["categories"]
+        self.bits = metadata["bits"]
+        self.ranges = metadata.get("thresholds", {})
+        self.luts = np.load(path, mmap_mode="r")
+        self._variants = {}
+        category = category or config.COLOR_LUT_CATEGORY
+        if category not in self.categories:
+            # 配置的默认类别不在表中时回退到第一个类别，避免之后每一帧创建上下文都失败
+            print(f"警告：查找表 {path} 中没有光照类别 {category}，改用 {self.categories[0]}（可用: {self.categories}）")
+            category = self.categories[0]
+        self.set_category(category)
+
+    def set_category(self, category):
+        """切换当前使用的光照类别"""
+        if category not in self.categories:
+            raise ValueError(f"查找表中没有光照类别 {category}，可用: {self.categories}")
+        self.category = category
+        self.lut = self.luts[self.categories.index(category)].reshape(-1)
+
+    def with_category(self, category):
+        """返回使用指定光照类别的分割器（共享同一内存映射，不影响本实例）"""
+        if category == self.category:
+            return self
+        variant = self._variants.get(category)
+        if variant is None:
+            variant = copy.copy(self)
+            variant._variants = {}
+            variant.set_category(category)
+            self._variants[category] = variant
+        return variant
+
+    def label(self, frame):
+        """对BGR图像逐像素查表，返回每个像素的类别位图"""
+        lut = self.lut
+        bits = self.bits
+        quantized = frame >> (8 - bits)
+        index = quantized[..., 0].astype(np.uint32)
+        index <<= 2 * bits
+        index |= quantized[..., 1].astype(np.uint32) << bits
+        index |= quantized[..., 2]
+        return np.take(lut, index)
@@ -1,8 +1,14 @@
+import numpy as np
+
+from vision.calibration import CameraCalibration
+from vision.detections import Detections
+
 class TargetLocator:
     """定位最佳目标花朵"""
     
     def __init__(self, config):
         self.config = config
+        self.calibration = CameraCalibration.for_config(config)
         
     def locate(self, frame, flowers):
         """从多个花朵中选择最佳目标"""
@@ -13,21 +19,43 @@ class TargetLocator:
         # 这里使用花朵大小和位置作为优先级因素
         frame_center = (self.config.CAMERA_WIDTH // 2, self.config.CAMERA_HEIGHT // 2)
         
-        best_flower = None
-        highest_score = -1
+        # 向量化打分：花朵中心与图像中心的横向距离，面积作为权重
+        flowers = Detections.from_records(flowers)
+        scores = self._scores(flowers.positions, flowers.areas, frame_center)
         
-        for flower in flowers:
-            # 花朵中心与图像中心的距离
-            distance = abs(flower["position"][0] - frame_center[0])
-            
-            # 花朵面积作为权重
-            area = flower["area"]
-            
-            # 计算分数 (面积越大、越居中的花朵分数越高)
-            score = area - (distance * 2)  # 距离的权重较低
-            
-            if score > highest_score:
-                highest_score = score
-                best_flower = flower
+        best = int(np.argmax(scores))
+        if scores[best] <= -1:
+            return None
+        return flowers[best]
+        
+    def locate_track(self, tracks, current_id=None):
+        """从跟踪目标中选择最佳目标；当前锁定的目标仍在跟踪时直接保留，不重新打分"""
+        if not tracks:
+            return None
+        for track in tracks:
+            if track.id == current_id:
+                return track
                 
-        return best_flower    
\ No newline at end of file
+        frame_center = (self.config.CAMERA_WIDTH // 2, self.config.CAMERA_HEIGHT // 2)
+        positions = np.array([track.position for track in tracks])
+        areas = np.array([track["area"] for track in tracks])
+        scores = self._scores(positions, areas, frame_center)
+        
+        best = int(np.argmax(scores))
+        if scores[best] <= -1:
+            return None
+        return tracks[best]
+        
+    @staticmethod
+    def _scores(positions, areas, frame_center):
+        """计算分数 (面积越大、越居中的花朵分数越高)"""
+        distances = np.abs(positions[:, 0] - frame_center[0])
+        return areas - (distances * 2)  # 距离的权重较低
+        
+    def arm_position(self, flower):
+        """目标花朵在机械臂坐标系中的位置 (x, y)；未标定时返回像素坐标"""
+        x, y = flower["position"]
+        if self.calibration is None or self.calibration.homography is None:
+            return x, y
+        point = self.calibration.pixel_to_arm((x, y), undistorted=self.config.UNDISTORT_FRAMES)[0]
+        return float(point[0]), float(point[1])
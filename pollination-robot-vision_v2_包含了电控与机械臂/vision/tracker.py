@@ -0,0 +1,212 @@
+import threading
+
+import numpy as np
+
+from vision.frame_context import FrameContext
+
+try:
+    from scipy.optimize import linear_sum_assignment
+except ImportError:  # scipy 为可选依赖，缺失时只能使用贪心匹配
+    linear_sum_assignment = None
+
+INITIAL_VELOCITY_STD = 100.0  # 新目标速度的初始不确定度 (像素/秒)
+
+class Track:
+    """单个跟踪目标：常速度卡尔曼滤波，状态为 (x, y, vx, vy)
+
+    支持与检测结果相同的字典式访问："position" 返回滤波后的位置，
+    其余字段取自最近一次匹配到的检测，因此可以直接作为目标花朵传给下游模块。
+    """
+
+    __slots__ = ("id", "type", "state", "covariance", "detection", "timestamp",
+                 "first_seen", "age", "hits", "misses", "confirmed")
+
+    def __init__(self, track_id, detection, timestamp, measurement_noise):
+        self.id = track_id
+        self.type = detection["type"]
+        x, y = detection["position"]
+        self.state = np.array([x, y, 0.0, 0.0])
+        self.covariance = np.diag([measurement_noise ** 2] * 2 + [INITIAL_VELOCITY_STD ** 2] * 2)
+        self.detection = detection  # 最近一次匹配到的检测
+        self.timestamp = timestamp
+        self.first_seen = timestamp
+        self.age = 1     # 存在的帧数
+        self.hits = 1    # 连续匹配的帧数
+        self.misses = 0  # 连续未匹配的帧数
+        self.confirmed = False  # 是否已连续匹配足够帧数
+
+    @property
+    def position(self):
+        """滤波后的中心位置 (x, y)"""
+        return float(self.state[0]), float(self.state[1])
+
+    @property
+    def velocity(self):
+        """估计速度 (像素/秒)"""
+        return float(self.state[2]), float(self.state[3])
+
+    @property
+    def matched(self):
+        """本帧是否匹配到了检测（否则位置为预测值）"""
+        return self.misses == 0
+
+    def predict(self, timestamp, process_noise):
+        """按匀速模型预测到指定时刻"""
+        dt = timestamp - self.timestamp
+        if dt <= 0:
+            return
+        F = np.eye(4)
+        F[0, 2] = F[1, 3] = dt
+        # 白噪声加速度模型的过程噪声
+        q = process_noise
+        Q = np.zeros((4, 4))
+        Q[0, 0] = Q[1, 1] = q * dt ** 3 / 3
+        Q[0, 2] = Q[2, 0] = Q[1, 3] = Q[3, 1] = q * dt ** 2 / 2
+        Q[2, 2] = Q[3, 3] = q * dt
+        self.state = F @ self.state
+        self.covariance = F @ self.covariance @ F.T + Q
+        self.timestamp = timestamp
+
+    def update(self, detection, measurement_noise):
+        """用匹配到的检测中心校正状态"""
+        z = np.asarray(detection["position"], np.float64)
+        P = self.covariance
+        S = P[:2, :2] + np.eye(2) * measurement_noise ** 2
+        K = P[:, :2] @ np.linalg.inv(S)
+        self.state = self.state + K @ (z - self.state[:2])
+        self.covariance = P - K @ P[:2, :]
+        self.detection = detection
+        self.hits += 1
+        self.misses = 0
+
+    def __getitem__(self, key):
+        if key == "position":
+            return int(round(self.state[0])), int(round(self.state[1]))
+        return self.detection[key]
+
+    def get(self, key, default=None):
+        return self[key] if key == "position" or key in self.detection else default
+
+    def __repr__(self):
+        return (f"Track(id={self.id}, type={self.type}, position={self['position']}, "
+                f"velocity=({self.state[2]:.1f}, {self.state[3]:.1f}), age={self.age}, misses={self.misses})")
+
+class FlowerTracker:
+    """多目标花朵跟踪：为每朵花分配跨帧稳定的 ID、年龄和速度
+
+    每帧先把所有目标用卡尔曼滤波预测到当前时刻，再与同类型的检测按中心距离关联
+    （贪心或匈牙利匹配，超过 TRACKER_MAX_DISTANCE 的不关联）。未匹配的检测建立新目标，
+    连续匹配 TRACKER_MIN_HITS 帧后确认；连续丢失超过 TRACKER_MAX_MISSES 帧后删除，
+    期间目标按预测位置继续存在，短暂漏检不会换 ID。
+    """
+
+    def __init__(self, config, detector=None):
+        self.config = config
+        self.detector = detector  # FlowerDetector，供 track() 取本帧检测结果
+        self.tracks = []
+        self.timestamp = None     # 最近一次更新的帧时间戳
+        self._next_id = 1
+        self._lock = threading.RLock()  # 界面线程读取目标时与更新互斥
+
+        self.association = config.TRACKER_ASSOCIATION
+        if self.association == "hungarian" and linear_sum_assignment is None:
+            print("未安装 scipy，匈牙利匹配回退为贪心匹配")
+            self.association = "greedy"
+
+    def track(self, frame):
+        """检测本帧花朵并更新跟踪，返回已确认的目标（结果缓存在帧上下文中）"""
+        ctx = FrameContext.wrap(frame, self.config)
+        return ctx.cached(("flower_tracks", id(self)),
+                          lambda: self.update(self.detector.detect(ctx), ctx.timestamp))
+
+    def update(self, flowers, timestamp):
+        """用一帧的检测结果更新跟踪，返回已确认的目标列表"""
+        with self._lock:
+            if self.timestamp is not None and timestamp <= self.timestamp:
+                # 重复或乱序的帧不更新
+                return self.confirmed()
+            self.timestamp = timestamp
+
+            for track in self.tracks:
+                track.predict(timestamp, self.config.TRACKER_PROCESS_NOISE)
+                track.age += 1
+
+            detections = list(flowers)
+            matches = self._associate(detections)
+            matched_tracks = set()
+            matched_detections = set()
+            noise = self.config.TRACKER_MEASUREMENT_NOISE
+            for t, d in matches:
+                track = self.tracks[t]
+                track.update(detections[d], noise)
+                track.confirmed = track.confirmed or track.hits >= self.config.TRACKER_MIN_HITS
+                matched_tracks.add(t)
+                matched_detections.add(d)
+
+            for t, track in enumerate(self.tracks):
+                if t not in matched_tracks:
+                    track.misses += 1
+                    track.hits = 0
+            self.tracks = [track for track in self.tracks
+                           if track.misses <= self.config.TRACKER_MAX_MISSES]
+
+            for d, detection in enumerate(detections):
+                if d not in matched_detections:
+                    track = Track(self._next_id, detection, timestamp, noise)
+                    track.confirmed = self.config.TRACKER_MIN_HITS <= 1
+                    self.tracks.append(track)
+                    self._next_id += 1
+
+            return self.confirmed()
+
+    def confirmed(self, flower_type=None):
+        """已确认的目标（可按类型筛选）"""
+        with self._lock:
+            return [track for track in self.tracks
+                    if track.confirmed and (flower_type is None or track.type == flower_type)]
+
+    def get(self, track_id):
+        """按 ID 查找目标（已删除时返回 None）"""
+        with self._lock:
+            for track in self.tracks:
+                if track.id == track_id:
+                    return track
+            return None
+
+    def reset(self):
+        """清除所有目标"""
+        with self._lock:
+            self.tracks = []
+            self.timestamp = None
+
+    def _associate(self, detections):
+        """目标与检测的关联，返回 [(目标序号, 检测序号)]"""
+        if not self.tracks or not detections:
+            return []
+
+        predicted = np.array([track.state[:2] for track in self.tracks])
+        positions = np.array([detection["position"] for detection in detections], np.float64)
+        cost = np.linalg.norm(predicted[:, None, :] - positions[None, :, :], axis=2)
+
+        # 类型不同或距离超过门限的组合不允许关联
+        track_types = np.array([track.type for track in self.tracks])
+        detection_types = np.array([detection["type"] for detection in detections])
+        allowed = (track_types[:, None] == detection_types[None, :]) & \
+                  (cost <= self.config.TRACKER_MAX_DISTANCE)
+
+        if self.association == "hungarian":
+            rows, cols = linear_sum_assignment(np.where(allowed, cost, 1e9))
+            return [(t, d) for t, d in zip(rows, cols) if allowed[t, d]]
+
+        # 贪心：按距离从小到大依次配对
+        matches = []
+        used_tracks, used_detections = set(), set()
+        for t, d in zip(*np.unravel_index(np.argsort(cost, axis=None), cost.shape)):
+            if cost[t, d] > self.config.TRACKER_MAX_DISTANCE:
+                break  # 之后的组合都超过门限
+            if not allowed[t, d] or t in used_tracks or d in used_detections:
+                continue
+            matches.append((int(t), int(d)))
+            used_tracks.add(t)
+            used_detections.add(d)
+        return matches
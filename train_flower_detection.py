@@ -1,46 +1,283 @@
 # auto_tune_thresholds.py (无tqdm和sklearn)
 import cv2
+import json
 import numpy as np
 import os
 import argparse
 from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+
+class RunningStats:
+    """HSV像素的流式统计（Welford 均值/方差），内存占用与像素数量无关
+
+    两份统计可用 merge 合并（Chan 并行公式），供多进程分别统计后汇总。
+    """
+
+    def __init__(self, channels=3):
+        self.count = 0
+        self.mean = np.zeros(channels)
+        self.m2 = np.zeros(channels)  # 与均值差的平方和
+
+    def add(self, hsv, mask):
+        """加入HSV图像中掩码区域的像素"""
+        self.update(hsv[mask > 0])
+
+    def update(self, pixels):
+        """加入一批像素 (N, channels)"""
+        if len(pixels) == 0:
+            return
+        pixels = np.asarray(pixels, dtype=np.float64)
+        batch_mean = pixels.mean(axis=0)
+        batch_m2 = ((pixels - batch_mean) ** 2).sum(axis=0)
+        self._combine(len(pixels), batch_mean, batch_m2)
+
+    def merge(self, other):
+        """合并另一份统计"""
+        if other.count:
+            self._combine(other.count, other.mean, other.m2)
+        return self
+
+    @property
+    def std(self):
+        """总体标准差（与 np.std 一致）"""
+        return np.sqrt(self.m2 / self.count) if self.count else np.zeros_like(self.mean)
+
+    def _combine(self, count, mean, m2):
+        total = self.count + count
+        delta = mean - self.mean
+        self.mean = self.mean + delta * (count / total)
+        self.m2 = self.m2 + m2 + delta ** 2 * (self.count * count / total)
+        self.count = total
+
+    def state(self):
+        """可保存的数组形式"""
+        return {"count": np.array([self.count]), "mean": self.mean, "m2": self.m2}
+
+    @classmethod
+    def from_state(cls, state):
+        stats = cls(len(state["mean"]))
+        stats.count = int(state["count"][0])
+        stats.mean = state["mean"]
+        stats.m2 = state["m2"]
+        return stats
+
+class HSVHistogram:
+    """固定大小的三维HSV直方图，合并即相加，可增量累积任意多张图片
+
+    H 保留全部180级，S/V 各分为64级（每级宽4），单个直方图约6MB。
+    阈值由各通道边缘分布的百分位得到，计算量只与分箱数有关。
+    """
+
+    BINS = (180, 64, 64)
+    RANGES = (180, 256, 256)
+
+    def __init__(self, bins=BINS):
+        self.bins = tuple(bins)
+        self.counts = np.zeros(self.bins, np.int64)
+
+    def add(self, hsv, mask):
+        """加入HSV图像中掩码区域的像素"""
+        hist = cv2.calcHist([hsv], [0, 1, 2], mask, list(self.bins),
+                            [0, self.RANGES[0], 0, self.RANGES[1], 0, self.RANGES[2]])
+        self.counts += hist.astype(np.int64)
+
+    def merge(self, other):
+        """合并另一份直方图"""
+        self.counts += other.counts
+        return self
+
+    @property
+    def count(self):
+        return int(self.counts.sum())
+
+    def marginal(self, channel):
+        """单通道边缘直方图"""
+        axes = tuple(axis for axis in range(3) if axis != channel)
+        return self.counts.sum(axis=axes)
+
+    def percentile_bounds(self, channel, lower, upper, circular=False):
+        """返回通道在[lower, upper]百分位之间的取值范围 (下限, 上限)，均含端点
+
+        circular=True 时按环形处理（色相）：以圆周均值的对侧为起点展开，
+        范围跨越0时下限大于上限。这种区间不能直接交给 cv2.inRange（会得到全零掩码），
+        需用 vision.segmentation.in_range / ColorSegmenter / 查找表处理，它们都按环绕解释。
+        """
+        hist = self.marginal(channel)
+        bins = len(hist)
+        shift = 0
+        if circular:
+            angles = 2 * np.pi * (np.arange(bins) + 0.5) / bins
+            mean_angle = np.arctan2((hist * np.sin(angles)).sum(), (hist * np.cos(angles)).sum())
+            mean_bin = int(mean_angle % (2 * np.pi) / (2 * np.pi) * bins)
+            shift = (mean_bin + bins // 2) % bins
+            hist = np.roll(hist, -shift)
+
+        cdf = np.cumsum(hist)
+        total = cdf[-1]
+        lo_bin = int(np.searchsorted(cdf, total * lower / 100, side="right"))
+        hi_bin = int(np.searchsorted(cdf, total * upper / 100, side="left"))
+        lo_bin, hi_bin = min(lo_bin, bins - 1), min(max(hi_bin, lo_bin), bins - 1)
+        lo_bin, hi_bin = (lo_bin + shift) % bins, (hi_bin + shift) % bins
+
+        width = self.RANGES[channel] // bins
+        return lo_bin * width, (hi_bin + 1) * width - 1
+
+    def state(self):
+        return {"counts": self.counts}
+
+    @classmethod
+    def from_state(cls, state):
+        histogram = cls(state["counts"].shape)
+        histogram.counts = state["counts"].astype(np.int64)
+        return histogram
+
+def list_images(image_folder):
+    """列出文件夹中的图片路径"""
+    return [os.path.join(image_folder, filename) for filename in sorted(os.listdir(image_folder))
+            if filename.lower().endswith(('.png', '.jpg', '.jpeg'))]
+
+def _accumulate_worker(task):
+    """工作进程：逐张统计一批图片，只返回各类别的部分统计（流式统计或直方图）"""
+    image_paths, categories, mode = task
+    cv2.setNumThreads(1)
+    tuner = ThresholdTuner(mode)
+    accumulators = defaultdict(dict)
+    for image_path in image_paths:
+        analyzed = tuner._analyze_image(image_path, categories)
+        if analyzed is None:
+            continue
+        category, hsv, masks = analyzed
+        for color_name, mask in masks.items():
+            accumulators[category].setdefault(color_name, tuner._new_accumulator()).add(hsv, mask)
+    return dict(accumulators)
+
+# 查找表中的颜色类别位，与运行时 vision.segmentation.ColorSegmenter.CLASS_BITS 一致
+LUT_CLASS_BITS = {"yellow": 1, "white": 2, "black": 4}
+
+# 障碍物（黑色）不参与调优，导出查找表时使用该默认范围
+DEFAULT_BLACK_RANGE = ((0, 0, 0), (180, 255, 30))
 
 class ThresholdTuner:
-    def __init__(self):
+    """按光照类别统计花朵像素并计算HSV阈值
+
+    mode:
+        "stream"     每个类别/颜色只保留流式统计（均值 ± k·标准差），多进程并行，内存恒定（默认）
+        "histogram"  每个类别/颜色累积HSV直方图，阈值取百分位，色相按环形处理；
+                     可保存状态，之后只需处理新增图片
+        "stack"      保留全部像素后一次性计算，内存随图片数量增长
+    """
+
+    MODES = ("stream", "histogram", "stack")
+    ACCUMULATORS = {"stream": RunningStats, "histogram": HSVHistogram}
+
+    def __init__(self, mode="stream", workers=None, percentiles=(1, 99)):
+        if mode not in self.MODES:
+            raise ValueError(f"未知模式: {mode}")
+        self.mode = mode
+        self.workers = workers
+        self.percentiles = percentiles  # 直方图模式的下限/上限百分位
         self.results = defaultdict(dict)  # 按类别存储最优阈值
+        self.accumulators = defaultdict(dict)  # 流式/直方图模式：类别 → 颜色 → 累积统计
         
     def process_image_folder(self, image_folder, categories=None):
         """处理图片文件夹，按类别提取阈值"""
         if not categories:
             # 默认按光照强度分类
             categories = ["bright", "medium", "dark"]
+
+        image_paths = list_images(image_folder)
+        if self.mode != "stack":
+            self._process_accumulated(image_paths, categories)
+            return self.results
             
         # 扫描所有图片
-        for filename in os.listdir(image_folder):
-            if not filename.lower().endswith(('.png', '.jpg', '.jpeg')):
+        for image_path in image_paths:
+            # 自动分类（基于亮度）并提取花朵像素
+            analyzed = self._analyze_image(image_path, categories)
+            if analyzed is None:
                 continue
-                
-            image_path = os.path.join(image_folder, filename)
-            image = cv2.imread(image_path)
-            
-            if image is None:
-                print(f"警告: 无法读取图片 {image_path}")
-                continue
-                
-            # 自动分类（基于亮度）
-            category = self._classify_image(image, categories)
-            
-            # 提取花朵像素
-            yellow_pixels = self._extract_flower_pixels(image, flower_type="female")
-            white_pixels = self._extract_flower_pixels(image, flower_type="male")
+            category, hsv, masks = analyzed
             
             # 更新该类别的颜色统计
-            self._update_category_stats(category, yellow_pixels, white_pixels)
+            self._update_category_stats(category, hsv[masks["yellow"] > 0], hsv[masks["white"] > 0])
         
         # 为每个类别计算最终阈值
         self._calculate_final_thresholds()
         
         return self.results
+
+    def _process_accumulated(self, image_paths, categories):
+        """分批交给进程池统计，把各进程的部分统计合并进已有统计后计算阈值
+
+        已有统计（例如由 load_state 载入）会保留，新图片只是在其上累加。
+        """
+        if image_paths:
+            workers = self.workers or os.cpu_count() or 1
+            batch_size = max(1, len(image_paths) // (workers * 4))
+            tasks = [(image_paths[i:i + batch_size], categories, self.mode)
+                     for i in range(0, len(image_paths), batch_size)]
+
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                for partial in executor.map(_accumulate_worker, tasks):
+                    for category, colors in partial.items():
+                        for color_name, accumulator in colors.items():
+                            existing = self.accumulators[category].get(color_name)
+                            self.accumulators[category][color_name] = \
+                                accumulator if existing is None else existing.merge(accumulator)
+
+        self._calculate_accumulated_thresholds()
+
+    def _calculate_accumulated_thresholds(self):
+        """由累积统计计算每个类别的阈值"""
+        for category, colors in self.accumulators.items():
+            for color_name, accumulator in colors.items():
+                if not accumulator.count:
+                    continue
+                if self.mode == "histogram":
+                    thresholds = self._thresholds_from_histogram(color_name, accumulator)
+                else:
+                    thresholds = self._thresholds_from_stats(color_name, accumulator.mean, accumulator.std)
+                self.results[category][color_name] = thresholds
+
+    def _new_accumulator(self):
+        return self.ACCUMULATORS[self.mode]()
+
+    def save_state(self, path):
+        """保存累积统计（.npz），之后可用 load_state 载入并继续累加新图片"""
+        arrays = {"mode": np.array(self.mode)}
+        for category, colors in self.accumulators.items():
+            for color_name, accumulator in colors.items():
+                for field, value in accumulator.state().items():
+                    arrays[f"{category}/{color_name}/{field}"] = value
+        np.savez_compressed(path, **arrays)
+
+    def load_state(self, path):
+        """载入 save_state 保存的累积统计"""
+        with np.load(path) as data:
+            if str(data["mode"]) != self.mode:
+                raise ValueError(f"状态文件模式为 {data['mode']}，与当前模式 {self.mode} 不一致")
+            states = defaultdict(dict)
+            for key in data.files:
+                if key == "mode":
+                    continue
+                category, color_name, field = key.split("/")
+                states[(category, color_name)][field] = data[key]
+
+        accumulator_class = self.ACCUMULATORS[self.mode]
+        for (category, color_name), state in states.items():
+            self.accumulators[category][color_name] = accumulator_class.from_state(state)
+        self._calculate_accumulated_thresholds()
+
+    def _analyze_image(self, image_path, categories):
+        """读取一张图片，返回 (类别, HSV图像, {颜色: 掩码})，无法读取时返回 None"""
+        image = cv2.imread(image_path)
+        if image is None:
+            print(f"警告: 无法读取图片 {image_path}")
+            return None
+        category = self._classify_image(image, categories)
+        hsv = cv2.cvtColor(image, cv2.COLOR_BGR2HSV)
+        return category, hsv, {"yellow": self._flower_mask(hsv, flower_type="female"),
+                               "white": self._flower_mask(hsv, flower_type="male")}
     
     def _classify_image(self, image, categories):
         """基于亮度对图片进行分类"""
@@ -54,10 +291,8 @@ class ThresholdTuner:
         else:
             return categories[1]  # "medium"
     
-    def _extract_flower_pixels(self, image, flower_type="female"):
-        """提取花朵像素（基于初始估计的阈值）"""
-        hsv = cv2.cvtColor(image, cv2.COLOR_BGR2HSV)
-        
+    def _flower_mask(self, hsv, flower_type="female"):
+        """花朵区域掩码（基于初始估计的阈值）"""
         # 初始阈值（可根据需要调整）
         if flower_type == "female":  # 黄色花
             lower = np.array([15, 80, 80])
@@ -73,10 +308,7 @@ class ThresholdTuner:
         kernel = np.ones((5, 5), np.uint8)
         mask = cv2.morphologyEx(mask, cv2.MORPH_OPEN, kernel, iterations=1)
         mask = cv2.morphologyEx(mask, cv2.MORPH_CLOSE, kernel, iterations=2)
-        
-        # 提取掩码区域的像素
-        pixels = hsv[mask > 0]
-        return pixels
+        return mask
     
     def _update_category_stats(self, category, yellow_pixels, white_pixels):
         """更新每个类别的颜色统计"""
@@ -103,33 +335,62 @@ class ThresholdTuner:
                 pixels = np.vstack(pixel_list)
                 
                 # 计算HSV各通道的均值和标准差
-                h_mean, s_mean, v_mean = np.mean(pixels, axis=0)
-                h_std, s_std, v_std = np.std(pixels, axis=0)
-                
-                # 基于均值和标准差确定阈值范围
-                # 调整系数可控制阈值的宽窄（1.5-2.0通常效果较好）
-                h_min = max(0, int(h_mean - h_std * 1.8))
-                h_max = min(180, int(h_mean + h_std * 1.8))
-                s_min = max(0, int(s_mean - s_std * 1.5))
-                s_max = min(255, int(s_mean + s_std * 1.5))
-                v_min = max(0, int(v_mean - s_std * 1.5))
-                v_max = min(255, int(v_mean + s_std * 1.5))
-                
-                # 特殊处理白色花朵（低饱和度）
-                if color_name == "white":
-                    s_max = min(50, s_max)  # 限制白色的最大饱和度
-                
-                # 保存阈值
-                self.results[category][color_name] = {
-                    "lower": (h_min, s_min, v_min),
-                    "upper": (h_max, s_max, v_max)
-                }
+                self.results[category][color_name] = self._thresholds_from_stats(
+                    color_name, np.mean(pixels, axis=0), np.std(pixels, axis=0))
+
+    def _thresholds_from_stats(self, color_name, mean, std):
+        """由各通道均值和标准差计算阈值范围"""
+        h_mean, s_mean, v_mean = mean
+        h_std, s_std, v_std = std
+
+        # 基于均值和标准差确定阈值范围
+        # 调整系数可控制阈值的宽窄（1.5-2.0通常效果较好）
+        h_min = max(0, int(h_mean - h_std * 1.8))
+        h_max = min(180, int(h_mean + h_std * 1.8))
+        s_min = max(0, int(s_mean - s_std * 1.5))
+        s_max = min(255, int(s_mean + s_std * 1.5))
+        v_min = max(0, int(v_mean - v_std * 1.5))
+        v_max = min(255, int(v_mean + v_std * 1.5))
+        
+        # 特殊处理白色花朵（低饱和度）
+        if color_name == "white":
+            s_max = min(50, s_max)  # 限制白色的最大饱和度
+        
+        return {
+            "lower": (h_min, s_min, v_min),
+            "upper": (h_max, s_max, v_max)
+        }
+    
+    def _thresholds_from_histogram(self, color_name, histogram):
+        """由直方图百分位计算阈值范围；色相按环形处理，跨越0时 H 下限大于上限"""
+        lower, upper = self.percentiles
+        if color_name == "white":
+            # 低饱和度下色相没有意义，白色不限制色相
+            h_min, h_max = 0, 180
+        else:
+            h_min, h_max = histogram.percentile_bounds(0, lower, upper, circular=True)
+            if h_min > h_max:
+                print(f"警告：{color_name} 的色相范围跨越0/180（{h_min}~179 与 0~{h_max}），"
+                      f"只能用支持环绕的分割（vision.segmentation.in_range 等），不能直接用 cv2.inRange")
+        s_min, s_max = histogram.percentile_bounds(1, lower, upper)
+        v_min, v_max = histogram.percentile_bounds(2, lower, upper)
+        
+        # 特殊处理白色花朵（低饱和度）
+        if color_name == "white":
+            s_max = min(50, s_max)  # 限制白色的最大饱和度
+        
+        return {
+            "lower": (h_min, s_min, v_min),
+            "upper": (h_max, s_max, v_max)
+        }
     
     def save_config(self, output_file="auto_thresholds.py"):
         """保存配置到Python文件"""
         with open(output_file, "w") as f:
             f.write("# 自动生成的HSV阈值配置\n")
-            f.write("# 基于测试图片分类计算\n\n")
+            f.write("# 基于测试图片分类计算\n")
+            f.write("# H 下限大于上限表示色相范围跨越0/180（环绕），检测端需用支持环绕的分割\n")
+            f.write("# （vision.segmentation.in_range、ColorSegmenter 或查找表），cv2.inRange 会得到全零掩码\n\n")
             
             for category, colors in self.results.items():
                 f.write(f"# {category} 光照条件下的阈值\n")
@@ -142,11 +403,71 @@ class ThresholdTuner:
                         var_name_lower = f"{color_name.upper()}_LOWER_{category.upper()}"
                         var_name_upper = f"{color_name.upper()}_UPPER_{category.upper()}"
                         
-                        f.write(f"{var_name_lower} = ({lower[0]}, {lower[1]}, {lower[2]})\n")
+                        wrap_note = f"  # 色相环绕：{lower[0]}~179 与 0~{upper[0]}" if lower[0] > upper[0] else ""
+                        f.write(f"{var_name_lower} = ({lower[0]}, {lower[1]}, {lower[2]}){wrap_note}\n")
                         f.write(f"{var_name_upper} = ({upper[0]}, {upper[1]}, {upper[2]})\n")
                 
                 f.write("\n")  # 空行分隔不同类别
     
+    def export_lut(self, output_file="color_lut.npy", bits=8, black_range=DEFAULT_BLACK_RANGE):
+        """导出各光照类别的 BGR→颜色类别查找表
+
+        output_file 保存 (类别数, 2^bits, 2^bits, 2^bits) 的 uint8 数组，运行时可用
+        np.load(mmap_mode="r") 直接加载；同名 .json 记录类别名称、量化位数和阈值。
+        bits=8 时与 inRange 结果完全一致（每类别16MB，运行时只有实际出现的颜色所在页被读入）；
+        bits=6 时每类别256KB，每个量化格以格中心的颜色判定类别，阈值边界附近略有差异。
+        """
+        categories = [category for category, colors in self.results.items()
+                      if any(isinstance(thresholds, dict) for thresholds in colors.values())]
+        if not categories:
+            raise ValueError("没有可导出的阈值，请先处理图片")
+
+        category_ranges = []
+        thresholds = {}
+        for category in categories:
+            ranges = {color_name: (value["lower"], value["upper"])
+                      for color_name, value in self.results[category].items() if isinstance(value, dict)}
+            ranges.setdefault("black", black_range)
+            category_ranges.append(ranges)
+            thresholds[category] = {color_name: [list(lower), list(upper)]
+                                    for color_name, (lower, upper) in ranges.items()}
+
+        # 量化格中心的BGR颜色按 B 平面分批转换为HSV后逐类别判定，
+        # 每批只有 levels² 个颜色，bits=8 时不必一次展开全部 1600 万个颜色
+        levels = 1 << bits
+        centers = ((np.arange(levels) << (8 - bits)) + (1 << (8 - bits)) // 2).astype(np.uint8)
+        g, r = np.meshgrid(centers, centers, indexing="ij")
+        plane = np.empty((1, levels * levels, 3), np.uint8)
+        plane[0, :, 1] = g.reshape(-1)
+        plane[0, :, 2] = r.reshape(-1)
+
+        luts = np.zeros((len(categories), levels, levels, levels), np.uint8)
+        for b in range(levels):
+            plane[0, :, 0] = centers[b]
+            hsv = cv2.cvtColor(plane, cv2.COLOR_BGR2HSV).reshape(-1, 3)
+            for index, ranges in enumerate(category_ranges):
+                table = luts[index, b].reshape(-1)
+                for color_name, (lower, upper) in ranges.items():
+                    table[self._in_range(hsv, lower, upper)] |= LUT_CLASS_BITS[color_name]
+
+        np.save(output_file, luts)
+        metadata = {"categories": categories, "bits": bits, "classes": LUT_CLASS_BITS, "thresholds": thresholds}
+        with open(os.path.splitext(output_file)[0] + ".json", "w") as f:
+            json.dump(metadata, f, indent=2, ensure_ascii=False)
+
+    @staticmethod
+    def _in_range(hsv, lower, upper):
+        """逐像素判断是否落在阈值范围内，H 下限大于上限时按环绕处理"""
+        hit = np.ones(len(hsv), bool)
+        for channel in range(3):
+            lo, hi = int(lower[channel]), int(upper[channel])
+            values = hsv[:, channel]
+            if lo <= hi:
+                hit &= (values >= lo) & (values <= hi)
+            else:
+                hit &= (values >= lo) | (values <= hi)
+        return hit
+
     def print_results(self):
         """打印计算结果"""
         for category, colors in self.results.items():
@@ -162,15 +483,33 @@ def main():
     parser = argparse.ArgumentParser(description='自动提取不同类别图片的HSV阈值')
     parser.add_argument('--folder', type=str, required=True, help='测试图片文件夹路径')
     parser.add_argument('--output', type=str, default='auto_thresholds.py', help='输出配置文件路径')
+    parser.add_argument('--mode', type=str, default='stream', choices=ThresholdTuner.MODES,
+                        help='stream（流式统计，多进程，内存恒定）、histogram（直方图百分位，可增量）或stack（保留全部像素）')
+    parser.add_argument('--workers', type=int, default=None, help='流式/直方图模式的进程数（默认CPU核数）')
+    parser.add_argument('--percentiles', type=float, nargs=2, default=(1, 99), metavar=('LOWER', 'UPPER'),
+                        help='直方图模式阈值的下限/上限百分位')
+    parser.add_argument('--lut', type=str, help='同时导出 BGR→颜色类别查找表 (.npy)，供运行时 COLOR_LUT_FILE 使用')
+    parser.add_argument('--lut-bits', type=int, default=8, choices=range(4, 9), help='查找表每通道量化位数')
+    parser.add_argument('--state', type=str, help='累积统计文件 (.npz)：存在则先载入，处理后保存')
     args = parser.parse_args()
     
-    tuner = ThresholdTuner()
+    tuner = ThresholdTuner(mode=args.mode, workers=args.workers, percentiles=tuple(args.percentiles))
+    if args.state and os.path.exists(args.state):
+        tuner.load_state(args.state)
+        print(f"已载入累积统计: {args.state}")
     tuner.process_image_folder(args.folder)
+    if args.state and args.mode != 'stack':
+        tuner.save_state(args.state)
+        print(f"累积统计已保存到: {args.state}")
     tuner.print_results()
     tuner.save_config(args.output)
     
     print(f"\n配置已保存到: {args.output}")
-    print("请将生成的阈值复制到config.py中使用")
+    if args.lut:
+        tuner.export_lut(args.lut, bits=args.lut_bits)
+        print(f"查找表已保存到: {args.lut}，将 config.py 中的 COLOR_LUT_FILE 指向该文件即可直接使用")
+    else:
+        print("请将生成的阈值复制到config.py中使用")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file